@@ -4,22 +4,70 @@ Extrae metadatos del nombre del archivo y contenido del PDF usando Docling
 """
 
 from pathlib import Path
+import argparse
 import json
+import os
 import re
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import PyPDF2
 from docling.document_converter import DocumentConverter
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions
 from docling.document_converter import PdfFormatOption
 
+try:
+    from Helpers.cacheExtraccion import CacheExtraccion
+    from Helpers.shardsJsonl import EscritorShardsJsonl, guardar_indice_shards, leer_documento_shard, NOMBRE_INDICE
+except ImportError:
+    # Ejecutado como script desde la carpeta Helpers
+    from cacheExtraccion import CacheExtraccion
+    from shardsJsonl import EscritorShardsJsonl, guardar_indice_shards, leer_documento_shard, NOMBRE_INDICE
 
-def configurar_converter():
+# Formatos de salida: un JSON indentado por gaceta o shards JSONL (con su compresión)
+FORMATOS_SALIDA = {
+    'json': None,
+    'jsonl': 'ninguna',
+    'jsonl.gz': 'gzip',
+    'jsonl.zst': 'zstd'
+}
+
+
+def _version_docling() -> str:
+    """Versión de docling instalada (parte de la clave del cache de extracción)"""
+    try:
+        from importlib.metadata import version
+        return version("docling")
+    except Exception:
+        return "desconocida"
+
+
+# Niveles de extracción, del más barato al más costoso
+NIVEL_TEXTO = "texto_pypdf2"
+NIVEL_SIN_OCR = "docling_sin_ocr"
+NIVEL_OCR = "docling_ocr"
+NIVEL_MIXTO = "mixto"
+
+# Campos con la estructura del documento (secciones con offsets en el texto, tablas como filas)
+CAMPOS_ESTRUCTURA = ("secciones", "tablas")
+# Versión del formato de la estructura (parte de la clave del cache de extracción)
+FORMATO_ESTRUCTURA = 3
+
+
+def configurar_converter(do_ocr: bool = True, do_table_structure: bool = True):
     """
     Configura el DocumentConverter con opciones para OCR y tablas
+    
+    Args:
+        do_ocr: Aplicar OCR a las páginas (default: True)
+        do_table_structure: Reconocer estructura de tablas (default: True)
     """
     pipeline_options = PdfPipelineOptions()
-    pipeline_options.do_ocr = True
-    pipeline_options.do_table_structure = True
+    pipeline_options.do_ocr = do_ocr
+    pipeline_options.do_table_structure = do_table_structure
     
     converter = DocumentConverter(
         format_options={
@@ -32,6 +80,100 @@ def configurar_converter():
     return converter
 
 
+def configurar_converters() -> Dict[str, DocumentConverter]:
+    """
+    Configura un converter por nivel de extracción: uno sin OCR ni tablas para
+    páginas con capa de texto y el pipeline completo (OCR + tablas) para escaneadas
+    """
+    return {
+        NIVEL_SIN_OCR: configurar_converter(do_ocr=False, do_table_structure=False),
+        NIVEL_OCR: configurar_converter(do_ocr=True, do_table_structure=True)
+    }
+
+
+def _legibilidad(texto: str) -> float:
+    """Proporción de caracteres legibles (letras, dígitos, espacios y puntuación común)"""
+    if not texto:
+        return 0.0
+    legibles = sum(1 for c in texto if c.isalnum() or c.isspace() or c in '.,;:()¿?¡!-"\'/%$°ºª')
+    return legibles / len(texto)
+
+
+def _pagina_tiene_imagenes(page) -> bool:
+    """
+    Indica si la página dibuja imágenes (o formularios que pueden contenerlas).
+    Ante cualquier duda se asume que sí, para no dejar sin OCR una página escaneada.
+    """
+    try:
+        # /Resources es heredable: si la página no lo tiene se busca en sus ancestros
+        nodo, recursos = page, None
+        while nodo is not None and recursos is None:
+            recursos = nodo.get('/Resources')
+            nodo = nodo.get('/Parent')
+            nodo = nodo.get_object() if nodo is not None else None
+        recursos = recursos.get_object() if recursos is not None else None
+        xobjects = recursos.get('/XObject') if recursos is not None else None
+        if xobjects is None:
+            return False
+        xobjects = xobjects.get_object()
+        return any(xobjects[nombre].get_object().get('/Subtype') in ('/Image', '/Form') for nombre in xobjects)
+    except Exception:
+        return True
+
+
+def sondear_capa_texto(pdf_path: str, min_caracteres: int = 100,
+                       min_legibilidad: float = 0.85) -> Tuple[List[str], List[bool]]:
+    """
+    Revisa la capa de texto de cada página con PyPDF2
+    
+    Una página con poco texto (portada, página en blanco, cierre corto) solo va a
+    OCR si tiene imágenes; sin imágenes no hay nada más que reconocer.
+    
+    Args:
+        pdf_path: Ruta al archivo PDF
+        min_caracteres: Mínimo de caracteres para considerar que una página con imágenes tiene texto
+        min_legibilidad: Mínima proporción de caracteres legibles (descarta texto basura)
+    
+    Returns:
+        Tupla (textos por página, lista indicando si cada página tiene texto utilizable)
+    """
+    textos = []
+    utilizables = []
+    with open(pdf_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages:
+            try:
+                texto = page.extract_text() or ""
+            except Exception:
+                texto = ""
+            textos.append(texto)
+            limpio = texto.strip()
+            if limpio and _legibilidad(limpio) < min_legibilidad:
+                utilizables.append(False)
+            else:
+                utilizables.append(len(limpio) >= min_caracteres or not _pagina_tiene_imagenes(page))
+    return textos, utilizables
+
+
+def _agrupar_tramos(utilizables: List[bool], max_paginas: int = None) -> List[Tuple[str, int, int]]:
+    """
+    Agrupa páginas consecutivas del mismo nivel en tramos (nivel, página inicial, página final)
+    
+    Args:
+        utilizables: Indica por página si tiene capa de texto utilizable
+        max_paginas: Tamaño máximo de cada tramo (None: sin límite)
+    """
+    tramos = []
+    for i, ok in enumerate(utilizables, 1):
+        nivel = NIVEL_SIN_OCR if ok else NIVEL_OCR
+        if (tramos and tramos[-1][0] == nivel
+                and (max_paginas is None or i - tramos[-1][1] < max_paginas)):
+            tramos[-1] = (nivel, tramos[-1][1], i)
+        else:
+            tramos.append((nivel, i, i))
+    return tramos
+
+
 def extraer_metadatos_nombre_archivo(nombre_archivo: str) -> Optional[Dict]:
     """
     Extrae metadatos del nombre del archivo de gaceta
@@ -68,29 +210,373 @@ def extraer_metadatos_nombre_archivo(nombre_archivo: str) -> Optional[Dict]:
         return None
 
 
-def extraer_texto_pdf(pdf_path: str, converter: DocumentConverter) -> str:
+def _pagina_item(item) -> Optional[int]:
+    """Número de página (base 1) de un elemento del documento Docling"""
+    prov = getattr(item, 'prov', None)
+    return prov[0].page_no if prov else None
+
+
+def _claves_columnas(encabezados: List[str], columnas: int) -> List[str]:
+    """Nombres únicos de columna para las filas de una tabla (columna_N si falta el encabezado)"""
+    claves = []
+    for i in range(columnas):
+        base = (encabezados[i].strip() if i < len(encabezados) and encabezados[i] else "") or f"columna_{i + 1}"
+        clave, n = base, 2
+        while clave in claves:
+            clave, n = f"{base}_{n}", n + 1
+        claves.append(clave)
+    return claves
+
+
+def extraer_estructura_documento(documento, markdown: str = "") -> Dict:
+    """
+    Extrae secciones, encabezados y tablas de un DoclingDocument como datos estructurados
+    
+    Las secciones no repiten su texto: se ubican en el markdown con los offsets
+    de caracteres inicio/fin (texto_completo[inicio:fin]).
+    
+    Args:
+        documento: result.document de una conversión de Docling
+        markdown: Markdown exportado del mismo documento (para ubicar las secciones)
+    
+    Returns:
+        Diccionario con 'secciones' (titulo, nivel, paginas y offsets de cada sección)
+        y 'tablas' (página, sección, encabezados y filas como listas de celdas columna/valor)
+    """
+    from docling_core.types.doc import DocItemLabel, TableItem
+    
+    secciones = []
+    tablas = []
+    actual = {"titulo": None, "nivel": 0, "pagina_inicio": None, "pagina_fin": None, "inicio": 0}
+    tiene_contenido = False
+    
+    def cerrar_seccion(fin: int):
+        if actual["titulo"] is not None or tiene_contenido:
+            secciones.append({**actual, "fin": fin})
+    
+    for item, _nivel in documento.iterate_items():
+        pagina = _pagina_item(item)
+        etiqueta = getattr(item, 'label', None)
+        
+        if isinstance(item, TableItem):
+            filas = [[celda.text for celda in fila] for fila in item.data.grid]
+            encabezados = []
+            if filas and any(getattr(celda, 'column_header', False) for celda in item.data.grid[0]):
+                encabezados = filas.pop(0)
+            claves = _claves_columnas(encabezados, max((len(fila) for fila in filas), default=0))
+            # Celdas como pares columna/valor: los encabezados no se convierten en campos
+            # (en Elasticsearch cada encabezado distinto sería un campo dinámico nuevo)
+            tablas.append({
+                "pagina": pagina,
+                "seccion": actual["titulo"],
+                "encabezados": encabezados,
+                "filas": [{"celdas": [{"columna": clave, "valor": valor} for clave, valor in zip(claves, fila)]}
+                          for fila in filas]
+            })
+        elif etiqueta in (DocItemLabel.SECTION_HEADER, DocItemLabel.TITLE):
+            # El encabezado se busca después del inicio de la sección actual
+            posicion = markdown.find(item.text, actual["inicio"]) if item.text else -1
+            if posicion < 0:
+                posicion = actual["inicio"]
+            else:
+                # Desde el inicio de la línea, incluyendo la marca de encabezado (## )
+                posicion = max(actual["inicio"], markdown.rfind("\n", 0, posicion) + 1)
+            cerrar_seccion(posicion)
+            actual = {
+                "titulo": item.text,
+                "nivel": getattr(item, 'level', 0 if etiqueta == DocItemLabel.TITLE else 1),
+                "pagina_inicio": pagina,
+                "pagina_fin": pagina,
+                "inicio": posicion
+            }
+            tiene_contenido = False
+            continue
+        elif getattr(item, 'text', None):
+            tiene_contenido = True
+        else:
+            continue
+        
+        if pagina is not None:
+            actual["pagina_inicio"] = actual["pagina_inicio"] or pagina
+            actual["pagina_fin"] = pagina
+    
+    cerrar_seccion(len(markdown))
+    return {"secciones": secciones, "tablas": tablas}
+
+
+def _fusionar_estructura(acumulada: Dict, nueva: Dict, desplazamiento: int = 0):
+    """
+    Agrega la estructura de un tramo de páginas a la acumulada. Si el tramo empieza
+    sin encabezado, continúa la última sección del tramo anterior.
+    
+    Args:
+        acumulada: Estructura de los tramos anteriores
+        nueva: Estructura del tramo (offsets relativos a su propio markdown)
+        desplazamiento: Posición del markdown del tramo dentro del texto completo
+    """
+    secciones = nueva.get("secciones", [])
+    for seccion in secciones:
+        seccion["inicio"] += desplazamiento
+        seccion["fin"] += desplazamiento
+    if secciones and secciones[0]["titulo"] is None and acumulada["secciones"]:
+        continuacion = secciones.pop(0)
+        ultima = acumulada["secciones"][-1]
+        ultima["fin"] = continuacion["fin"]
+        ultima["pagina_fin"] = continuacion["pagina_fin"] or ultima["pagina_fin"]
+        for tabla in nueva.get("tablas", []):
+            if tabla["seccion"] is None:
+                tabla["seccion"] = ultima["titulo"]
+    elif acumulada["secciones"] and secciones:
+        # La última sección del tramo anterior termina donde empieza este tramo
+        acumulada["secciones"][-1]["fin"] = max(acumulada["secciones"][-1]["fin"], secciones[0]["inicio"])
+    acumulada["secciones"].extend(secciones)
+    acumulada["tablas"].extend(nueva.get("tablas", []))
+
+
+def convertir_pdf(pdf_path: str, converter: DocumentConverter,
+                  cache: Optional[CacheExtraccion] = None,
+                  variante: str = NIVEL_OCR, page_range: Tuple[int, int] = None,
+                  incluir_estructura: bool = False, sha256: str = None) -> Tuple[str, Optional[Dict]]:
+    """
+    Convierte un PDF (o un rango de páginas) con Docling y retorna el markdown y,
+    opcionalmente, la estructura del documento (secciones y tablas). Ambos se
+    guardan en el cache de extracción.
+    
+    Args:
+        pdf_path: Ruta al archivo PDF
+        converter: Instancia de DocumentConverter configurada
+        cache: Cache de extracción (default: cache compartido)
+        variante: Configuración del converter (parte de la clave del cache)
+        page_range: Rango de páginas (inicio, fin) base 1 inclusivo, None para todo el PDF
+        incluir_estructura: Extraer también secciones y tablas de result.document
+        sha256: Hash del PDF ya calculado (None: se calcula aquí)
+    
+    Returns:
+        Tupla (markdown, estructura o None)
+    """
+    if cache is None:
+        cache = CacheExtraccion.por_defecto()
+    if sha256 is None:
+        sha256 = cache.calcular_hash(pdf_path)
+    version = f"{_version_docling()}|{variante}"
+    if page_range is not None:
+        version += f"|paginas={page_range[0]}-{page_range[1]}"
+    version_estructura = f"{version}|formato={FORMATO_ESTRUCTURA}"
+    
+    texto_completo = cache.obtener(sha256, 'docling-markdown', version)
+    estructura = None
+    if incluir_estructura and texto_completo is not None:
+        estructura_json = cache.obtener(sha256, 'docling-estructura', version_estructura)
+        if estructura_json is None:
+            texto_completo = None
+        else:
+            estructura = json.loads(estructura_json)
+    if texto_completo is not None:
+        print(f"  → Texto recuperado del cache de extracción")
+        return texto_completo, estructura
+    
+    if page_range is not None:
+        result = converter.convert(pdf_path, page_range=page_range)
+    else:
+        result = converter.convert(pdf_path)
+    texto_completo = result.document.export_to_markdown()
+    cache.guardar(sha256, 'docling-markdown', version, texto_completo)
+    
+    if incluir_estructura:
+        estructura = extraer_estructura_documento(result.document, texto_completo)
+        cache.guardar(sha256, 'docling-estructura', version_estructura,
+                      json.dumps(estructura, ensure_ascii=False))
+    return texto_completo, estructura
+
+
+def extraer_texto_pdf(pdf_path: str, converter: DocumentConverter,
+                      cache: Optional[CacheExtraccion] = None,
+                      variante: str = NIVEL_OCR, page_range: Tuple[int, int] = None) -> str:
     """
     Extrae el texto completo de un PDF usando Docling
     
+    El markdown se guarda en el cache de extracción (clave: SHA-256 del PDF +
+    versión de docling), así que un PDF ya convertido no se vuelve a procesar.
+    
     Args:
         pdf_path: Ruta al archivo PDF
         converter: Instancia de DocumentConverter configurada
+        cache: Cache de extracción (default: cache compartido)
+        variante: Configuración del converter (parte de la clave del cache)
+        page_range: Rango de páginas (inicio, fin) base 1 inclusivo, None para todo el PDF
     
     Returns:
         Texto completo extraído en formato markdown
     """
-    result = converter.convert(pdf_path)
-    texto_completo = result.document.export_to_markdown()
+    texto_completo, _ = convertir_pdf(pdf_path, converter, cache, variante, page_range)
     return texto_completo
 
 
-def procesar_gaceta(pdf_path: Path, converter: DocumentConverter) -> Optional[Dict]:
+def iterar_texto_pdf_escalonado(pdf_path: str, converters: Dict[str, DocumentConverter],
+                                cache: Optional[CacheExtraccion] = None,
+                                permitir_texto_plano: bool = False,
+                                paginas_por_ventana: int = None,
+                                forzar_ocr: bool = False,
+                                incluir_estructura: bool = False,
+                                sha256: str = None) -> Tuple[Iterator[str], Dict]:
+    """
+    Extrae el texto usando el nivel más barato que sea suficiente para cada página:
+    Docling sin OCR (o PyPDF2 si se permite texto plano) para páginas con capa de
+    texto, y el pipeline completo OCR + tablas solo para las páginas escaneadas.
+    
+    Con paginas_por_ventana el PDF se convierte por rangos de páginas de ese tamaño
+    y el markdown se entrega parte por parte, así la memoria depende de la ventana
+    y no del tamaño del documento.
+    
+    Con incluir_estructura la información incluye 'secciones' y 'tablas', que se
+    completan a medida que se consume el iterador.
+    
+    Args:
+        pdf_path: Ruta al archivo PDF
+        converters: Converters por nivel (ver configurar_converters)
+        cache: Cache de extracción (default: cache compartido)
+        permitir_texto_plano: Si todas las páginas tienen texto, usar PyPDF2 sin Docling
+        paginas_por_ventana: Páginas por conversión (None: documento completo)
+        forzar_ocr: Usar el pipeline completo en todas las páginas (sin sondeo)
+        incluir_estructura: Exportar secciones, encabezados y tablas del documento
+        sha256: Hash del PDF ya calculado (None: se calcula una vez para todos los tramos)
+    
+    Returns:
+        Tupla (iterador de partes del markdown, información del nivel usado)
+    """
+    estructura = {"secciones": [], "tablas": []} if incluir_estructura else {}
+    
+    try:
+        if forzar_ocr:
+            with open(pdf_path, 'rb') as f:
+                total = len(PyPDF2.PdfReader(f).pages)
+            textos, utilizables = [""] * total, [False] * total
+        else:
+            textos, utilizables = sondear_capa_texto(pdf_path)
+    except Exception as e:
+        print(f"  ⚠ No se pudo leer la capa de texto ({e}), se usa OCR completo")
+        info = {"nivel_extraccion": NIVEL_OCR, "total_paginas": None, "paginas_ocr": None, **estructura}
+        
+        def parte_completa():
+            texto, estructura_doc = convertir_pdf(pdf_path, converters[NIVEL_OCR], cache,
+                                                  variante=NIVEL_OCR, incluir_estructura=incluir_estructura,
+                                                  sha256=sha256)
+            if estructura_doc:
+                _fusionar_estructura(estructura, estructura_doc)
+            yield texto
+        
+        return parte_completa(), info
+    
+    total_paginas = len(utilizables)
+    paginas_ocr = [i for i, ok in enumerate(utilizables, 1) if not ok]
+    info = {"total_paginas": total_paginas, "paginas_ocr": paginas_ocr, **estructura}
+    
+    if not paginas_ocr:
+        info["nivel_extraccion"] = NIVEL_TEXTO if permitir_texto_plano else NIVEL_SIN_OCR
+        if permitir_texto_plano:
+            return iter(["\n".join(textos).strip()]), info
+    elif len(paginas_ocr) == total_paginas:
+        info["nivel_extraccion"] = NIVEL_OCR
+    else:
+        print(f"  → OCR en {len(paginas_ocr)}/{total_paginas} páginas")
+        info["nivel_extraccion"] = NIVEL_MIXTO
+    del textos
+    
+    tramos = _agrupar_tramos(utilizables, max_paginas=paginas_por_ventana)
+    
+    def partes():
+        # El hash del PDF es parte de la clave del cache de cada tramo: se calcula una sola vez
+        hash_pdf = sha256 or CacheExtraccion.calcular_hash(pdf_path)
+        if len(tramos) == 1 and paginas_por_ventana is None:
+            nivel = tramos[0][0]
+            texto, estructura_doc = convertir_pdf(pdf_path, converters[nivel], cache, variante=nivel,
+                                                  incluir_estructura=incluir_estructura, sha256=hash_pdf)
+            if estructura_doc:
+                _fusionar_estructura(estructura, estructura_doc)
+            yield texto
+            return
+        # Cada tramo (o ventana) se convierte por separado y se libera antes del siguiente
+        posicion = 0
+        for idx, (nivel, inicio, fin) in enumerate(tramos):
+            if paginas_por_ventana is not None:
+                print(f"  → Páginas {inicio}-{fin} de {total_paginas} ({nivel})")
+            parte, estructura_doc = convertir_pdf(pdf_path, converters[nivel], cache,
+                                                  variante=nivel, page_range=(inicio, fin),
+                                                  incluir_estructura=incluir_estructura, sha256=hash_pdf)
+            if idx > 0:
+                parte = "\n\n" + parte
+            if estructura_doc:
+                # Offsets del tramo → offsets en el texto completo (después del separador)
+                _fusionar_estructura(estructura, estructura_doc, posicion + (2 if idx > 0 else 0))
+            posicion += len(parte)
+            yield parte
+    
+    return partes(), info
+
+
+def extraer_texto_pdf_escalonado(pdf_path: str, converters: Dict[str, DocumentConverter],
+                                 cache: Optional[CacheExtraccion] = None,
+                                 permitir_texto_plano: bool = False,
+                                 incluir_estructura: bool = False, sha256: str = None) -> Tuple[str, Dict]:
+    """
+    Extrae el texto completo con el nivel más barato suficiente (ver iterar_texto_pdf_escalonado)
+    
+    Returns:
+        Tupla (texto extraído, información del nivel usado y estructura si se pidió)
+    """
+    partes, info = iterar_texto_pdf_escalonado(pdf_path, converters, cache, permitir_texto_plano,
+                                               incluir_estructura=incluir_estructura, sha256=sha256)
+    return "".join(partes), info
+
+
+def _exportar_json_streaming(json_path: Path, campos: Dict, partes_texto: Iterator[str],
+                             campos_posteriores: Dict = None) -> int:
+    """
+    Escribe el JSON de una gaceta agregando texto_completo parte por parte,
+    sin tener el texto completo en memoria
+    
+    Args:
+        json_path: Ruta del archivo JSON de salida
+        campos: Metadatos de la gaceta (sin texto_completo)
+        partes_texto: Iterador con las partes del texto
+        campos_posteriores: Campos que se completan al consumir partes_texto (se escriben al final)
+    
+    Returns:
+        Número de caracteres de texto escritos
+    """
+    caracteres = 0
+    tmp_path = json_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("{\n")
+        for clave, valor in campos.items():
+            f.write(f"  {json.dumps(clave, ensure_ascii=False)}: {json.dumps(valor, ensure_ascii=False)},\n")
+        f.write('  "texto_completo": "')
+        for parte in partes_texto:
+            # Cada parte se escapa como string JSON y se escribe sin las comillas
+            f.write(json.dumps(parte, ensure_ascii=False)[1:-1])
+            caracteres += len(parte)
+        f.write('"')
+        for clave, valor in (campos_posteriores or {}).items():
+            f.write(f",\n  {json.dumps(clave, ensure_ascii=False)}: {json.dumps(valor, ensure_ascii=False)}")
+        f.write('\n}')
+    os.replace(tmp_path, json_path)
+    return caracteres
+
+
+def procesar_gaceta(pdf_path: Path,
+                    converter: Union[DocumentConverter, Dict[str, DocumentConverter]],
+                    incluir_estructura: bool = False, sha256: str = None,
+                    texto_plano: bool = False) -> Optional[Dict]:
     """
     Procesa una gaceta individual: extrae metadatos del nombre y texto del PDF
     
     Args:
         pdf_path: Path al archivo PDF
-        converter: Instancia de DocumentConverter
+        converter: Instancia de DocumentConverter (OCR completo), o converters por
+                   nivel de configurar_converters() para la extracción escalonada
+        incluir_estructura: Agregar los campos 'secciones' y 'tablas' del documento
+        sha256: Hash del PDF ya calculado (opcional)
+        texto_plano: Si todas las páginas tienen capa de texto, extraerlo con PyPDF2 sin Docling
     
     Returns:
         Diccionario con toda la información de la gaceta
@@ -104,25 +590,393 @@ def procesar_gaceta(pdf_path: Path, converter: DocumentConverter) -> Optional[Di
     
     # Extraer texto del PDF
     print(f"  → Extrayendo texto del PDF...")
-    texto_completo = extraer_texto_pdf(str(pdf_path), converter)
+    if isinstance(converter, dict):
+        texto_completo, info_nivel = extraer_texto_pdf_escalonado(str(pdf_path), converter,
+                                                                  permitir_texto_plano=texto_plano,
+                                                                  incluir_estructura=incluir_estructura,
+                                                                  sha256=sha256)
+    else:
+        texto_completo, estructura = convertir_pdf(str(pdf_path), converter,
+                                                   incluir_estructura=incluir_estructura, sha256=sha256)
+        info_nivel = {"nivel_extraccion": NIVEL_OCR, **(estructura or {})}
+    
+    # Estructura después del texto, igual que en la exportación por ventanas
+    estructura = {k: info_nivel.pop(k) for k in CAMPOS_ESTRUCTURA if k in info_nivel}
     
     # Combinar metadatos y texto
     gaceta_completa = {
         **metadatos,  # id, corporacion, numeroGaceta, año
-        "texto_completo": texto_completo
+        **info_nivel,  # nivel_extraccion, total_paginas, paginas_ocr
+        "texto_completo": texto_completo,
+        **estructura  # secciones, tablas
     }
     
     return gaceta_completa
 
 
-def procesar_carpeta_gacetas(carpeta_entrada: str = "camara", carpeta_salida: str = None):
+def procesar_y_exportar_gaceta(pdf_path: Path, carpeta_salida: Path,
+                               converter: Union[DocumentConverter, Dict[str, DocumentConverter]],
+                               paginas_por_ventana: int = None,
+                               escritor: Optional[EscritorShardsJsonl] = None,
+                               sink=None, incluir_estructura: bool = False, sha256: str = None,
+                               texto_plano: bool = False) -> Dict:
+    """
+    Procesa una gaceta, la exporta a JSON y retorna su detalle para el resumen
+    
+    Args:
+        pdf_path: Path al archivo PDF
+        carpeta_salida: Carpeta donde guardar el JSON
+        converter: DocumentConverter o converters por nivel (ver procesar_gaceta)
+        paginas_por_ventana: Convertir por ventanas de páginas y escribir el JSON en streaming
+        escritor: Escritor de shards JSONL (None: un archivo JSON por gaceta)
+        sink: Destino adicional con método agregar(doc), ej: SinkElastic para indexar al vuelo
+        incluir_estructura: Exportar también secciones, encabezados y tablas
+        sha256: Hash del PDF ya calculado (None: se calcula una vez aquí)
+        texto_plano: PDFs con capa de texto en todas las páginas se extraen con PyPDF2 sin Docling
+    
+    Returns:
+        Diccionario con el estado del archivo, su hash y el tiempo de procesamiento
+    """
+    inicio = time.perf_counter()
+    
+    try:
+        if sha256 is None:
+            sha256 = CacheExtraccion.calcular_hash(str(pdf_path))
+        
+        if paginas_por_ventana:
+            return _procesar_y_exportar_por_ventanas(pdf_path, carpeta_salida, converter,
+                                                     paginas_por_ventana, inicio, escritor, sink,
+                                                     incluir_estructura, sha256, texto_plano)
+        
+        # Procesar gaceta
+        gaceta_data = procesar_gaceta(pdf_path, converter, incluir_estructura, sha256, texto_plano)
+        
+        if gaceta_data is None:
+            return {
+                "archivo": pdf_path.name,
+                "estado": "error",
+                "mensaje": "Formato de nombre incorrecto",
+                "tiempo_segundos": round(time.perf_counter() - inicio, 2)
+            }
+        
+        ubicacion = {}
+        if escritor is not None:
+            # Agregar al shard JSONL comprimido
+            ubicacion = escritor.escribir(gaceta_data)
+            json_filename = ubicacion['shard']
+        else:
+            # Guardar JSON individual
+            json_filename = f"{pdf_path.stem}.json"
+            json_path = carpeta_salida / json_filename
+            
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(gaceta_data, f, ensure_ascii=False, indent=2)
+        
+        _enviar_a_sink(sink, gaceta_data, pdf_path.name)
+        
+        tiempo = round(time.perf_counter() - inicio, 2)
+        print(f"  ✓ Exportado a: {json_filename}")
+        print(f"    - ID: {gaceta_data['id']}")
+        print(f"    - Corporación: {gaceta_data['corporacion']}")
+        print(f"    - Número de Gaceta: {gaceta_data['numeroGaceta']}")
+        print(f"    - Año: {gaceta_data['año']}")
+        print(f"    - Caracteres extraídos: {len(gaceta_data['texto_completo'])}")
+        print(f"    - Nivel de extracción: {gaceta_data['nivel_extraccion']}")
+        if incluir_estructura:
+            print(f"    - Secciones: {len(gaceta_data['secciones'])}, tablas: {len(gaceta_data['tablas'])}")
+        print(f"    - Tiempo: {tiempo}s")
+        
+        return {
+            "archivo": pdf_path.name,
+            "json_generado": json_filename,
+            "estado": "exitoso",
+            "tiempo_segundos": tiempo,
+            "sha256": sha256,
+            **ubicacion,
+            **_resumir_campos(gaceta_data)
+        }
+        
+    except Exception as e:
+        print(f"  ✗ Error procesando {pdf_path.name}: {str(e)}")
+        return {
+            "archivo": pdf_path.name,
+            "estado": "error",
+            "mensaje": str(e),
+            "tiempo_segundos": round(time.perf_counter() - inicio, 2)
+        }
+
+
+def _procesar_y_exportar_por_ventanas(pdf_path: Path, carpeta_salida: Path,
+                                      converter: Union[DocumentConverter, Dict[str, DocumentConverter]],
+                                      paginas_por_ventana: int, inicio: float,
+                                      escritor: Optional[EscritorShardsJsonl] = None,
+                                      sink=None, incluir_estructura: bool = False,
+                                      sha256: str = None, texto_plano: bool = False) -> Dict:
+    """Variante de procesar_y_exportar_gaceta que convierte por ventanas de páginas"""
+    metadatos = extraer_metadatos_nombre_archivo(pdf_path.name)
+    if metadatos is None:
+        return {
+            "archivo": pdf_path.name,
+            "estado": "error",
+            "mensaje": "Formato de nombre incorrecto",
+            "tiempo_segundos": round(time.perf_counter() - inicio, 2)
+        }
+    
+    # Con un único converter (pipeline completo) no se sondea la capa de texto
+    forzar_ocr = not isinstance(converter, dict)
+    if forzar_ocr:
+        converter = {NIVEL_OCR: converter}
+    
+    print(f"  → Extrayendo texto del PDF por ventanas de {paginas_por_ventana} páginas...")
+    partes, info_nivel = iterar_texto_pdf_escalonado(str(pdf_path), converter,
+                                                     permitir_texto_plano=texto_plano and not forzar_ocr,
+                                                     paginas_por_ventana=paginas_por_ventana,
+                                                     forzar_ocr=forzar_ocr,
+                                                     incluir_estructura=incluir_estructura,
+                                                     sha256=sha256)
+    
+    # Las listas de estructura se llenan mientras se consumen las partes: van después del texto
+    estructura = {k: info_nivel.pop(k) for k in CAMPOS_ESTRUCTURA if k in info_nivel}
+    campos = {**metadatos, **info_nivel}
+    
+    ubicacion = {}
+    if escritor is not None:
+        caracteres = 0
+        
+        def contar(partes_texto):
+            nonlocal caracteres
+            for parte in partes_texto:
+                caracteres += len(parte)
+                yield parte
+        
+        ubicacion = escritor.escribir(campos, contar(partes), campos_posteriores=estructura)
+        json_filename = ubicacion['shard']
+    else:
+        json_filename = f"{pdf_path.stem}.json"
+        caracteres = _exportar_json_streaming(carpeta_salida / json_filename, campos, partes, estructura)
+    
+    if sink is not None:
+        # El sink lee el documento recién exportado al enviarlo, sin guardar las partes en memoria
+        if ubicacion:
+            cargar = partial(_leer_documento_exportado, carpeta=str(carpeta_salida), ubicacion=ubicacion)
+        else:
+            cargar = partial(_leer_documento_exportado, ruta_json=str(carpeta_salida / json_filename))
+        _enviar_a_sink(sink, clave=pdf_path.name, cargar=cargar)
+    
+    tiempo = round(time.perf_counter() - inicio, 2)
+    print(f"  ✓ Exportado a: {json_filename}")
+    print(f"    - Caracteres extraídos: {caracteres}")
+    print(f"    - Nivel de extracción: {info_nivel['nivel_extraccion']}")
+    if incluir_estructura:
+        print(f"    - Secciones: {len(estructura['secciones'])}, tablas: {len(estructura['tablas'])}")
+    print(f"    - Tiempo: {tiempo}s")
+    
+    return {
+        "archivo": pdf_path.name,
+        "json_generado": json_filename,
+        "estado": "exitoso",
+        "tiempo_segundos": tiempo,
+        "sha256": sha256,
+        **ubicacion,
+        **_resumir_campos({**campos, **estructura})
+    }
+
+
+def _resumir_campos(gaceta_data: Dict) -> Dict:
+    """Campos de la gaceta para el resumen: sin el texto y con la estructura como conteos"""
+    resumen = {k: v for k, v in gaceta_data.items()
+               if k != 'texto_completo' and k not in CAMPOS_ESTRUCTURA}
+    for campo in CAMPOS_ESTRUCTURA:
+        if campo in gaceta_data:
+            resumen[f"total_{campo}"] = len(gaceta_data[campo])
+    return resumen
+
+
+def _leer_documento_exportado(ruta_json: str = None, carpeta: str = None, ubicacion: Dict = None) -> Dict:
+    """Lee una gaceta ya exportada: su JSON individual o su documento en un shard"""
+    if ubicacion:
+        return leer_documento_shard(carpeta, ubicacion)
+    with open(ruta_json, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _enviar_a_sink(sink, gaceta_data: Dict = None, clave: str = None, cargar=None):
+    """
+    Envía la gaceta al sink sin interrumpir el ETL si falla. Con cargar, el documento
+    se lee recién al enviarlo (gacetas exportadas por ventanas).
+    """
+    if sink is None:
+        return
+    try:
+        if cargar is not None:
+            sink.agregar_diferido(cargar, clave)
+        else:
+            sink.agregar(gaceta_data, clave)
+    except Exception as e:
+        print(f"  ⚠ No se pudo enviar la gaceta al sink: {e}")
+
+
+def _crear_sink_elastic(indice_elastic: str, al_resultado=None):
+    """
+    Crea un SinkElastic con las credenciales de las variables de entorno
+    (ELASTIC_CLOUD_URL, ELASTIC_API_KEY), igual que la aplicación.
+    al_resultado(archivo, ok, error) recibe el resultado de cada gaceta enviada.
+    """
+    try:
+        from Helpers.elastic import ElasticSearch, SinkElastic
+    except ImportError:
+        from elastic import ElasticSearch, SinkElastic
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    
+    cloud_url = os.getenv('ELASTIC_CLOUD_URL', '')
+    api_key = os.getenv('ELASTIC_API_KEY', '')
+    if not cloud_url.strip() or not api_key:
+        print("❌ ElasticSearch no está configurado (ELASTIC_CLOUD_URL / ELASTIC_API_KEY)")
+        return None
+    
+    elastic = ElasticSearch(cloud_url.strip(), api_key.strip())
+    if not elastic.test_connection():
+        return None
+    return SinkElastic(elastic, indice_elastic, al_resultado=al_resultado)
+
+
+class _RecolectorDocumento:
+    """Sink de los workers: guarda el documento (o cómo leerlo) para devolverlo al proceso principal"""
+    
+    def __init__(self):
+        self.documento = None
+        self.cargar = None
+    
+    def agregar(self, doc: Dict, clave: str = None):
+        self.documento = doc
+    
+    def agregar_diferido(self, cargar, clave: str = None):
+        self.cargar = cargar
+
+
+# Converters (y escritor de shards) propios de cada proceso worker, se crean una sola vez por proceso
+_converter_worker = None
+_escritor_worker = None
+
+
+def _crear_escritor(carpeta_salida: Path, formato_salida: str, prefijo: str = 'gacetas') -> Optional[EscritorShardsJsonl]:
+    """Crea el escritor de shards para el formato de salida (None para JSON individual)"""
+    compresion = FORMATOS_SALIDA[formato_salida]
+    if compresion is None:
+        return None
+    return EscritorShardsJsonl(str(carpeta_salida), prefijo=prefijo, compresion=compresion)
+
+
+def _inicializar_worker(carpeta_salida: str = None, formato_salida: str = 'json'):
+    """Inicializa los DocumentConverter del proceso worker y su escritor de shards"""
+    global _converter_worker, _escritor_worker
+    _converter_worker = configurar_converters()
+    if carpeta_salida is not None:
+        # Cada worker escribe sus propios shards, no hay escrituras concurrentes a un mismo archivo
+        _escritor_worker = _crear_escritor(Path(carpeta_salida), formato_salida,
+                                           prefijo=f"gacetas-w{os.getpid()}")
+
+
+def _procesar_en_worker(pdf_path: str, carpeta_salida: str, paginas_por_ventana: int = None,
+                        devolver_documento: bool = False, incluir_estructura: bool = False,
+                        sha256: str = None, texto_plano: bool = False) -> Dict:
+    """
+    Procesa una gaceta dentro de un proceso worker usando su converter.
+    Con devolver_documento la gaceta completa vuelve en la clave 'documento'
+    (o, si se exportó por ventanas, la función para leerla en 'cargar_documento')
+    para que el proceso principal la envíe al sink.
+    """
+    print(f"[pid {os.getpid()}] Procesando: {Path(pdf_path).name}")
+    recolector = _RecolectorDocumento() if devolver_documento else None
+    detalle = procesar_y_exportar_gaceta(Path(pdf_path), Path(carpeta_salida), _converter_worker,
+                                         paginas_por_ventana, _escritor_worker, recolector,
+                                         incluir_estructura, sha256, texto_plano)
+    if recolector is not None and recolector.documento is not None:
+        detalle['documento'] = recolector.documento
+    if recolector is not None and recolector.cargar is not None:
+        detalle['cargar_documento'] = recolector.cargar
+    return detalle
+
+
+def _actualizar_indice_shards(carpeta_salida: Path, detalles: List[Dict]):
+    """Actualiza el índice id → (shard, offset, longitud) con los detalles escritos en shards"""
+    indice_path = carpeta_salida / NOMBRE_INDICE
+    indice = {}
+    if indice_path.exists():
+        try:
+            with open(indice_path, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+        except Exception as e:
+            print(f"⚠ No se pudo leer {NOMBRE_INDICE}, se reconstruye: {e}")
+    
+    for detalle in detalles:
+        # También las que fallaron solo al indexar en Elasticsearch: su copia en el shard es válida
+        if 'shard' in detalle:
+            indice[Path(detalle['archivo']).stem] = {
+                "id": detalle.get('id'),
+                "shard": detalle['shard'],
+                "offset": detalle['offset'],
+                "longitud": detalle['longitud']
+            }
+    guardar_indice_shards(str(carpeta_salida), indice)
+
+
+def _cargar_resumen_previo(resumen_path: Path) -> Dict:
+    """Carga los detalles de una ejecución anterior indexados por nombre de archivo"""
+    if not resumen_path.exists():
+        return {}
+    try:
+        with open(resumen_path, 'r', encoding='utf-8') as f:
+            resumen = json.load(f)
+        return {d['archivo']: d for d in resumen.get('detalles', []) if 'archivo' in d}
+    except Exception as e:
+        print(f"⚠ No se pudo leer el resumen previo {resumen_path.name}: {e}")
+        return {}
+
+
+def _guardar_resumen(resumen_path: Path, resumen: Dict):
+    """Guarda el resumen de forma atómica (sirve como checkpoint tras cada archivo)"""
+    tmp_path = resumen_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, resumen_path)
+
+
+def procesar_carpeta_gacetas(carpeta_entrada: str = "camara", carpeta_salida: str = None,
+                             workers: int = 1, incremental: bool = True, solo_fallidos: bool = False,
+                             paginas_por_ventana: int = None, formato_salida: str = 'json',
+                             indice_elastic: str = None, incluir_estructura: bool = False,
+                             texto_plano: bool = False):
     """
     Procesa todas las gacetas en una carpeta y exporta cada una a JSON
     
+    Con workers > 1 los PDFs se reparten entre procesos, cada uno con su propio
+    DocumentConverter, empezando por los más grandes para balancear la carga.
+    
+    El resumen se reescribe después de cada archivo, así una ejecución interrumpida
+    se puede retomar: en modo incremental se omiten los PDFs cuyo JSON ya existe y
+    cuyo SHA-256 coincide con el registrado en el resumen.
+    
     Args:
         carpeta_entrada: Ruta a la carpeta con los PDFs (default: 'camara')
         carpeta_salida: Ruta donde guardar los JSON (opcional, por defecto mismo directorio)
+        workers: Número de procesos en paralelo (default: 1, secuencial)
+        incremental: Omitir PDFs ya procesados y sin cambios (default: True)
+        solo_fallidos: Reprocesar solo los archivos con estado 'error' en el resumen previo
+        paginas_por_ventana: Convertir cada PDF por ventanas de N páginas (acota la memoria)
+        formato_salida: 'json' (un archivo por gaceta) o shards 'jsonl', 'jsonl.gz', 'jsonl.zst'
+        indice_elastic: Si se indica, cada gaceta convertida se indexa de inmediato en este índice
+        incluir_estructura: Exportar secciones, encabezados y tablas de cada gaceta
+        texto_plano: Extraer con PyPDF2, sin Docling, los PDFs con capa de texto en todas las páginas
     """
+    if formato_salida not in FORMATOS_SALIDA:
+        print(f"❌ Error: formato de salida '{formato_salida}' no soportado")
+        return
+    
     carpeta_entrada = Path(carpeta_entrada)
     
     # Validar que existe la carpeta
@@ -137,90 +991,188 @@ def procesar_carpeta_gacetas(carpeta_entrada: str = "camara", carpeta_salida: st
         carpeta_salida = Path(carpeta_salida)
         carpeta_salida.mkdir(parents=True, exist_ok=True)
     
-    # Obtener todos los archivos PDF
-    archivos_pdf = list(carpeta_entrada.glob("*.pdf"))
+    # Obtener todos los archivos PDF (los más grandes primero)
+    archivos_pdf = sorted(carpeta_entrada.glob("*.pdf"), key=lambda p: p.stat().st_size, reverse=True)
     
     if not archivos_pdf:
         print(f"❌ No se encontraron archivos PDF en '{carpeta_entrada}'")
         return
     
+    resumen_path = carpeta_salida / "resumen_procesamiento_gacetas.json"
+    previos = _cargar_resumen_previo(resumen_path) if (incremental or solo_fallidos) else {}
+    
+    if solo_fallidos and not previos:
+        print(f"❌ No hay resumen previo en '{carpeta_salida}' para reprocesar fallidos")
+        return
+    
+    # Decidir qué archivos procesar y cuáles se conservan de la ejecución anterior
+    resultados = {}
+    pendientes = []
+    # Hash de cada PDF calculado en la verificación incremental, para no leerlo otra vez al procesarlo
+    hashes = {}
+    for pdf_path in archivos_pdf:
+        previo = previos.get(pdf_path.name)
+        
+        if solo_fallidos:
+            if previo is not None and previo.get('estado') != 'error':
+                resultados[pdf_path.name] = previo
+            else:
+                pendientes.append(pdf_path)
+            continue
+        
+        # Sin estructura previa (o con un formato anterior) no se omite si ahora se pide la estructura
+        if incremental and previo is not None and previo.get('estado') == 'exitoso' and \
+                (not incluir_estructura or previo.get('estructura') == FORMATO_ESTRUCTURA):
+            json_previo = carpeta_salida / previo.get('json_generado', f"{pdf_path.stem}.json")
+            if json_previo.exists():
+                hashes[pdf_path.name] = CacheExtraccion.calcular_hash(str(pdf_path))
+                if previo.get('sha256') == hashes[pdf_path.name]:
+                    resultados[pdf_path.name] = previo
+                    continue
+        
+        pendientes.append(pdf_path)
+    
+    omitidos = len(resultados)
+    
     print(f"\n{'='*70}")
     print(f"Pipeline de Procesamiento de Gacetas del Congreso")
     print(f"{'='*70}")
     print(f"📁 Carpeta de entrada: {carpeta_entrada}")
     print(f"📄 Archivos encontrados: {len(archivos_pdf)}")
+    print(f"⏭  Omitidos (ya procesados): {omitidos}")
+    print(f"⚙  Workers: {workers}")
+    print(f"💾 Formato de salida: {formato_salida}")
     print(f"{'='*70}\n")
     
-    # Configurar el converter una sola vez
-    converter = configurar_converter()
+    inicio = time.perf_counter()
+    
+    # El checkpoint se escribe desde el ETL y desde el hilo del sink (resultados de Elasticsearch)
+    lock_resumen = threading.Lock()
+    fallos_sink = {}
+    
+    def guardar_checkpoint():
+        detalles = sorted(resultados.values(), key=lambda r: r['archivo'])
+        exitosos = sum(1 for r in detalles if r['estado'] == 'exitoso')
+        _guardar_resumen(resumen_path, {
+            "total_archivos": len(archivos_pdf),
+            "exitosos": exitosos,
+            "con_errores": sum(1 for r in detalles if r['estado'] == 'error'),
+            "pendientes": len(archivos_pdf) - len(detalles),
+            "carpeta_origen": str(carpeta_entrada),
+            "carpeta_destino": str(carpeta_salida),
+            "workers": workers,
+            "tiempo_total_segundos": round(time.perf_counter() - inicio, 2),
+            "detalles": detalles
+        })
     
-    # Procesar cada PDF
-    resultados = []
-    exitosos = 0
-    con_errores = 0
+    def marcar_fallo_sink(detalle: Dict, error: str):
+        """Una gaceta que no llegó a Elasticsearch queda con error para reprocesarla"""
+        detalle['estado'] = 'error'
+        detalle['mensaje'] = f"No se pudo indexar en Elasticsearch: {error}"
     
-    for idx, pdf_path in enumerate(archivos_pdf, 1):
-        print(f"[{idx}/{len(archivos_pdf)}] Procesando: {pdf_path.name}")
+    def al_indexar(archivo: str, ok: bool, error: str = None):
+        if ok or archivo is None:
+            return
+        print(f"  ✗ {archivo} no se indexó en Elasticsearch: {error}")
+        with lock_resumen:
+            detalle = resultados.get(archivo)
+            if detalle is None:
+                # Todavía no se registra: se marca al registrarlo
+                fallos_sink[archivo] = error
+                return
+            marcar_fallo_sink(detalle, error)
+            guardar_checkpoint()
+    
+    sink = None
+    if indice_elastic and pendientes:
+        sink = _crear_sink_elastic(indice_elastic, al_indexar)
+        if sink is None:
+            print("❌ No se pudo crear el sink de Elasticsearch")
+            return
+    
+    def registrar(pdf_path: Path, detalle: Dict):
+        """Agrega el detalle de un archivo y guarda el checkpoint"""
+        if not detalle.get('sha256'):
+            # Solo si el procesamiento falló antes de calcularlo
+            try:
+                detalle['sha256'] = hashes.get(pdf_path.name) or CacheExtraccion.calcular_hash(str(pdf_path))
+            except OSError:
+                pass
+        if detalle.get('estado') == 'exitoso':
+            # Formato de la estructura exportada (False: sin estructura)
+            detalle['estructura'] = FORMATO_ESTRUCTURA if incluir_estructura else False
+        with lock_resumen:
+            if pdf_path.name in fallos_sink and detalle.get('estado') == 'exitoso':
+                marcar_fallo_sink(detalle, fallos_sink.pop(pdf_path.name))
+            resultados[pdf_path.name] = detalle
+            guardar_checkpoint()
+    
+    if workers <= 1:
+        if pendientes:
+            # Configurar los converters una sola vez
+            converter = configurar_converters()
+        escritor = _crear_escritor(carpeta_salida, formato_salida)
         
         try:
-            # Procesar gaceta
-            gaceta_data = procesar_gaceta(pdf_path, converter)
-            
-            if gaceta_data is None:
-                con_errores += 1
-                resultados.append({
-                    "archivo": pdf_path.name,
-                    "estado": "error",
-                    "mensaje": "Formato de nombre incorrecto"
-                })
-                continue
-            
-            # Guardar JSON individual
-            json_filename = f"{pdf_path.stem}.json"
-            json_path = carpeta_salida / json_filename
-            
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(gaceta_data, f, ensure_ascii=False, indent=2)
-            
-            exitosos += 1
-            print(f"  ✓ Exportado a: {json_filename}")
-            print(f"    - ID: {gaceta_data['id']}")
-            print(f"    - Corporación: {gaceta_data['corporacion']}")
-            print(f"    - Número de Gaceta: {gaceta_data['numeroGaceta']}")
-            print(f"    - Año: {gaceta_data['año']}")
-            print(f"    - Caracteres extraídos: {len(gaceta_data['texto_completo'])}")
-            
-            resultados.append({
-                "archivo": pdf_path.name,
-                "json_generado": json_filename,
-                "estado": "exitoso",
-                **{k: v for k, v in gaceta_data.items() if k != 'texto_completo'}
-            })
-            
-        except Exception as e:
-            con_errores += 1
-            print(f"  ✗ Error procesando {pdf_path.name}: {str(e)}")
-            resultados.append({
-                "archivo": pdf_path.name,
-                "estado": "error",
-                "mensaje": str(e)
-            })
-        
-        print()
+            for idx, pdf_path in enumerate(pendientes, 1):
+                print(f"[{idx}/{len(pendientes)}] Procesando: {pdf_path.name}")
+                registrar(pdf_path, procesar_y_exportar_gaceta(pdf_path, carpeta_salida, converter,
+                                                               paginas_por_ventana, escritor, sink,
+                                                               incluir_estructura,
+                                                               hashes.get(pdf_path.name), texto_plano))
+                print()
+        finally:
+            if escritor is not None:
+                escritor.cerrar()
+    elif pendientes:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker,
+                                 initargs=(str(carpeta_salida), formato_salida)) as executor:
+            # Se envían en orden de tamaño descendente: los PDFs grandes arrancan primero
+            futuros = {
+                executor.submit(_procesar_en_worker, str(pdf_path), str(carpeta_salida),
+                                paginas_por_ventana, sink is not None, incluir_estructura,
+                                hashes.get(pdf_path.name), texto_plano): pdf_path
+                for pdf_path in pendientes
+            }
+            for idx, futuro in enumerate(as_completed(futuros), 1):
+                pdf_path = futuros[futuro]
+                try:
+                    detalle = futuro.result()
+                except Exception as e:
+                    detalle = {"archivo": pdf_path.name, "estado": "error", "mensaje": str(e)}
+                documento = detalle.pop('documento', None)
+                cargar = detalle.pop('cargar_documento', None)
+                registrar(pdf_path, detalle)
+                if documento is not None or cargar is not None:
+                    _enviar_a_sink(sink, documento, pdf_path.name, cargar)
+                print(f"[{idx}/{len(pendientes)}] {detalle['archivo']}: {detalle['estado']}")
+    
+    resultado_sink = sink.cerrar() if sink is not None else None
+    
+    detalles = sorted(resultados.values(), key=lambda r: r['archivo'])
+    exitosos = sum(1 for r in detalles if r['estado'] == 'exitoso')
+    con_errores = sum(1 for r in detalles if r['estado'] == 'error')
+    tiempo_total = round(time.perf_counter() - inicio, 2)
     
     # Guardar resumen general
-    resumen_path = carpeta_salida / "resumen_procesamiento_gacetas.json"
     resumen = {
         "total_archivos": len(archivos_pdf),
         "exitosos": exitosos,
         "con_errores": con_errores,
+        "omitidos": omitidos,
+        "pendientes": 0,
         "carpeta_origen": str(carpeta_entrada),
         "carpeta_destino": str(carpeta_salida),
-        "detalles": resultados
+        "workers": workers,
+        "tiempo_total_segundos": tiempo_total,
+        "detalles": detalles
     }
+    if resultado_sink is not None:
+        resumen["elasticsearch"] = {"indice": indice_elastic, **resultado_sink}
+    _guardar_resumen(resumen_path, resumen)
     
-    with open(resumen_path, 'w', encoding='utf-8') as f:
-        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    if FORMATOS_SALIDA[formato_salida] is not None:
+        _actualizar_indice_shards(carpeta_salida, detalles)
     
     # Imprimir resumen final
     print(f"{'='*70}")
@@ -228,17 +1180,26 @@ def procesar_carpeta_gacetas(carpeta_entrada: str = "camara", carpeta_salida: st
     print(f"{'='*70}")
     print(f"✓ Exitosos: {exitosos}/{len(archivos_pdf)}")
     print(f"✗ Con errores: {con_errores}/{len(archivos_pdf)}")
+    print(f"⏭  Omitidos (sin cambios): {omitidos}")
+    print(f"⏱  Tiempo total: {tiempo_total}s")
     print(f"📋 Resumen guardado en: {resumen_path.name}")
+    if resultado_sink is not None:
+        print(f"🔎 Elasticsearch '{indice_elastic}': {resultado_sink['indexados']} indexados, "
+              f"{resultado_sink['fallidos']} fallidos")
+    if workers <= 1:
+        stats_cache = CacheExtraccion.por_defecto().estadisticas()
+        print(f"🗄  Cache de extracción: {stats_cache['hits']} hits, {stats_cache['misses']} misses")
     print(f"{'='*70}\n")
 
 
-def procesar_gaceta_individual(pdf_path: str, json_path: str = None):
+def procesar_gaceta_individual(pdf_path: str, json_path: str = None, incluir_estructura: bool = False):
     """
     Procesa una única gaceta y la exporta a JSON
     
     Args:
         pdf_path: Ruta al archivo PDF
         json_path: Ruta del archivo JSON de salida (opcional)
+        incluir_estructura: Exportar secciones, encabezados y tablas
     """
     pdf_path = Path(pdf_path)
     
@@ -254,8 +1215,8 @@ def procesar_gaceta_individual(pdf_path: str, json_path: str = None):
     print(f"Procesando gaceta: {pdf_path.name}\n")
     
     # Configurar y procesar
-    converter = configurar_converter()
-    gaceta_data = procesar_gaceta(pdf_path, converter)
+    converter = configurar_converters()
+    gaceta_data = procesar_gaceta(pdf_path, converter, incluir_estructura)
     
     if gaceta_data is None:
         print("❌ No se pudo procesar la gaceta debido a formato incorrecto")
@@ -273,17 +1234,51 @@ def procesar_gaceta_individual(pdf_path: str, json_path: str = None):
     print(f"  - Número de Gaceta: {gaceta_data['numeroGaceta']}")
     print(f"  - Año: {gaceta_data['año']}")
     print(f"  - Caracteres de texto: {len(gaceta_data['texto_completo'])}")
+    print(f"  - Nivel de extracción: {gaceta_data['nivel_extraccion']}")
+    if incluir_estructura:
+        print(f"  - Secciones: {len(gaceta_data['secciones'])}, tablas: {len(gaceta_data['tablas'])}")
 
 
 if __name__ == "__main__":
-    # EJEMPLO 1: Procesar todos los PDFs de la carpeta 'camara'
+    parser = argparse.ArgumentParser(description="ETL de Gacetas del Congreso con Docling")
+    parser.add_argument("carpeta_entrada", nargs="?", default="senado",
+                        help="Carpeta con los PDFs (default: senado)")
+    parser.add_argument("carpeta_salida", nargs="?", default="senado_json",
+                        help="Carpeta para los JSON (default: senado_json)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos en paralelo, cada uno con su converter (default: 1)")
+    parser.add_argument("--no-incremental", action="store_true",
+                        help="Reprocesar todos los PDFs aunque ya tengan JSON y no hayan cambiado")
+    parser.add_argument("--only-failed", action="store_true",
+                        help="Reprocesar solo los archivos con error en el resumen previo")
+    parser.add_argument("--formato", choices=list(FORMATOS_SALIDA), default="json",
+                        help="Salida: un JSON por gaceta o shards JSONL comprimidos (default: json)")
+    parser.add_argument("--elastic-index", default=None,
+                        help="Indexar cada gaceta en este índice de Elasticsearch apenas se convierte")
+    parser.add_argument("--ventana-paginas", type=int, default=None,
+                        help="Convertir por ventanas de N páginas para acotar la memoria en gacetas grandes")
+    parser.add_argument("--estructura", action="store_true",
+                        help="Exportar secciones, encabezados y tablas (filas) con su página además del markdown")
+    parser.add_argument("--texto-plano", action="store_true",
+                        help="PDFs con capa de texto en todas las páginas: extraer con PyPDF2 sin Docling (más rápido, sin markdown)")
+    args = parser.parse_args()
+    
+    # EJEMPLO 1: Procesar todos los PDFs de la carpeta 'senado'
     procesar_carpeta_gacetas(
-        carpeta_entrada="senado",
-        carpeta_salida="senado_json"  # Opcional: carpeta diferente para los JSON
+        carpeta_entrada=args.carpeta_entrada,
+        carpeta_salida=args.carpeta_salida,  # Opcional: carpeta diferente para los JSON
+        workers=args.workers,
+        incremental=not args.no_incremental,
+        solo_fallidos=args.only_failed,
+        paginas_por_ventana=args.ventana_paginas,
+        formato_salida=args.formato,
+        indice_elastic=args.elastic_index,
+        incluir_estructura=args.estructura,
+        texto_plano=args.texto_plano
     )
     
     # EJEMPLO 2: Procesar una gaceta individual
     # procesar_gaceta_individual("camara/001_Camara_Gaceta1405_2025.pdf")
     
     # EJEMPLO 3: Procesar en la misma carpeta (sin carpeta de salida separada)
-    # procesar_carpeta_gacetas("camara")
\ No newline at end of file
+    # procesar_carpeta_gacetas("camara")
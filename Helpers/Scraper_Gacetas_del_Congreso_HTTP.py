@@ -0,0 +1,411 @@
+"""
+Scraper HTTP para Imprenta (sin navegador): reproduce las solicitudes del
+paginador PrimeFaces y del botón "Descargar Pdf" con requests, recorre
+dataTableResumen de a 50 filas y descarga los PDFs en paralelo a las
+carpetas por corporación (Senado / Cámara).
+
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+
+try:
+    from Helpers.transporteHttp import SesionReintentos
+    from Helpers.registroGacetas import RegistroGacetas
+except ImportError:
+    from transporteHttp import SesionReintentos
+    from registroGacetas import RegistroGacetas
+
+BASE_URL = "https://svrpubindc.imprenta.gov.co/gacetas/index.xhtml"  # URL de la Imprenta
+OUTPUT_DIR = os.path.abspath("pdfs")
+REGISTRY_NAME = "registro_gacetas.db"
+FORM_ID = "formResumen"
+TABLE_ID = "formResumen:dataTableResumen"
+VIEWSTATE_NAME = "javax.faces.ViewState"
+ROWS_PER_PAGE = 50
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+
+class ViewExpiredError(Exception):
+    """El servidor descartó el ViewState de la sesión (hay que abrir la vista de nuevo)"""
+
+
+class ImprentaSession:
+    """
+    Sesión HTTP con la vista index.xhtml: guarda la cookie, los campos del
+    formulario formResumen y el ViewState que el servidor exige en cada POST.
+    """
+
+    def __init__(self, base_url=BASE_URL, max_connections=8, max_retries=4, limiter=None):
+        self.base_url = base_url
+        # limiter: limitador de tasa por host de la sesión (default: LimitadorAdaptativo)
+        self.session = SesionReintentos(max_reintentos=max_retries, limitador=limiter)
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.action_url = base_url
+        self.form_fields = {}
+        self.view_state = None
+        self.first = 0
+        self._lock = threading.Lock()
+        self._reopen_lock = threading.Lock()
+
+    def open(self):
+        """Carga la vista inicial y toma los campos del formulario y el ViewState."""
+        response = self.session.get(self.base_url, timeout=30)
+        response.raise_for_status()
+        document = lxml_html.fromstring(response.content)
+
+        forms = document.xpath(f"//form[@id='{FORM_ID}']")
+        if not forms:
+            raise RuntimeError(f"No se encontró el formulario {FORM_ID} en {self.base_url}")
+        form = forms[0]
+        self.action_url = urljoin(self.base_url, form.get('action') or self.base_url)
+
+        # Serializar el formulario como lo haría el navegador (sin botones)
+        fields = {}
+        for element in form.xpath(".//input[@name]"):
+            if (element.get('type') or 'text').lower() in ('submit', 'button', 'image', 'file'):
+                continue
+            if (element.get('type') or '').lower() in ('checkbox', 'radio') and element.get('checked') is None:
+                continue
+            fields[element.get('name')] = element.get('value') or ''
+        for select in form.xpath(".//select[@name]"):
+            selected = select.xpath(".//option[@selected]/@value") or select.xpath(".//option/@value")
+            fields[select.get('name')] = selected[0] if selected else ''
+
+        self.view_state = fields.pop(VIEWSTATE_NAME, None)
+        if not self.view_state:
+            raise RuntimeError("La página no tiene javax.faces.ViewState")
+        fields[f"{TABLE_ID}_rppDD"] = str(ROWS_PER_PAGE)
+        fields[FORM_ID] = FORM_ID
+        self.form_fields = fields
+        print(f"[info] vista abierta, ViewState {self.view_state[:12]}...")
+
+    def reopen(self, stale_view_state):
+        """
+        Abre la vista de nuevo si el ViewState sigue siendo el que expiró y vuelve a
+        la página actual del paginador (los botones de descarga son de sus filas).
+        Si varios hilos lo detectan a la vez, solo el primero abre la vista.
+        """
+        with self._reopen_lock:
+            with self._lock:
+                if self.view_state != stale_view_state:
+                    return
+            print("[warn] ViewState expirado, abriendo la vista de nuevo")
+            self.open()
+            if self.first:
+                self.fetch_page(self.first)
+
+    def _payload(self, extra, view_state=None):
+        with self._lock:
+            return {**self.form_fields, VIEWSTATE_NAME: view_state or self.view_state, **extra}
+
+    def fetch_page(self, first, rows=ROWS_PER_PAGE):
+        """
+        Reproduce la solicitud parcial del paginador de dataTableResumen.
+
+        Returns:
+            (filas de la página, total de registros o None si el servidor no lo informa)
+        """
+        payload = self._payload({
+            'javax.faces.partial.ajax': 'true',
+            'javax.faces.source': TABLE_ID,
+            'javax.faces.partial.execute': TABLE_ID,
+            'javax.faces.partial.render': TABLE_ID,
+            TABLE_ID: TABLE_ID,
+            f"{TABLE_ID}_pagination": 'true',
+            f"{TABLE_ID}_first": str(first),
+            f"{TABLE_ID}_rows": str(rows),
+            f"{TABLE_ID}_skipChildren": 'true',
+            f"{TABLE_ID}_encodeFeature": 'true',
+        })
+        response = self.session.post(self.action_url, data=payload, timeout=60, headers={
+            'Faces-Request': 'partial/ajax',
+            'X-Requested-With': 'XMLHttpRequest',
+        })
+        response.raise_for_status()
+        page = self._parse_partial_response(response.content)
+        self.first = first
+        return page
+
+    @staticmethod
+    def _raise_partial_error(root):
+        """Lanza el error informado en un partial-response (ViewExpiredError si expiró la vista)."""
+        error = root.find('.//error-name')
+        if error is not None:
+            if 'ViewExpired' in (error.text or ''):
+                raise ViewExpiredError(error.text)
+            raise RuntimeError(f"Error del servidor: {error.text}")
+
+    def _parse_partial_response(self, content):
+        """Extrae las filas, el nuevo ViewState y totalRecords de un partial-response."""
+        root = etree.fromstring(content)
+        self._raise_partial_error(root)
+
+        rows_html = None
+        total_records = None
+        for update in root.iter('update'):
+            update_id = update.get('id') or ''
+            if VIEWSTATE_NAME in update_id:
+                with self._lock:
+                    self.view_state = (update.text or '').strip() or self.view_state
+            elif update_id == TABLE_ID:
+                rows_html = update.text or ''
+        for extension in root.iter('extension'):
+            if extension.get('type') == 'args' and extension.text:
+                try:
+                    total_records = json.loads(extension.text).get('totalRecords')
+                except ValueError:
+                    pass
+
+        return parse_rows(rows_html or ''), total_records
+
+    def download(self, row, dest_path, buffer_size=1024 * 1024, view_retries=1):
+        """
+        Reproduce el POST del botón "Descargar Pdf" de una fila y guarda el PDF.
+        Se escribe en un temporal y se renombra solo si el contenido es un PDF.
+        Si el ViewState expiró, se abre la vista de nuevo y se reintenta la fila.
+
+        Returns:
+            Bytes descargados
+        """
+        for attempt in range(view_retries + 1):
+            with self._lock:
+                view_state = self.view_state
+            try:
+                return self._download_once(row, dest_path, view_state, buffer_size)
+            except ViewExpiredError:
+                if attempt == view_retries:
+                    raise
+                self.reopen(view_state)
+
+    def _download_once(self, row, dest_path, view_state, buffer_size):
+        payload = self._payload({row['button_id']: row['button_id']}, view_state)
+        tmp_path = f"{dest_path}.part"
+        size = 0
+        try:
+            with self.session.post(self.action_url, data=payload, stream=True, timeout=120) as response:
+                response.raise_for_status()
+                with open(tmp_path, 'wb', buffering=buffer_size) as f:
+                    for chunk in response.iter_content(chunk_size=buffer_size):
+                        if chunk:
+                            f.write(chunk)
+                            size += len(chunk)
+            if not is_pdf_valid(tmp_path):
+                self._check_partial_response(tmp_path)
+                raise ValueError("la respuesta no es un PDF válido")
+            os.replace(tmp_path, dest_path)
+            return size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _check_partial_response(self, path, max_size=1024 * 1024):
+        """Si el servidor respondió un partial-response en vez del PDF, lanza su error."""
+        if os.path.getsize(path) > max_size:
+            return
+        with open(path, 'rb') as f:
+            content = f.read()
+        if b'<partial-response' not in content[:1024]:
+            return
+        try:
+            root = etree.fromstring(content)
+        except etree.XMLSyntaxError:
+            return
+        self._raise_partial_error(root)
+
+    def close(self):
+        self.session.close()
+
+
+def parse_rows(rows_html):
+    """Convierte las filas <tr> de dataTableResumen en diccionarios."""
+    if not rows_html.strip():
+        return []
+    table = lxml_html.fromstring(f"<table><tbody>{rows_html}</tbody></table>")
+    rows = []
+    for idx, tr in enumerate(table.xpath(".//tr")):
+        buttons = tr.xpath(".//button[@title='Descargar Pdf']/@id")
+        cols = [" ".join(td.text_content().split()) for td in tr.xpath("./td")]
+        labels = tr.xpath(".//label")
+        numero = labels[0].text_content().strip() if labels else f"sin_numero_{idx+1}"
+        rows.append({
+            'index': tr.get('data-ri'),
+            'numero': numero,
+            'corporacion': cols[1] if len(cols) >= 2 else "Desconocida",
+            'year': extract_year(cols),
+            'button_id': buttons[0] if buttons else None,
+        })
+    return rows
+
+
+def extract_year(cols):
+    """Extrae el año de las columnas de la fila (o usa el año actual)."""
+    for text in cols:
+        year_match = re.search(r'(20\d{2}|19\d{2})', text)
+        if year_match:
+            return year_match.group(1)
+    return str(time.strftime("%Y"))
+
+
+def is_pdf_valid(filepath):
+    """Verifica si un archivo PDF es válido."""
+    try:
+        if os.path.getsize(filepath) < 100:  # Muy pequeño para ser un PDF válido
+            return False
+        with open(filepath, 'rb') as f:
+            return f.read(10).startswith(b'%PDF-')
+    except OSError:
+        return False
+
+
+def entity_for(corporacion):
+    """Tipo de entidad y subcarpeta según la corporación de la fila."""
+    if "Senado" in corporacion:
+        return "Senado", "Senado_de_la_Republica"
+    if "Cámara" in corporacion or "Camara" in corporacion:
+        return "Camara", "Camara_de_Representantes"
+    return "Desconocida", ""
+
+
+def download_row(imprenta, row, output_dir, registry):
+    """Descarga una fila a su carpeta con el nombre ID_ENTIDAD_NUMERO_AÑO.pdf."""
+    if not row['button_id']:
+        print(f"[warn] no hay botón para gaceta {row['numero']}")
+        return {'numero': row['numero'], 'estado': 'sin_boton', 'bytes': 0}
+
+    key = (row['corporacion'], row['numero'], row['year'])
+    # Las filas sin número no tienen una clave confiable: siempre se descargan
+    has_number = not row['numero'].startswith("sin_numero_")
+    existing = registry.archivo_descargado(*key) if has_number else None
+    if existing:
+        return {'numero': row['numero'], 'estado': 'existente', 'archivo': existing, 'bytes': 0}
+
+    entity_type, subdir = entity_for(row['corporacion'])
+    target_dir = os.path.join(output_dir, subdir) if subdir else output_dir
+    unique_id = f"{registry.asignar_id(*key):03d}"
+    base_name = f"{unique_id}_{entity_type}_Gaceta{row['numero']}_{row['year']}"
+    dest_path = os.path.join(target_dir, f"{base_name}.pdf")
+
+    # Archivo de una ejecución anterior que no quedó registrado: se adopta en vez de duplicarlo
+    if has_number and is_pdf_valid(dest_path):
+        registry.marcar_descargada(*key, dest_path)
+        return {'numero': row['numero'], 'estado': 'existente', 'archivo': dest_path, 'bytes': 0}
+    if not has_number and os.path.exists(dest_path):
+        dest_path = os.path.join(target_dir, f"{base_name}_{int(time.time())}.pdf")
+
+    start = time.perf_counter()
+    try:
+        size = imprenta.download(row, dest_path)
+    except Exception as e:
+        print(f"[error] gaceta {row['numero']}: {e}")
+        return {'numero': row['numero'], 'estado': 'error', 'error': str(e), 'bytes': 0}
+    registry.marcar_descargada(*key, dest_path, size)
+
+    print(f"✅ Guardado: {os.path.basename(dest_path)}")
+    return {'numero': row['numero'], 'estado': 'descargada', 'archivo': dest_path,
+            'bytes': size, 'segundos': round(time.perf_counter() - start, 3)}
+
+
+def harvest(base_url=BASE_URL, start_page=1, end_page=None, workers=8, output_dir=OUTPUT_DIR,
+            registry=None, limiter=None):
+    """
+    Recorre las páginas [start_page, end_page] de dataTableResumen (50 filas por
+    página) y descarga los PDFs de cada página con `workers` descargas en paralelo.
+    Las gacetas que ya están en el registro no se vuelven a descargar.
+    `limiter` reemplaza el limitador de tasa por host de la sesión (ver ImprentaSession).
+
+    Returns:
+        Resumen con páginas, gacetas descargadas y omitidas, errores, bytes y tiempo
+    """
+    for subdir in ("", "Senado_de_la_Republica", "Camara_de_Representantes"):
+        os.makedirs(os.path.join(output_dir, subdir), exist_ok=True)
+    own_registry = registry is None
+    if own_registry:
+        registry = RegistroGacetas(os.path.join(output_dir, REGISTRY_NAME))
+
+    imprenta = ImprentaSession(base_url, max_connections=workers, limiter=limiter)
+    results = []
+    pages_done = 0
+    start = time.perf_counter()
+    try:
+        imprenta.open()
+        page = start_page
+        total_pages = end_page
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while total_pages is None or page <= total_pages:
+                first = (page - 1) * ROWS_PER_PAGE
+                try:
+                    rows, total_records = imprenta.fetch_page(first)
+                except ViewExpiredError:
+                    print("[warn] ViewState expirado, abriendo la vista de nuevo")
+                    imprenta.open()
+                    rows, total_records = imprenta.fetch_page(first)
+
+                if total_records is not None:
+                    last_page = max(1, -(-total_records // ROWS_PER_PAGE))
+                    total_pages = min(total_pages, last_page) if total_pages else last_page
+                print(f"\n=== Página {page} / {total_pages or '?'}: {len(rows)} filas ===")
+                if not rows:
+                    break
+
+                # Las descargas de una página usan el mismo ViewState: se hacen en paralelo
+                # y se espera a que terminen antes de paginar (el paginador cambia la vista)
+                results.extend(executor.map(lambda row: download_row(imprenta, row, output_dir, registry), rows))
+                pages_done += 1
+                if len(rows) < ROWS_PER_PAGE and total_records is None:
+                    break
+                page += 1
+    finally:
+        imprenta.close()
+        if own_registry:
+            registry.cerrar()
+
+    elapsed = time.perf_counter() - start
+    downloaded = [r for r in results if r['estado'] == 'descargada']
+    total_bytes = sum(r['bytes'] for r in results)
+    summary = {
+        'paginas': pages_done,
+        'filas': len(results),
+        'descargadas': len(downloaded),
+        'omitidas': sum(1 for r in results if r['estado'] == 'existente'),
+        'errores': sum(1 for r in results if r['estado'] == 'error'),
+        'bytes': total_bytes,
+        'segundos': round(elapsed, 2),
+        'gacetas_por_segundo': round(len(downloaded) / elapsed, 2) if elapsed > 0 else 0.0,
+        'mb_por_segundo': round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0,
+        'detalles': results,
+    }
+    print(f"\n✅ Proceso completado: {summary['descargadas']} gacetas en {summary['segundos']}s "
+          f"({summary['gacetas_por_segundo']} gacetas/s, {summary['mb_por_segundo']} MB/s), "
+          f"{summary['omitidas']} ya descargadas, {summary['errores']} errores")
+    return summary
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Descarga de gacetas de la Imprenta sin navegador")
+    parser.add_argument("--base-url", default=BASE_URL, help="URL de index.xhtml")
+    parser.add_argument("--pagina-inicio", type=int, default=1)
+    parser.add_argument("--pagina-fin", type=int, default=None, help="Última página (default: todas)")
+    parser.add_argument("--workers", type=int, default=8, help="Descargas simultáneas")
+    parser.add_argument("--salida", default=OUTPUT_DIR, help="Carpeta de salida")
+    args = parser.parse_args()
+
+    harvest(args.base_url, args.pagina_inicio, args.pagina_fin, args.workers, os.path.abspath(args.salida))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,35 @@
 Selenium scraper para Imprenta: descarga 50 filas por página 
 navega páginas y guarda PDFs en carpetas por corporación (Senado / Cámara).
 
+Con --workers K el rango de páginas se reparte entre K navegadores Chrome,
+cada uno con su propia carpeta de descarga.
+
 """
 
 import os
 import time
 import glob
 import re
+import json
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+try:
+    from Helpers.registroGacetas import RegistroGacetas
+except ImportError:
+    from registroGacetas import RegistroGacetas
 
 BASE_URL = "https://svrpubindc.imprenta.gov.co/gacetas/index.xhtml"  # URL de la Imprenta
 OUTPUT_DIR = os.path.abspath("pdfs")
@@ -22,15 +39,20 @@ CAMARA_DIR = os.path.join(OUTPUT_DIR, "Camara_de_Representantes")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(SENADO_DIR, exist_ok=True)
 os.makedirs(CAMARA_DIR, exist_ok=True)
+RESULT_LOG = os.path.join(OUTPUT_DIR, "resultados_scraper.jsonl")
+REGISTRY_DB = os.path.join(OUTPUT_DIR, "registro_gacetas.db")
+TABLE_ID = "formResumen:dataTableResumen"
 
-def setup_driver():
+def setup_driver(download_dir=OUTPUT_DIR, headless=False):
     """Configura y retorna el driver de Chrome."""
     options = webdriver.ChromeOptions()
-    options.headless = False
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1366,900")
     
     # Configurar carpeta de descarga
     prefs = {
-        "download.default_directory": OUTPUT_DIR,
+        "download.default_directory": download_dir,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": False,
@@ -55,15 +77,14 @@ def setup_driver():
 
 def wait_for_table_rows(driver, min_rows=1, timeout=15):
     """Espera hasta que la tabla tenga al menos min_rows filas."""
-    end = time.time() + timeout
-    while time.time() < end:
-        try:
-            rows = driver.find_elements(By.CSS_SELECTOR, "tbody[id*='dataTableResumen_data'] tr")
-            if len(rows) >= min_rows:
-                return rows
-        except:
-            pass
-        time.sleep(0.3)
+    def enough_rows(d):
+        rows = d.find_elements(By.CSS_SELECTOR, "tbody[id*='dataTableResumen_data'] tr")
+        return rows if len(rows) >= min_rows else False
+    
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(enough_rows)
+    except TimeoutException:
+        pass
     
     try:
         return driver.find_elements(By.CSS_SELECTOR, "tbody[id*='dataTableResumen_data'] tr")
@@ -74,9 +95,15 @@ def change_page_size_to_50(driver, wait):
     """Intenta seleccionar '50' en el select de filas por página."""
     try:
         select_element = wait.until(EC.presence_of_element_located((By.ID, "formResumen:dataTableResumen_rppDD")))
+        old_rows = driver.find_elements(By.CSS_SELECTOR, "tbody[id*='dataTableResumen_data'] tr")
         sel = Select(select_element)
         sel.select_by_value("50")
-        time.sleep(2)  # Esperar a que se actualice la tabla
+        # Esperar a que el ajax reemplace las filas en lugar de una pausa fija
+        if old_rows:
+            try:
+                WebDriverWait(driver, 8, poll_frequency=0.2).until(EC.staleness_of(old_rows[0]))
+            except TimeoutException:
+                pass
         rows = wait_for_table_rows(driver, min_rows=1, timeout=8)
         print(f"[info] filas actualmente en pantalla: {len(rows)}")
         return True
@@ -102,8 +129,42 @@ def get_current_page(driver):
     except:
         return 1
 
+def wait_for_page_change(driver, previous, timeout=5):
+    """Espera a que el paginador deje la página previous."""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(lambda d: get_current_page(d) != previous)
+        return True
+    except TimeoutException:
+        return False
+
+def jump_to_page(driver, target, timeout=15):
+    """Salta directo a la página target con el paginador de PrimeFaces (sin recorrer páginas)."""
+    try:
+        ok = driver.execute_script("""
+            var tableId = arguments[0], page = arguments[1];
+            if (!window.PrimeFaces || !PrimeFaces.widgets) { return false; }
+            for (var key in PrimeFaces.widgets) {
+                var widget = PrimeFaces.widgets[key];
+                if (widget && widget.id === tableId && widget.paginator) {
+                    widget.paginator.setPage(page);
+                    return true;
+                }
+            }
+            return false;
+        """, TABLE_ID, target - 1)
+        if not ok:
+            return False
+        WebDriverWait(driver, timeout).until(lambda d: get_current_page(d) == target)
+        return True
+    except Exception as e:
+        print(f"[debug] salto directo a página {target} falló: {e}")
+        return False
+
 def go_to_page(driver, target):
     """Navega hasta la página target."""
+    if get_current_page(driver) == target or jump_to_page(driver, target):
+        return True
+    
     for attempt in range(50):  # Reducido de 200 a 50
         cur = get_current_page(driver)
         if cur == target:
@@ -116,7 +177,7 @@ def go_to_page(driver, target):
             for p in pages:
                 if p.text.strip() == str(target):
                     driver.execute_script("arguments[0].click();", p)
-                    time.sleep(1)
+                    wait_for_page_change(driver, cur)
                     clicked = True
                     break
             if clicked:
@@ -132,41 +193,162 @@ def go_to_page(driver, target):
             else:
                 prev = driver.find_element(By.CSS_SELECTOR, ".ui-paginator-prev")
                 driver.execute_script("arguments[0].click();", prev)
-            time.sleep(1)
+            wait_for_page_change(driver, cur)
         except:
             time.sleep(0.5)
             
     print(f"[warning] No pude navegar a la página {target}")
     return False
 
-def wait_for_complete_download(timeout=60):
-    """Espera a que se complete la descarga."""
-    start_time = time.time()
+TEMP_SUFFIXES = (".crdownload", ".part", ".tmp")
+
+# Eventos de inotify: archivo cerrado tras escribirlo o renombrado dentro de la carpeta
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+def _inotify_watch(path):
+    """Descriptor inotify que vigila path, o None si inotify no está disponible (no Linux)."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(path), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+class DownloadTracker:
+    """
+    Detecta las descargas terminadas en una carpeta.
+    
+    Usa inotify (Linux) para enterarse apenas Chrome renombra el .crdownload
+    al PDF final, y si no está disponible revisa la carpeta cada poll_interval
+    segundos. Antes de cada click se llama arm() para tomar una foto de la
+    carpeta: el primer PDF nuevo que aparece después es el de esa fila. Si la
+    espera vence, settle() resuelve la descarga pendiente antes del siguiente
+    click, así un PDF que termina tarde no se atribuye a la fila siguiente.
+    """
     
-    while time.time() - start_time < timeout:
+    def __init__(self, download_dir, poll_interval=0.25):
+        self.download_dir = download_dir
+        self.poll_interval = poll_interval
+        self._fd = _inotify_watch(download_dir)
+        self._known = set()
+        self.mode = "inotify" if self._fd is not None else "polling"
+    
+    def arm(self):
+        """Registra los archivos existentes y descarta eventos viejos antes de un click."""
+        self._drain_events()
+        self._known = set(os.listdir(self.download_dir))
+    
+    def _drain_events(self):
+        """Lee los eventos pendientes y retorna los nombres de archivo que reportan."""
+        names = []
+        if self._fd is None:
+            return names
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset + _INOTIFY_EVENT.size <= len(data):
+                _, _, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+                offset += length
+    
+    def _completed(self, name):
+        """True si name es un PDF nuevo, sin descarga temporal pendiente y con contenido."""
+        if name in self._known or not name.lower().endswith(".pdf"):
+            return False
+        path = os.path.join(self.download_dir, name)
+        if any(os.path.exists(path + suffix) for suffix in TEMP_SUFFIXES):
+            return False
         try:
-            # Buscar archivos de descarga temporal
-            temp_files = (glob.glob(os.path.join(OUTPUT_DIR, "*.crdownload")) + 
-                         glob.glob(os.path.join(OUTPUT_DIR, "*.part")) + 
-                         glob.glob(os.path.join(OUTPUT_DIR, "*.tmp")))
+            return os.path.getsize(path) > 0
+        except OSError:
+            return False
+    
+    def _new_files(self):
+        return sorted(set(os.listdir(self.download_dir)) - self._known)
+    
+    def wait(self, timeout=60):
+        """Espera el PDF de la descarga armada; retorna su nombre o None si vence el timeout."""
+        deadline = time.monotonic() + timeout
+        # La descarga pudo terminar antes de empezar a esperar
+        candidates = self._new_files()
+        sizes = {}
+        while True:
+            for name in candidates:
+                if not self._completed(name):
+                    continue
+                if self._fd is None:
+                    # Sin inotify, el archivo debe mantener su tamaño entre dos revisiones
+                    size = os.path.getsize(os.path.join(self.download_dir, name))
+                    if sizes.get(name) != size:
+                        sizes[name] = size
+                        continue
+                self._known.add(name)
+                return name
             
-            # Si no hay archivos temporales, buscar PDFs recientes
-            if not temp_files:
-                pdf_files = glob.glob(os.path.join(OUTPUT_DIR, "*.pdf"))
-                if pdf_files:
-                    # Encontrar el archivo más reciente
-                    newest_pdf = max(pdf_files, key=os.path.getctime)
-                    
-                    # Verificar que tenga un tamaño razonable
-                    if os.path.getsize(newest_pdf) > 1024:
-                        time.sleep(1)  # Esperar un poco más
-                        return os.path.basename(newest_pdf)
-        except Exception as e:
-            print(f"[debug] Error en wait_for_complete_download: {e}")
-        
-        time.sleep(1)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self._fd is not None:
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                candidates = self._drain_events() if ready else []
+            else:
+                time.sleep(min(self.poll_interval, remaining))
+                candidates = self._new_files()
+    
+    def _pending(self):
+        """True si hay una descarga temporal (.crdownload) en curso en la carpeta."""
+        return any(name.endswith(suffix) for name in os.listdir(self.download_dir) for suffix in TEMP_SUFFIXES)
+    
+    def settle(self, grace=30):
+        """
+        Después de un timeout: mientras haya una descarga en curso la espera hasta
+        grace segundos más y retorna su PDF si termina (es el de la fila armada).
+        Si no termina, elimina los temporales (Chrome la da por fallida) y marca
+        como conocido todo lo que hay en la carpeta.
+        """
+        deadline = time.monotonic() + grace
+        while True:
+            name = self.wait(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+            if name is not None:
+                return name
+            if not self._pending() or time.monotonic() >= deadline:
+                break
+        remove_temp_downloads(self.download_dir)
+        self._drain_events()
+        self._known = set(os.listdir(self.download_dir))
+        return None
     
-    return None
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def remove_temp_downloads(download_dir):
+    """Elimina descargas temporales que quedaron a medias."""
+    for temp_pattern in TEMP_SUFFIXES:
+        for temp_file in glob.glob(os.path.join(download_dir, "*" + temp_pattern)):
+            try:
+                os.remove(temp_file)
+            except:
+                pass
 
 def is_pdf_valid(filepath):
     """Verifica si un archivo PDF es válido."""
@@ -181,17 +363,18 @@ def is_pdf_valid(filepath):
     except:
         return False
 
-# Contador global para ID único
-ID_COUNTER = 1
-
-def generate_unique_id():
-    """Genera un ID único secuencial de máximo 3 cifras (001-999)."""
-    global ID_COUNTER
-    if ID_COUNTER > 999:
-        ID_COUNTER = 1  # Reiniciar si supera 999
-    current_id = f"{ID_COUNTER:03d}"
-    ID_COUNTER += 1
-    return current_id
+class ResultLog:
+    """Registro JSONL compartido de las filas procesadas por todos los workers."""
+    
+    def __init__(self, path=RESULT_LOG):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def write(self, record):
+        record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **record}
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
 def extract_year_from_row(row):
     """Extrae el año de la fila de la tabla."""
@@ -210,11 +393,27 @@ def extract_year_from_row(row):
     except:
         return str(time.strftime("%Y"))
 
-def download_rows_on_current_page(driver):
-    """Descarga las filas de la página actual."""
+def download_rows_on_current_page(driver, registry, download_dir=OUTPUT_DIR, page=None, result_log=None,
+                                  worker_id=0, tracker=None):
+    """Descarga las filas de la página actual que no estén ya en el registro."""
+    own_tracker = tracker is None
+    if own_tracker:
+        tracker = DownloadTracker(download_dir)
+    try:
+        _download_rows(driver, registry, download_dir, page, result_log, worker_id, tracker)
+    finally:
+        if own_tracker:
+            tracker.close()
+
+def _download_rows(driver, registry, download_dir, page, result_log, worker_id, tracker):
     rows = wait_for_table_rows(driver, min_rows=1, timeout=10)
     print(f"[info] filas en esta vista: {len(rows)}")
     
+    def log(numero, estado, **extra):
+        if result_log is not None:
+            result_log.write({"worker": worker_id, "pagina": page, "numero": numero,
+                              "estado": estado, **extra})
+    
     for idx, row in enumerate(rows):
         try:
             # Obtener número de gaceta
@@ -233,8 +432,17 @@ def download_rows_on_current_page(driver):
             # Extraer año de la fila
             year = extract_year_from_row(row)
             
-            # Generar ID único
-            unique_id = generate_unique_id()
+            # Saltar las gacetas ya descargadas antes de hacer click
+            # (las filas sin número no tienen una clave confiable)
+            has_number = not numero.startswith("sin_numero_")
+            existing = registry.archivo_descargado(corporacion, numero, year) if has_number else None
+            if existing:
+                print(f"[info] gaceta {numero} ({year}) ya descargada: {os.path.basename(existing)}")
+                log(numero, "existente", archivo=existing)
+                continue
+            
+            # ID estable de la gaceta
+            unique_id = f"{registry.asignar_id(corporacion, numero, year):03d}"
             
             # Determinar directorio y tipo de entidad ANTES de usarlo
             if "Senado" in corporacion:
@@ -247,50 +455,58 @@ def download_rows_on_current_page(driver):
                 target_dir = OUTPUT_DIR
                 entity_type = "Desconocida"
             
+            # Archivo de una ejecución anterior que no quedó registrado: se adopta en vez de duplicarlo
+            final_name = f"{unique_id}_{entity_type}_Gaceta{numero}_{year}.pdf"
+            dest_path = os.path.join(target_dir, final_name)
+            if has_number and is_pdf_valid(dest_path):
+                registry.marcar_descargada(corporacion, numero, year, dest_path)
+                log(numero, "existente", archivo=dest_path)
+                continue
+            
             # Buscar botón de descarga
             try:
                 btn = row.find_element(By.CSS_SELECTOR, "button[title='Descargar Pdf']")
             except:
                 print(f"[warn] no hay botón para gaceta {numero}")
+                log(numero, "sin_boton")
                 continue
 
             print(f"[info] Descargando gaceta {numero} ({entity_type}, {year})...")
             
             # Limpiar archivos temporales anteriores
-            for temp_pattern in ["*.crdownload", "*.part", "*.tmp"]:
-                for temp_file in glob.glob(os.path.join(OUTPUT_DIR, temp_pattern)):
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
+            remove_temp_downloads(download_dir)
             
-            # Click en el botón
+            # Click en el botón; el primer PDF nuevo que termine es el de esta fila
+            tracker.arm()
+            started = time.monotonic()
             driver.execute_script("arguments[0].click();", btn)
             
             # Esperar descarga
-            new_file = wait_for_complete_download(timeout=60)
+            new_file = tracker.wait(timeout=60)
+            if not new_file:
+                # La descarga puede seguir en curso: se resuelve antes del próximo click
+                new_file = tracker.settle(grace=30)
             
             if not new_file:
                 print(f"[error] timeout descargando gaceta {numero}")
+                log(numero, "timeout")
                 continue
                 
-            src_path = os.path.join(OUTPUT_DIR, new_file)
+            src_path = os.path.join(download_dir, new_file)
             
             # Verificar PDF
             if not is_pdf_valid(src_path):
                 print(f"[error] archivo PDF inválido para gaceta {numero}")
+                log(numero, "pdf_invalido")
                 try:
                     os.remove(src_path)
                 except:
                     pass
                 continue
             
-            # Crear nombre final con el formato: ID_ENTIDAD_NUMERO_AÑO.pdf
-            final_name = f"{unique_id}_{entity_type}_Gaceta{numero}_{year}.pdf"
-            dest_path = os.path.join(target_dir, final_name)
-            
+            # Nombre final con el formato: ID_ENTIDAD_NUMERO_AÑO.pdf (estable entre ejecuciones)
             # Si existe, agregar timestamp al final
-            if os.path.exists(dest_path):
+            if not has_number and os.path.exists(dest_path):
                 timestamp = int(time.time())
                 base_name = f"{unique_id}_{entity_type}_Gaceta{numero}_{year}"
                 final_name = f"{base_name}_{timestamp}.pdf"
@@ -299,70 +515,127 @@ def download_rows_on_current_page(driver):
             # Mover archivo
             try:
                 os.replace(src_path, dest_path)
+                registry.marcar_descargada(corporacion, numero, year, dest_path)
                 print(f"✅ Guardado: {final_name}")
                 print(f"   Ubicación: {dest_path}")
+                log(numero, "descargada", corporacion=entity_type, year=year, archivo=dest_path,
+                    segundos=round(time.monotonic() - started, 2))
             except Exception as e:
                 print(f"⚠️ Error moviendo archivo: {e}")
-
-            time.sleep(2)  # Pausa entre descargas
+                log(numero, "error", error=str(e))
             
         except Exception as e:
             print(f"[error] Error procesando fila {idx+1}: {e}")
+            log(f"fila_{idx+1}", "error", error=str(e))
             continue
 
-def main():
-    """Función principal."""
-    global ID_COUNTER
+def split_pages(start_page, end_page, workers):
+    """Reparte las páginas [start_page, end_page] en rangos contiguos disjuntos."""
+    pages = list(range(start_page, end_page + 1))
+    workers = max(1, min(workers, len(pages)))
+    size, extra = divmod(len(pages), workers)
+    chunks = []
+    pos = 0
+    for i in range(workers):
+        n = size + (1 if i < extra else 0)
+        chunks.append(pages[pos:pos + n])
+        pos += n
+    return chunks
+
+def open_listing(driver, wait):
+    """Carga la tabla y la deja en 50 filas por página."""
+    driver.get(BASE_URL)
+    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "tbody[id*='dataTableResumen_data'] tr")))
+    change_page_size_to_50(driver, wait)
+
+def process_pages(driver, pages, download_dir, result_log, registry, worker_id=0):
+    """Procesa una lista de páginas con un driver ya abierto en la tabla."""
+    with DownloadTracker(download_dir) as tracker:
+        print(f"[info] [worker {worker_id}] detección de descargas: {tracker.mode}")
+        for p in pages:
+            print(f"\n=== [worker {worker_id}] Procesando página {p} ===")
+            if go_to_page(driver, p):
+                download_rows_on_current_page(driver, registry, download_dir, p, result_log, worker_id, tracker)
+            else:
+                print(f"[error] No se pudo navegar a página {p}")
+                result_log.write({"worker": worker_id, "pagina": p, "estado": "error_navegacion"})
+
+def worker_download_dir(worker_id):
+    """Carpeta de descarga propia de un worker (separada del registro y los logs)."""
+    download_dir = os.path.join(OUTPUT_DIR, f"_descargas_worker_{worker_id}")
+    os.makedirs(download_dir, exist_ok=True)
+    return download_dir
+
+def run_worker(worker_id, pages, result_log, registry, headless=True):
+    """Worker con su propio Chrome y carpeta de descarga para un rango de páginas."""
+    download_dir = worker_download_dir(worker_id)
+    driver = setup_driver(download_dir, headless=headless)
+    if not driver:
+        print(f"❌ [worker {worker_id}] No se pudo inicializar el driver")
+        return
+    try:
+        open_listing(driver, WebDriverWait(driver, 20))
+        process_pages(driver, pages, download_dir, result_log, registry, worker_id)
+    except Exception as e:
+        print(f"❌ [worker {worker_id}] Error: {e}")
+    finally:
+        driver.quit()
+
+def main(workers=1, start_page=1, end_page=None, headless=False):
+    """
+    Función principal. El driver principal es el worker 0: descarga en su propia
+    carpeta y, con más de un worker, corre sin ventana como los demás.
+    """
     driver = None
+    registry = RegistroGacetas(REGISTRY_DB)
     
     try:
         print("Iniciando scraper...")
-        print(f"[info] ID iniciará desde: {ID_COUNTER:03d}")
+        print(f"[info] gacetas en el registro: {registry.estadisticas()['descargadas']}")
         
         # Configurar driver
-        driver = setup_driver()
+        download_dir = worker_download_dir(0)
+        driver = setup_driver(download_dir, headless=headless or workers > 1)
         if not driver:
             print("❌ No se pudo inicializar el driver")
             return
         
         wait = WebDriverWait(driver, 20)
         
-        # Ir a la página 
-        if BASE_URL == "https://svrpubindc.imprenta.gov.co/gacetas/index.xhtml":
-            print("❌ ERROR: Debes cambiar BASE_URL por la URL correcta del sitio web")
-            return
-            
+        # Ir a la página
         print(f"Navegando a: {BASE_URL}")
-        driver.get(BASE_URL)
-        
-        # Esperar a que cargue la tabla
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "tbody[id*='dataTableResumen_data'] tr")))
-        
-        # Intentar cambiar a 50 filas por página
-        change_page_size_to_50(driver, wait)
+        # Esperar a que cargue la tabla e intentar cambiar a 50 filas por página
+        open_listing(driver, wait)
         
         # Obtener total de páginas
         total_pages = get_total_pages(driver)
         print(f"[info] total de páginas detectadas: {total_pages}")
         
-        # Procesar páginas (limitado a 2 para pruebas)
-        start_page = 1
-        end_page = min(total_pages, 2)  # Cambiar por total_pages cuando esté funcionando
+        # Procesar páginas (limitado a 2 para pruebas si no se indica el rango)
+        if end_page is None:
+            end_page = min(total_pages, 2)  # Cambiar por total_pages cuando esté funcionando
+        end_page = min(end_page, total_pages)
         
-        print(f"[info] Procesando páginas {start_page} a {end_page}")
+        print(f"[info] Procesando páginas {start_page} a {end_page} con {workers} worker(s)")
+        result_log = ResultLog()
+        chunks = split_pages(start_page, end_page, workers)
         
-        for p in range(start_page, end_page + 1):
-            print(f"\n=== Procesando página {p} / {end_page} ===")
-            if go_to_page(driver, p):
-                download_rows_on_current_page(driver)
-            else:
-                print(f"[error] No se pudo navegar a página {p}")
+        # El driver principal (worker 0) procesa el primer rango; cada rango adicional abre su propio Chrome
+        with ThreadPoolExecutor(max_workers=max(1, len(chunks) - 1)) as executor:
+            futures = [executor.submit(run_worker, i, pages, result_log, registry, True)
+                       for i, pages in enumerate(chunks[1:], 1)]
+            if chunks:
+                process_pages(driver, chunks[0], download_dir, result_log, registry, worker_id=0)
+            for future in futures:
+                future.result()
         
         print(f"\n✅ Proceso completado.")
-        print(f"[info] Último ID usado: {ID_COUNTER-1:03d}")
+        print(f"[info] gacetas en el registro: {registry.estadisticas()['descargadas']}")
         print(f"Archivos guardados en:")
         print(f"  - Senado: {SENADO_DIR}")
         print(f"  - Cámara: {CAMARA_DIR}")
+        print(f"  - Resultados: {RESULT_LOG}")
+        print(f"  - Registro de gacetas: {REGISTRY_DB}")
         
     except Exception as e:
         print(f"❌ Error durante la ejecución: {e}")
@@ -373,9 +646,17 @@ def main():
         if driver:
             print("Cerrando navegador...")
             driver.quit()
+        registry.cerrar()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper Selenium de gacetas de la Imprenta")
+    parser.add_argument("--workers", type=int, default=1, help="Navegadores en paralelo (default: 1)")
+    parser.add_argument("--pagina-inicio", type=int, default=1)
+    parser.add_argument("--pagina-fin", type=int, default=None, help="Última página (default: 2, pruebas)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Sin ventana con un solo worker (con --workers > 1 todos corren sin ventana)")
+    args = parser.parse_args()
 
-    main()
+    main(args.workers, args.pagina_inicio, args.pagina_fin, args.headless)
 
 
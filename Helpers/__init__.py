@@ -1,7 +1,11 @@
 from .mongoDB import MongoDB
 from .funciones import Funciones
+from .cacheExtraccion import CacheExtraccion
+from .espacioTrabajo import EspacioTrabajo
+from .cacheHttp import CacheHttp
 from .elastic import ElasticSearch
 from .webScraping import WebScraping
+from .pipelineCarga import PipelineCarga
 #from .PLN import PLN
 #__all__ = ['MongoDB', 'Funciones', 'ElasticSearch', 'WebScraping']
-__all__ = ['MongoDB', 'Funciones', 'ElasticSearch', 'WebScraping', 'PLN']
\ No newline at end of file
+__all__ = ['MongoDB', 'Funciones', 'ElasticSearch', 'WebScraping', 'PLN', 'CacheExtraccion', 'EspacioTrabajo', 'CacheHttp', 'PipelineCarga']
\ No newline at end of file
@@ -0,0 +1,204 @@
+import os
+import hashlib
+import threading
+from typing import Dict, Optional
+
+
+class CacheExtraccion:
+    """
+    Cache persistente en disco para texto extraído de PDFs (PyPDF2, OCR, Docling).
+
+    Cada entrada se identifica por el SHA-256 del contenido del archivo más el
+    nombre y la versión del extractor, así que un mismo PDF descargado de nuevo
+    (con otro nombre o en otra carpeta) no se vuelve a procesar.
+    """
+
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, carpeta: str = None, max_bytes: int = None):
+        """
+        Inicializa el cache
+
+        Args:
+            carpeta: Carpeta donde se guardan las entradas (default: env CACHE_EXTRACCION_DIR)
+            max_bytes: Tamaño máximo en bytes antes de expulsar entradas (default: env CACHE_EXTRACCION_MAX_MB)
+        """
+        if carpeta is None:
+            carpeta = os.getenv('CACHE_EXTRACCION_DIR', 'cache_extraccion')
+        if max_bytes is None:
+            max_bytes = int(os.getenv('CACHE_EXTRACCION_MAX_MB', '1024')) * 1024 * 1024
+
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.escrituras = 0
+        self.expulsiones = 0
+        # Tamaño acumulado de las entradas: se calcula recorriendo la carpeta solo la
+        # primera vez y al superar max_bytes (otros procesos pueden escribir en el cache)
+        self._tamaño_total = None
+        self._lock = threading.Lock()
+        os.makedirs(self.carpeta, exist_ok=True)
+
+    @classmethod
+    def por_defecto(cls) -> 'CacheExtraccion':
+        """Retorna la instancia compartida del cache (configurada por variables de entorno)"""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    @staticmethod
+    def calcular_hash(ruta_archivo: str, tamaño_bloque: int = 1024 * 1024) -> str:
+        """
+        Calcula el SHA-256 del contenido de un archivo
+
+        Args:
+            ruta_archivo: Ruta del archivo
+            tamaño_bloque: Bytes leídos por iteración
+
+        Returns:
+            Hash hexadecimal del archivo
+        """
+        sha = hashlib.sha256()
+        with open(ruta_archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(tamaño_bloque), b''):
+                sha.update(bloque)
+        return sha.hexdigest()
+
+    def _ruta_entrada(self, sha256: str, extractor: str, version: str) -> str:
+        """Ruta en disco de una entrada del cache"""
+        clave = hashlib.sha256(f"{extractor}|{version}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.carpeta, sha256[:2], f"{sha256}_{clave}.txt")
+
+    def obtener(self, sha256: str, extractor: str, version: str) -> Optional[str]:
+        """
+        Busca una entrada en el cache
+
+        Args:
+            sha256: Hash del archivo de origen
+            extractor: Nombre del extractor (ej: 'pypdf2', 'tesseract', 'docling')
+            version: Versión/configuración del extractor
+
+        Returns:
+            Contenido guardado o None si no existe
+        """
+        ruta = self._ruta_entrada(sha256, extractor, version)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                contenido = f.read()
+            # Actualizar mtime para que la expulsión sea LRU
+            try:
+                os.utime(ruta)
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+            return contenido
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Error al leer cache de extracción {ruta}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+    def guardar(self, sha256: str, extractor: str, version: str, contenido: str) -> bool:
+        """
+        Guarda una entrada en el cache y expulsa las más antiguas si se supera el límite
+
+        Args:
+            sha256: Hash del archivo de origen
+            extractor: Nombre del extractor
+            version: Versión/configuración del extractor
+            contenido: Texto a guardar
+
+        Returns:
+            True si se guardó correctamente
+        """
+        ruta = self._ruta_entrada(sha256, extractor, version)
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(ruta_tmp, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            tamaño = os.path.getsize(ruta_tmp)
+            try:
+                tamaño_anterior = os.path.getsize(ruta)
+            except OSError:
+                tamaño_anterior = 0
+            os.replace(ruta_tmp, ruta)
+            with self._lock:
+                self.escrituras += 1
+            self._expulsar_si_excede(tamaño - tamaño_anterior)
+            return True
+        except Exception as e:
+            print(f"Error al guardar cache de extracción {ruta}: {e}")
+            return False
+
+    def _listar_entradas(self):
+        """Lista (ruta, tamaño, mtime) de todas las entradas del cache"""
+        entradas = []
+        for root, dirs, files in os.walk(self.carpeta):
+            for nombre in files:
+                if not nombre.endswith('.txt'):
+                    continue
+                ruta = os.path.join(root, nombre)
+                try:
+                    stat = os.stat(ruta)
+                except OSError:
+                    continue
+                entradas.append((ruta, stat.st_size, stat.st_mtime))
+        return entradas
+
+    def _expulsar_si_excede(self, bytes_agregados: int = 0):
+        """
+        Suma bytes_agregados al tamaño acumulado y, si supera max_bytes, elimina las
+        entradas menos usadas recientemente hasta quedar bajo el 90% del límite
+        (el margen evita recorrer la carpeta en cada escritura con el cache lleno)
+        """
+        with self._lock:
+            if self._tamaño_total is None:
+                # Primera escritura: el recorrido ya incluye la entrada nueva
+                self._tamaño_total = sum(tamaño for _, tamaño, _ in self._listar_entradas())
+            else:
+                self._tamaño_total += bytes_agregados
+            if self._tamaño_total <= self.max_bytes:
+                return
+
+            entradas = self._listar_entradas()
+            total = sum(tamaño for _, tamaño, _ in entradas)
+            for ruta, tamaño, _ in sorted(entradas, key=lambda e: e[2]):
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(ruta)
+                    total -= tamaño
+                    self.expulsiones += 1
+                except OSError:
+                    pass
+            self._tamaño_total = total
+
+    def estadisticas(self) -> Dict:
+        """
+        Retorna estadísticas de uso del cache
+
+        Returns:
+            Diccionario con hits, misses, tasa de aciertos, entradas y tamaño en disco
+        """
+        entradas = self._listar_entradas()
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'tasa_aciertos': round(self.hits / consultas, 4) if consultas else 0.0,
+                'escrituras': self.escrituras,
+                'expulsiones': self.expulsiones,
+                'entradas': len(entradas),
+                'tamaño_bytes': sum(tamaño for _, tamaño, _ in entradas),
+                'max_bytes': self.max_bytes
+            }
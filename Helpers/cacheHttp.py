@@ -0,0 +1,288 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Dict, Optional
+
+
+class CacheHttp:
+    """
+    Cache HTTP persistente para el web scraping.
+
+    Por cada URL guarda sus validadores (ETag / Last-Modified) y el SHA-256 del
+    cuerpo; los cuerpos se guardan una sola vez en un almacén direccionado por
+    contenido. En el siguiente scraping las solicitudes se envían como GET
+    condicionales y, si el servidor responde 304, se usa el cuerpo guardado.
+    """
+
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, carpeta: str = None, max_bytes: int = None):
+        """
+        Inicializa el cache
+
+        Args:
+            carpeta: Carpeta del cache (default: env CACHE_HTTP_DIR)
+            max_bytes: Tamaño máximo del almacén de cuerpos (default: env CACHE_HTTP_MAX_MB)
+        """
+        if carpeta is None:
+            carpeta = os.getenv('CACHE_HTTP_DIR', 'cache_http')
+        if max_bytes is None:
+            max_bytes = int(os.getenv('CACHE_HTTP_MAX_MB', '4096')) * 1024 * 1024
+
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self.carpeta_meta = os.path.join(carpeta, 'meta')
+        self.carpeta_objetos = os.path.join(carpeta, 'objetos')
+        self.revalidados = 0
+        self.descargados = 0
+        self.expulsiones = 0
+        # Tamaño acumulado del almacén: se recorre la carpeta solo la primera vez y al superar max_bytes
+        self._tamaño_total = None
+        self._lock = threading.Lock()
+        os.makedirs(self.carpeta_meta, exist_ok=True)
+        os.makedirs(self.carpeta_objetos, exist_ok=True)
+
+    @classmethod
+    def por_defecto(cls) -> 'CacheHttp':
+        """Retorna la instancia compartida del cache (configurada por variables de entorno)"""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    def _ruta_meta(self, url: str) -> str:
+        """Ruta de los metadatos de una URL"""
+        clave = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.carpeta_meta, clave[:2], f"{clave}.json")
+
+    def _ruta_objeto(self, sha256: str) -> str:
+        """Ruta de un cuerpo en el almacén direccionado por contenido"""
+        return os.path.join(self.carpeta_objetos, sha256[:2], sha256)
+
+    def _leer_meta(self, url: str) -> Optional[Dict]:
+        """Metadatos guardados de una URL, o None si no hay o su cuerpo fue expulsado"""
+        try:
+            with open(self._ruta_meta(url), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error al leer cache HTTP de {url}: {e}")
+            return None
+        if not os.path.exists(self._ruta_objeto(meta.get('sha256', ''))):
+            return None
+        return meta
+
+    def cabeceras_condicionales(self, url: str) -> Dict:
+        """
+        Cabeceras para un GET condicional de la URL
+
+        Args:
+            url: URL a solicitar
+
+        Returns:
+            Diccionario con If-None-Match / If-Modified-Since (vacío si no hay entrada)
+        """
+        meta = self._leer_meta(url)
+        if meta is None:
+            return {}
+        cabeceras = {}
+        if meta.get('etag'):
+            cabeceras['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            cabeceras['If-Modified-Since'] = meta['last_modified']
+        return cabeceras
+
+    def ruta_cuerpo(self, url: str) -> Optional[str]:
+        """
+        Ruta del cuerpo guardado de una URL (tras un 304)
+
+        Args:
+            url: URL solicitada
+
+        Returns:
+            Ruta del archivo en el almacén o None si no existe
+        """
+        meta = self._leer_meta(url)
+        if meta is None:
+            return None
+        ruta = self._ruta_objeto(meta['sha256'])
+        try:
+            # Actualizar mtime para que la expulsión sea LRU
+            os.utime(ruta)
+        except OSError:
+            return None
+        with self._lock:
+            self.revalidados += 1
+        return ruta
+
+    def leer_cuerpo(self, url: str) -> Optional[bytes]:
+        """Contenido guardado de una URL, o None si no existe"""
+        ruta = self.ruta_cuerpo(url)
+        if ruta is None:
+            return None
+        try:
+            with open(ruta, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _guardar_meta(self, url: str, cabeceras, sha256: str):
+        """Guarda los validadores de la URL de forma atómica"""
+        ruta = self._ruta_meta(url)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': url,
+                'etag': cabeceras.get('ETag'),
+                'last_modified': cabeceras.get('Last-Modified'),
+                'sha256': sha256
+            }, f, ensure_ascii=False)
+        os.replace(ruta_tmp, ruta)
+
+    @staticmethod
+    def _tiene_validadores(cabeceras) -> bool:
+        """Solo vale la pena guardar respuestas que se puedan revalidar"""
+        return bool(cabeceras.get('ETag') or cabeceras.get('Last-Modified'))
+
+    def guardar(self, url: str, cabeceras, contenido: bytes) -> Optional[str]:
+        """
+        Guarda una respuesta 200 cuyo cuerpo está en memoria
+
+        Args:
+            url: URL solicitada
+            cabeceras: Cabeceras de la respuesta
+            contenido: Cuerpo de la respuesta
+
+        Returns:
+            SHA-256 del cuerpo, o None si la respuesta no tiene validadores
+        """
+        if not self._tiene_validadores(cabeceras):
+            return None
+        sha256 = hashlib.sha256(contenido).hexdigest()
+        bytes_nuevos = 0
+        try:
+            ruta = self._ruta_objeto(sha256)
+            if not os.path.exists(ruta):
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(ruta_tmp, 'wb') as f:
+                    f.write(contenido)
+                os.replace(ruta_tmp, ruta)
+                bytes_nuevos = len(contenido)
+            self._guardar_meta(url, cabeceras, sha256)
+        except Exception as e:
+            print(f"Error al guardar cache HTTP de {url}: {e}")
+            return None
+        self._registrar_descarga(bytes_nuevos)
+        return sha256
+
+    def guardar_archivo(self, url: str, cabeceras, ruta_archivo: str, sha256: str) -> Optional[str]:
+        """
+        Guarda una respuesta 200 que ya se escribió en disco (ej: un PDF descargado en streaming)
+
+        Args:
+            url: URL solicitada
+            cabeceras: Cabeceras de la respuesta
+            ruta_archivo: Archivo con el cuerpo (se enlaza o copia al almacén)
+            sha256: SHA-256 del archivo, calculado durante la descarga
+
+        Returns:
+            SHA-256 del cuerpo, o None si la respuesta no tiene validadores
+        """
+        if not self._tiene_validadores(cabeceras):
+            return None
+        bytes_nuevos = 0
+        try:
+            ruta = self._ruta_objeto(sha256)
+            if not os.path.exists(ruta):
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+                copiar_archivo(ruta_archivo, ruta_tmp)
+                os.replace(ruta_tmp, ruta)
+                bytes_nuevos = os.path.getsize(ruta)
+            self._guardar_meta(url, cabeceras, sha256)
+        except Exception as e:
+            print(f"Error al guardar cache HTTP de {url}: {e}")
+            return None
+        self._registrar_descarga(bytes_nuevos)
+        return sha256
+
+    def _registrar_descarga(self, bytes_nuevos: int = 0):
+        with self._lock:
+            self.descargados += 1
+        self._expulsar_si_excede(bytes_nuevos)
+
+    def _listar_objetos(self):
+        """Lista (ruta, tamaño, mtime) de todos los cuerpos del almacén"""
+        entradas = []
+        for root, dirs, files in os.walk(self.carpeta_objetos):
+            for nombre in files:
+                if nombre.endswith('.tmp'):
+                    continue
+                ruta = os.path.join(root, nombre)
+                try:
+                    stat = os.stat(ruta)
+                except OSError:
+                    continue
+                entradas.append((ruta, stat.st_size, stat.st_mtime))
+        return entradas
+
+    def _expulsar_si_excede(self, bytes_agregados: int = 0):
+        """
+        Suma bytes_agregados al tamaño acumulado y, si supera max_bytes, elimina los
+        cuerpos menos usados recientemente hasta quedar bajo el 90% del límite
+        (el margen evita recorrer la carpeta en cada escritura con el cache lleno)
+        """
+        with self._lock:
+            if self._tamaño_total is None:
+                # Primera escritura: el recorrido ya incluye el cuerpo nuevo
+                self._tamaño_total = sum(tamaño for _, tamaño, _ in self._listar_objetos())
+            else:
+                self._tamaño_total += bytes_agregados
+            if self._tamaño_total <= self.max_bytes:
+                return
+
+            entradas = self._listar_objetos()
+            total = sum(tamaño for _, tamaño, _ in entradas)
+
+            # Los metadatos que apuntan a un cuerpo expulsado se ignoran al leerlos
+            for ruta, tamaño, _ in sorted(entradas, key=lambda e: e[2]):
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(ruta)
+                    total -= tamaño
+                    self.expulsiones += 1
+                except OSError:
+                    pass
+            self._tamaño_total = total
+
+    def estadisticas(self) -> Dict:
+        """
+        Retorna estadísticas de uso del cache
+
+        Returns:
+            Diccionario con respuestas revalidadas (304), descargadas (200) y expulsiones
+        """
+        with self._lock:
+            consultas = self.revalidados + self.descargados
+            return {
+                'revalidados': self.revalidados,
+                'descargados': self.descargados,
+                'tasa_revalidacion': round(self.revalidados / consultas, 4) if consultas else 0.0,
+                'expulsiones': self.expulsiones,
+                'max_bytes': self.max_bytes
+            }
+
+
+def copiar_archivo(origen: str, destino: str):
+    """Enlaza (hard link) el archivo si es posible, si no lo copia"""
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copyfile(origen, destino)
@@ -1,5 +1,13 @@
 from elasticsearch import Elasticsearch
+from collections import deque
+import re
+import threading
 import traceback
+import time
+
+# Sufijo de los índices versionados que crea reindexar_con_alias: {alias}_v<AAAAMMDDHHMMSS>
+_PATRON_VERSION = re.compile(r'^(?P<alias>.+)_v\d{14}$')
+
 
 class ElasticSearch:
     def __init__(self, cloud_url, api_key):
@@ -72,17 +80,22 @@ class ElasticSearch:
             try:
                 indices_info = self.es.cat.indices(format='json')
                 print(f"✅ cat.indices devolvió {len(indices_info)} índices totales")
+                aliases_por_indice = {}
+                for fila in self.es.cat.aliases(format='json'):
+                    aliases_por_indice.setdefault(fila.get('index'), set()).add(fila.get('alias'))
                 
                 # Formatear y filtrar
                 indices = []
                 for idx in indices_info:
                     nombre_indice = idx.get('index', '')
                     print(f"   - Procesando: {nombre_indice}")
+                    nombre = self._nombre_visible(nombre_indice, aliases_por_indice.get(nombre_indice, ()))
                     
                     # Filtrar índices del sistema
-                    if not nombre_indice.startswith('.'):
+                    if nombre and not nombre_indice.startswith('.'):
                         indices.append({
-                            'nombre': nombre_indice,
+                            'nombre': nombre,
+                            'indice': nombre_indice,
                             'salud': idx.get('health', 'unknown'),
                             'estado': idx.get('status', 'unknown'),
                             'documentos': idx.get('docs.count', '0'),
@@ -117,10 +130,11 @@ class ElasticSearch:
                     print(f"✅ get_alias devolvió {len(indices_dict)} índices")
                     
                     indices = []
-                    for nombre_indice in indices_dict.keys():
+                    for nombre_indice, info_indice in indices_dict.items():
                         print(f"   - Procesando: {nombre_indice}")
+                        nombre = self._nombre_visible(nombre_indice, (info_indice or {}).get('aliases', {}))
                         
-                        if not nombre_indice.startswith('.'):
+                        if nombre and not nombre_indice.startswith('.'):
                             # Intentar obtener stats
                             try:
                                 stats = self.es.indices.stats(index=nombre_indice)
@@ -132,7 +146,8 @@ class ElasticSearch:
                                 size_str = "unknown"
                             
                             indices.append({
-                                'nombre': nombre_indice,
+                                'nombre': nombre,
+                                'indice': nombre_indice,
                                 'salud': 'unknown',
                                 'estado': 'open',
                                 'documentos': str(doc_count),
@@ -294,6 +309,88 @@ class ElasticSearch:
                 'fallidos': len(documentos)
             }
     
+    @staticmethod
+    def generar_id_gaceta(doc):
+        """
+        Id de documento para una gaceta: corporación, número y año. Así una misma gaceta
+        cargada por ZIP o directo desde el ETL reemplaza al documento anterior en lugar
+        de duplicarlo. Sin esos metadatos usa el SHA-256 del contenido (archivos del
+        web scraping), y retorna None (id automático) si tampoco lo tiene.
+        """
+        corporacion = doc.get('corporacion')
+        numero = doc.get('numeroGaceta')
+        año = doc.get('año')
+        if not corporacion or not numero or not año:
+            return ElasticSearch.id_por_contenido(doc.get('sha256'))
+        return f"{str(corporacion).lower()}-{numero}-{año}"
+    
+    @staticmethod
+    def id_por_contenido(sha256):
+        """Id de documento derivado del SHA-256 del archivo (None si no se conoce)"""
+        return f"sha256-{sha256}" if sha256 else None
+    
+    def indexar_bulk_stream(self, index, documentos, chunk_size=500, generar_id=None, al_resultado=None):
+        """
+        Indexar documentos desde un iterable sin materializarlos en una lista.
+        Los documentos se envían en lotes de chunk_size a medida que se producen.
+        generar_id(doc) puede retornar el _id de cada documento (None: id automático).
+        al_resultado(doc, ok, item) recibe el resultado de cada documento, en orden.
+        """
+        try:
+            if not self.es:
+                return {
+                    'success': False,
+                    'error': 'Cliente no inicializado',
+                    'indexados': 0,
+                    'fallidos': 0
+                }
+            
+            from elasticsearch.helpers import streaming_bulk
+            
+            # Documentos enviados y aún sin resultado (streaming_bulk responde en el mismo orden)
+            enviados = deque()
+            
+            def acciones():
+                for doc in documentos:
+                    accion = {"_index": index, "_source": doc}
+                    doc_id = generar_id(doc) if generar_id else None
+                    if doc_id:
+                        accion["_id"] = doc_id
+                    if al_resultado is not None:
+                        enviados.append(doc)
+                    yield accion
+            
+            actions = acciones()
+            
+            print(f"📤 Indexando documentos en streaming en '{index}' (lotes de {chunk_size})")
+            
+            indexados = 0
+            fallidos = 0
+            for ok, item in streaming_bulk(self.es, actions, chunk_size=chunk_size,
+                                           raise_on_error=False):
+                if ok:
+                    indexados += 1
+                else:
+                    fallidos += 1
+                if al_resultado is not None:
+                    al_resultado(enviados.popleft(), ok, item)
+            
+            print(f"✅ Indexados: {indexados}, Fallidos: {fallidos}")
+            
+            return {
+                'success': True,
+                'indexados': indexados,
+                'fallidos': fallidos
+            }
+        except Exception as e:
+            print(f"❌ Error en indexar_bulk_stream: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'indexados': 0,
+                'fallidos': 0
+            }
+    
     def crear_indice(self, nombre_indice, mapping=None):
         """Crear un nuevo índice"""
         try:
@@ -330,4 +427,364 @@ class ElasticSearch:
             return {'success': True, 'mensaje': f'Índice {nombre_indice} eliminado correctamente'}
         except Exception as e:
             print(f"❌ Error en eliminar_indice: {e}")
-            return {'success': False, 'error': str(e)}
\ No newline at end of file
+            return {'success': False, 'error': str(e)}
+    
+    def obtener_indices_alias(self, alias):
+        """Retorna la lista de índices a los que apunta un alias (vacía si no existe)"""
+        try:
+            if not self.es or not self.es.indices.exists_alias(name=alias):
+                return []
+            return list(self.es.indices.get_alias(name=alias).keys())
+        except Exception as e:
+            print(f"❌ Error en obtener_indices_alias: {e}")
+            return []
+    
+    def existe_documento(self, index, doc_id):
+        """Indica si el índice (o alias) ya tiene un documento con ese _id"""
+        try:
+            if not self.es or not doc_id:
+                return False
+            return bool(self.es.exists(index=index, id=doc_id))
+        except Exception as e:
+            print(f"❌ Error en existe_documento: {e}")
+            return False
+    
+    @staticmethod
+    def alias_de_version(indice):
+        """Alias al que pertenece un índice versionado ({alias}_v<timestamp>), None si no es una versión"""
+        coincidencia = _PATRON_VERSION.match(indice or '')
+        return coincidencia.group('alias') if coincidencia else None
+    
+    @classmethod
+    def _nombre_visible(cls, indice, aliases):
+        """
+        Nombre con el que se lista un índice: una versión activa se muestra con su alias
+        (es el nombre que se debe usar para cargar o recargar) y las versiones anteriores
+        que se conservan para volver atrás no se listan (retorna None)
+        """
+        alias = cls.alias_de_version(indice)
+        if alias is None:
+            return indice
+        return alias if alias in aliases else None
+    
+    def listar_versiones_indice(self, alias):
+        """Lista los índices versionados de un alias ({alias}_v<timestamp>), del más nuevo al más viejo"""
+        try:
+            if not self.es:
+                return []
+            indices = self.es.indices.get(index=f"{alias}_v*", ignore_unavailable=True, allow_no_indices=True)
+            # El comodín también incluye índices ajenos como {alias}_ventas: solo las versiones exactas
+            return sorted((i for i in indices.keys() if self.alias_de_version(i) == alias), reverse=True)
+        except Exception as e:
+            print(f"❌ Error en listar_versiones_indice: {e}")
+            return []
+    
+    def cambiar_alias(self, alias, nuevo_indice):
+        """
+        Apunta el alias a nuevo_indice en una sola operación atómica.
+        Si existe un índice real con el nombre del alias (esquema anterior) se elimina
+        en la misma operación, así la búsqueda nunca queda sin índice.
+        """
+        try:
+            if not self.es:
+                return {'success': False, 'error': 'Cliente no inicializado'}
+            
+            acciones = []
+            indices_actuales = self.obtener_indices_alias(alias)
+            for indice in indices_actuales:
+                if indice != nuevo_indice:
+                    acciones.append({"remove": {"index": indice, "alias": alias}})
+            
+            if not indices_actuales and self.es.indices.exists(index=alias):
+                print(f"⚠️  '{alias}' es un índice real, se reemplaza por un alias")
+                acciones.append({"remove_index": {"index": alias}})
+            
+            acciones.append({"add": {"index": nuevo_indice, "alias": alias}})
+            self.es.indices.update_aliases(body={"actions": acciones})
+            print(f"✅ Alias '{alias}' → '{nuevo_indice}'")
+            
+            return {'success': True, 'anteriores': [i for i in indices_actuales if i != nuevo_indice]}
+        except Exception as e:
+            print(f"❌ Error en cambiar_alias: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def limpiar_versiones_antiguas(self, alias, conservar=1):
+        """
+        Elimina los índices versionados del alias que ya no están en uso,
+        conservando las `conservar` versiones más recientes (para poder volver atrás)
+        """
+        try:
+            if not self.es:
+                return {'success': False, 'error': 'Cliente no inicializado', 'eliminados': []}
+            
+            en_uso = set(self.obtener_indices_alias(alias))
+            versiones = [v for v in self.listar_versiones_indice(alias) if v not in en_uso]
+            eliminados = []
+            for indice in versiones[conservar:]:
+                self.es.indices.delete(index=indice)
+                eliminados.append(indice)
+                print(f"🗑  Índice antiguo '{indice}' eliminado")
+            
+            return {'success': True, 'eliminados': eliminados}
+        except Exception as e:
+            print(f"❌ Error en limpiar_versiones_antiguas: {e}")
+            return {'success': False, 'error': str(e), 'eliminados': []}
+    
+    def configuracion_actual(self, alias):
+        """
+        Mappings y análisis (analyzers) del índice al que apunta el alias, o del índice
+        real con ese nombre (esquema anterior). Retorna (None, None) si no existe.
+        """
+        origen = (self.obtener_indices_alias(alias) or [None])[0]
+        if origen is None and self.es.indices.exists(index=alias):
+            origen = alias
+        if origen is None:
+            return None, None
+        mappings = self.es.indices.get_mapping(index=origen)[origen].get('mappings') or None
+        settings = self.es.indices.get_settings(index=origen)[origen]['settings']
+        return mappings, settings.get('index', {}).get('analysis')
+    
+    def reindexar_con_alias(self, alias, documentos, mapping=None, replicas=1,
+                            refresh_interval="1s", conservar_versiones=1, chunk_size=500,
+                            forcemerge=True, timeout_forcemerge=3600):
+        """
+        Reconstruye un índice sin cortar la búsqueda (blue/green):
+        crea {alias}_v<timestamp> sin réplicas ni refresh, lo carga en bulk, restaura
+        la configuración, hace force-merge (opcional) y cambia el alias de forma atómica.
+        Mientras tanto las búsquedas siguen sobre el índice que apunta el alias.
+        Si algo falla antes del cambio de alias, el índice nuevo se elimina.
+        El force-merge usa su propio timeout (timeout_forcemerge segundos); si se
+        agota, el merge sigue en el servidor y el alias se cambia igual.
+        Sin mapping se copian los mappings y el análisis del índice que se reemplaza.
+        """
+        nuevo_indice = f"{alias}_v{time.strftime('%Y%m%d%H%M%S')}"
+        creado = False
+        try:
+            if not self.es:
+                return {'success': False, 'error': 'Cliente no inicializado', 'indexados': 0, 'fallidos': 0}
+            
+            # Recargar una versión por su nombre la reemplazaría por un índice y borraría el alias real
+            alias_base = self.alias_de_version(alias)
+            if alias_base is not None:
+                return {
+                    'success': False,
+                    'error': f"'{alias}' es una versión del alias '{alias_base}', recargue usando '{alias_base}'",
+                    'indexados': 0,
+                    'fallidos': 0
+                }
+            
+            analisis = None
+            if mapping is None:
+                mapping, analisis = self.configuracion_actual(alias)
+            
+            body = {
+                "settings": {
+                    "index": {
+                        "number_of_replicas": 0,
+                        "refresh_interval": "-1"
+                    }
+                }
+            }
+            if analisis:
+                body['settings']['index']['analysis'] = analisis
+            if mapping:
+                body['mappings'] = mapping
+            
+            self.es.indices.create(index=nuevo_indice, body=body)
+            creado = True
+            print(f"✅ Índice '{nuevo_indice}' creado para la recarga")
+            
+            resultado = self.indexar_bulk_stream(nuevo_indice, documentos, chunk_size=chunk_size,
+                                                 generar_id=self.generar_id_gaceta)
+            if not resultado['success'] or resultado['indexados'] == 0:
+                self._descartar_indice(nuevo_indice)
+                print(f"❌ Recarga cancelada, '{alias}' sigue apuntando a la versión anterior")
+                return {
+                    'success': False,
+                    'error': resultado.get('error', 'No se indexó ningún documento'),
+                    'indexados': resultado['indexados'],
+                    'fallidos': resultado['fallidos']
+                }
+            
+            # Restaurar configuración normal y compactar segmentos antes de exponerlo
+            self.es.indices.put_settings(index=nuevo_indice, body={
+                "index": {
+                    "number_of_replicas": replicas,
+                    "refresh_interval": refresh_interval
+                }
+            })
+            self.es.indices.refresh(index=nuevo_indice)
+            if forcemerge:
+                try:
+                    self.es.options(request_timeout=timeout_forcemerge).indices.forcemerge(
+                        index=nuevo_indice, max_num_segments=1)
+                except Exception as e:
+                    # El merge continúa en el servidor; el índice ya es consultable
+                    print(f"⚠ Force-merge de '{nuevo_indice}' sin terminar ({e}), se continúa con el alias")
+            
+            cambio = self.cambiar_alias(alias, nuevo_indice)
+            if not cambio['success']:
+                self._descartar_indice(nuevo_indice)
+                return {
+                    'success': False,
+                    'error': cambio['error'],
+                    'indexados': resultado['indexados'],
+                    'fallidos': resultado['fallidos']
+                }
+            
+            limpieza = self.limpiar_versiones_antiguas(alias, conservar=conservar_versiones)
+            
+            return {
+                'success': True,
+                'indice': nuevo_indice,
+                'indexados': resultado['indexados'],
+                'fallidos': resultado['fallidos'],
+                'eliminados': limpieza.get('eliminados', [])
+            }
+        except Exception as e:
+            print(f"❌ Error en reindexar_con_alias: {e}")
+            traceback.print_exc()
+            if creado:
+                self._descartar_indice(nuevo_indice)
+            return {'success': False, 'error': str(e), 'indexados': 0, 'fallidos': 0}
+    
+    def _descartar_indice(self, indice):
+        """Eliminar un índice de una recarga fallida (no debe quedar huérfano con refresh desactivado)"""
+        try:
+            self.es.indices.delete(index=indice, ignore_unavailable=True)
+            print(f"🗑 Índice '{indice}' eliminado")
+        except Exception as e:
+            print(f"⚠ No se pudo eliminar el índice '{indice}': {e}")
+
+
+class SinkElastic:
+    """
+    Envía documentos a Elasticsearch en lotes a medida que se producen
+    (por ejemplo, cada gaceta recién convertida por el ETL).
+    El lote se envía al alcanzar max_docs documentos, max_bytes de texto o
+    max_segundos desde su primer documento, lo que ocurra primero.
+    """
+    
+    def __init__(self, elastic, index, max_docs=100, max_bytes=5 * 1024 * 1024, max_segundos=30,
+                 al_resultado=None):
+        """
+        Inicializar el sink sobre una instancia de ElasticSearch
+        
+        Args:
+            elastic: Instancia de ElasticSearch
+            index: Índice de destino
+            max_docs: Documentos por lote
+            max_bytes: Tamaño aproximado del lote (caracteres de texto)
+            max_segundos: Tiempo máximo que un documento espera en el lote (None: sin límite)
+            al_resultado: Función (clave, ok, error) llamada por cada documento enviado
+        """
+        self.elastic = elastic
+        self.index = index
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.max_segundos = max_segundos
+        self.al_resultado = al_resultado
+        self._lote = []
+        self._claves = []
+        self._bytes_lote = 0
+        self._inicio_lote = None
+        self.indexados = 0
+        self.fallidos = 0
+        # El hilo de vaciado y los productores comparten el lote
+        self._lock = threading.RLock()
+        self._detener = threading.Event()
+        self._hilo = None
+        if max_segundos:
+            self._hilo = threading.Thread(target=self._vaciar_por_tiempo, daemon=True)
+            self._hilo.start()
+    
+    @staticmethod
+    def _estimar_tamaño(valor):
+        """Tamaño aproximado de un documento: largo de sus textos, sin serializarlo"""
+        if isinstance(valor, str):
+            return len(valor)
+        if isinstance(valor, dict):
+            return sum(SinkElastic._estimar_tamaño(v) for v in valor.values())
+        if isinstance(valor, (list, tuple)):
+            return sum(SinkElastic._estimar_tamaño(v) for v in valor)
+        return 8
+    
+    def agregar(self, doc, clave=None):
+        """Agregar un documento al lote actual, enviándolo si se llenó"""
+        with self._lock:
+            if not self._lote:
+                self._inicio_lote = time.monotonic()
+            self._lote.append(doc)
+            self._claves.append(clave)
+            self._bytes_lote += self._estimar_tamaño(doc)
+            if len(self._lote) >= self.max_docs or self._bytes_lote >= self.max_bytes:
+                self.enviar()
+    
+    def agregar_diferido(self, cargar, clave=None):
+        """
+        Enviar un documento grande que se lee con cargar() recién al momento de
+        enviarlo (ej: desde el JSON o shard ya escrito), en un lote propio
+        """
+        with self._lock:
+            self.enviar()
+            try:
+                doc = cargar()
+            except Exception as e:
+                print(f"❌ No se pudo leer el documento {clave or ''} para indexarlo: {e}")
+                self._registrar_resultado(clave, False, str(e))
+                return
+            self._enviar_lote([doc], [clave])
+    
+    def _vaciar_por_tiempo(self):
+        """Hilo que envía el lote pendiente cuando su primer documento lleva max_segundos esperando"""
+        while not self._detener.wait(min(1.0, self.max_segundos)):
+            with self._lock:
+                if self._lote and time.monotonic() - self._inicio_lote >= self.max_segundos:
+                    self.enviar()
+    
+    def _registrar_resultado(self, clave, ok, error=None):
+        """Contar el resultado de un documento y avisarlo a al_resultado"""
+        if ok:
+            self.indexados += 1
+        else:
+            self.fallidos += 1
+        if self.al_resultado is not None:
+            try:
+                self.al_resultado(clave, ok, error)
+            except Exception as e:
+                print(f"⚠ Error al reportar el resultado de {clave}: {e}")
+    
+    def _enviar_lote(self, lote, claves):
+        """Indexar un lote y reportar el resultado de cada documento"""
+        resultados = []
+        resultado = self.elastic.indexar_bulk_stream(
+            self.index, lote, generar_id=ElasticSearch.generar_id_gaceta,
+            al_resultado=lambda doc, ok, item: resultados.append((ok, item)))
+        for i, clave in enumerate(claves):
+            if i < len(resultados):
+                ok, item = resultados[i]
+                error = None if ok else str(next(iter(item.values()), {}).get('error', item))
+            else:
+                # Sin respuesta para el documento: falló el envío del lote
+                ok, error = False, resultado.get('error') or 'Sin respuesta de Elasticsearch'
+            self._registrar_resultado(clave, ok, error)
+    
+    def enviar(self):
+        """Enviar el lote pendiente"""
+        with self._lock:
+            if not self._lote:
+                return
+            lote, claves = self._lote, self._claves
+            self._lote, self._claves = [], []
+            self._bytes_lote = 0
+            self._inicio_lote = None
+            self._enviar_lote(lote, claves)
+    
+    def cerrar(self):
+        """Enviar lo pendiente y retornar el total indexado"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        self.enviar()
+        return {'indexados': self.indexados, 'fallidos': self.fallidos}
@@ -0,0 +1,155 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+
+class EspacioTrabajo:
+    """
+    Carpeta temporal aislada para un trabajo de carga (ZIP o web scraping).
+
+    Cada trabajo escribe solo en su propia carpeta dentro de carpeta_base, así que
+    varias cargas pueden correr al mismo tiempo sin borrarse archivos entre sí.
+    Las carpetas se eliminan al terminar (limpiar) o al vencer su tiempo de vida.
+    """
+
+    PREFIJO = 'trabajo_'
+    _PATRON_ID = re.compile(r'^[A-Za-z0-9_]+$')
+
+    def __init__(self, carpeta_base: str = None, cuota_bytes: int = None, trabajo_id: str = None):
+        """
+        Crea un espacio de trabajo nuevo, o abre uno existente si se indica trabajo_id
+
+        Args:
+            carpeta_base: Carpeta donde se crean los espacios (default: env UPLOAD_TRABAJOS_DIR)
+            cuota_bytes: Máximo de bytes que puede ocupar el espacio (default: env UPLOAD_CUOTA_MB)
+            trabajo_id: Identificador de un espacio existente
+        """
+        if carpeta_base is None:
+            carpeta_base = os.getenv('UPLOAD_TRABAJOS_DIR', os.path.join('static', 'uploads', 'trabajos'))
+        if cuota_bytes is None:
+            cuota_bytes = int(os.getenv('UPLOAD_CUOTA_MB', '2048')) * 1024 * 1024
+
+        self.carpeta_base = carpeta_base
+        self.cuota_bytes = cuota_bytes
+        os.makedirs(self.carpeta_base, exist_ok=True)
+
+        if trabajo_id is None:
+            self.ruta = tempfile.mkdtemp(prefix=self.PREFIJO, dir=self.carpeta_base)
+            self.id = os.path.basename(self.ruta)
+        else:
+            if not self._PATRON_ID.match(trabajo_id) or not trabajo_id.startswith(self.PREFIJO):
+                raise ValueError(f'Identificador de trabajo inválido: {trabajo_id}')
+            self.id = trabajo_id
+            self.ruta = os.path.join(self.carpeta_base, trabajo_id)
+            if not os.path.isdir(self.ruta):
+                raise FileNotFoundError(f'El espacio de trabajo {trabajo_id} no existe o ya expiró')
+
+    @classmethod
+    def abrir(cls, trabajo_id: str, carpeta_base: str = None) -> Optional['EspacioTrabajo']:
+        """
+        Abre un espacio de trabajo existente
+
+        Args:
+            trabajo_id: Identificador devuelto al crear el espacio
+            carpeta_base: Carpeta base de los espacios
+
+        Returns:
+            EspacioTrabajo o None si no existe o el id es inválido
+        """
+        try:
+            return cls(carpeta_base=carpeta_base, trabajo_id=trabajo_id)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"No se pudo abrir el espacio de trabajo: {e}")
+            return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.limpiar()
+        return False
+
+    def ruta_archivo(self, nombre: str) -> str:
+        """Ruta de un archivo dentro del espacio de trabajo"""
+        return os.path.join(self.ruta, nombre)
+
+    def contiene(self, ruta: str) -> bool:
+        """Verifica que una ruta esté dentro del espacio de trabajo"""
+        base = os.path.realpath(self.ruta)
+        destino = os.path.realpath(ruta)
+        return os.path.commonpath([base, destino]) == base
+
+    def bytes_usados(self) -> int:
+        """Bytes ocupados actualmente por el espacio de trabajo"""
+        total = 0
+        for root, dirs, files in os.walk(self.ruta):
+            for nombre in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, nombre))
+                except OSError:
+                    pass
+        return total
+
+    def bytes_disponibles(self) -> int:
+        """Bytes que aún se pueden escribir sin superar la cuota"""
+        return max(0, self.cuota_bytes - self.bytes_usados())
+
+    def verificar_cuota(self, bytes_adicionales: int = 0) -> bool:
+        """
+        Verifica si caben bytes_adicionales dentro de la cuota
+
+        Args:
+            bytes_adicionales: Bytes que se pretende escribir
+
+        Returns:
+            True si no se supera la cuota
+        """
+        return self.bytes_usados() + bytes_adicionales <= self.cuota_bytes
+
+    def limpiar(self) -> bool:
+        """Elimina el espacio de trabajo y todo su contenido"""
+        try:
+            if os.path.isdir(self.ruta):
+                shutil.rmtree(self.ruta)
+            return True
+        except Exception as e:
+            print(f"Error al eliminar espacio de trabajo {self.ruta}: {e}")
+            return False
+
+    @classmethod
+    def limpiar_expirados(cls, carpeta_base: str = None, ttl_segundos: int = None) -> int:
+        """
+        Elimina los espacios de trabajo cuya última modificación supera el tiempo de vida
+
+        Args:
+            carpeta_base: Carpeta base de los espacios (default: env UPLOAD_TRABAJOS_DIR)
+            ttl_segundos: Tiempo de vida (default: env UPLOAD_TTL_HORAS)
+
+        Returns:
+            Número de espacios eliminados
+        """
+        if carpeta_base is None:
+            carpeta_base = os.getenv('UPLOAD_TRABAJOS_DIR', os.path.join('static', 'uploads', 'trabajos'))
+        if ttl_segundos is None:
+            ttl_segundos = int(float(os.getenv('UPLOAD_TTL_HORAS', '6')) * 3600)
+
+        if not os.path.isdir(carpeta_base):
+            return 0
+
+        eliminados = 0
+        limite = time.time() - ttl_segundos
+        for nombre in os.listdir(carpeta_base):
+            ruta = os.path.join(carpeta_base, nombre)
+            if not nombre.startswith(cls.PREFIJO) or not os.path.isdir(ruta):
+                continue
+            try:
+                if os.path.getmtime(ruta) < limite:
+                    shutil.rmtree(ruta)
+                    eliminados += 1
+                    print(f"Eliminado espacio de trabajo expirado: {ruta}")
+            except Exception as e:
+                print(f"Error al eliminar espacio de trabajo {ruta}: {e}")
+        return eliminados
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+class EstadoRastreoOcupado(Exception):
+    """Otro rastreo de la misma URL está usando el estado"""
+
+
+def _bloquear(fd: int):
+    """Lock exclusivo sin espera sobre un archivo abierto (EstadoRastreoOcupado si ya está tomado)"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        raise EstadoRastreoOcupado("Hay otro rastreo en curso con este estado")
+
+
+def _desbloquear(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class EstadoRastreo:
+    """
+    Estado persistente de un rastreo de links (SQLite).
+
+    Guarda los links descubiertos, las páginas ya visitadas y la frontera de
+    páginas pendientes con los intentos fallidos de cada una: una página que
+    falló se reintenta en vez de darse por visitada. Los cambios se confirman
+    en cada checkpoint, así un rastreo interrumpido se retoma desde el último
+    checkpoint sin volver a visitar las páginas ya procesadas. Al terminar el
+    rastreo el estado se compacta (se elimina), ya que el resultado queda en el
+    JSON de links.
+
+    Mientras está abierto, el estado tiene un lock exclusivo (archivo .lock): dos
+    rastreos de la misma URL no comparten la base de datos. Un estado más antiguo
+    que max_antiguedad se descarta al abrirlo, así un rastreo viejo sin terminar
+    no oculta las páginas que cambiaron desde entonces.
+    """
+
+    def __init__(self, ruta_db: str, max_antiguedad: float = None):
+        """
+        Abre (o crea) el estado del rastreo
+
+        Args:
+            ruta_db: Ruta del archivo SQLite
+            max_antiguedad: Segundos desde el inicio del rastreo guardado tras los que
+                se descarta en vez de retomarlo (None: sin límite)
+
+        Raises:
+            EstadoRastreoOcupado: Si otro rastreo tiene abierto el mismo estado
+        """
+        self.ruta_db = ruta_db
+        carpeta = os.path.dirname(ruta_db)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        # El archivo de lock no se elimina: borrarlo permitiría dos locks sobre archivos distintos
+        self._fd_lock = os.open(ruta_db + '.lock', os.O_RDWR | os.O_CREAT)
+        try:
+            _bloquear(self._fd_lock)
+        except EstadoRastreoOcupado:
+            os.close(self._fd_lock)
+            raise
+        self._conn = sqlite3.connect(ruta_db)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS links (
+                orden INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                tipo TEXT
+            );
+            CREATE TABLE IF NOT EXISTS visitados (url TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS frontera (
+                orden INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                intentos INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+        """)
+        columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(frontera)")}
+        if 'intentos' not in columnas:
+            # Estado creado por una versión anterior
+            self._conn.execute("ALTER TABLE frontera ADD COLUMN intentos INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self._descartar_si_vencido(max_antiguedad)
+
+    def _descartar_si_vencido(self, max_antiguedad: float = None):
+        """Vacía el estado si es más antiguo que max_antiguedad (o no tiene fecha) y fija el inicio"""
+        fila = self._conn.execute("SELECT valor FROM meta WHERE clave = 'creado'").fetchone()
+        creado = float(fila[0]) if fila else None
+        if self.tiene_datos():
+            vencido = creado is None or (max_antiguedad is not None and time.time() - creado > max_antiguedad)
+            if not vencido:
+                return
+            print(f"Estado de rastreo {os.path.basename(self.ruta_db)} vencido, se inicia un rastreo nuevo")
+        self._conn.execute("DELETE FROM links")
+        self._conn.execute("DELETE FROM visitados")
+        self._conn.execute("DELETE FROM frontera")
+        self._conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('creado', ?)", (str(time.time()),))
+        self._conn.commit()
+
+    @staticmethod
+    def ruta_para(url_inicial: str, listado_extensiones: List[str] = None, carpeta: str = None) -> str:
+        """
+        Ruta estable del estado de un rastreo: depende de la URL inicial y de las
+        extensiones, no de la carpeta de trabajo de cada solicitud
+
+        Args:
+            url_inicial: URL inicial del rastreo
+            listado_extensiones: Extensiones que se extraen
+            carpeta: Carpeta de los estados (default: ESTADO_RASTREO_DIR o 'estado_rastreo')
+
+        Returns:
+            Ruta del archivo SQLite
+        """
+        if carpeta is None:
+            carpeta = os.getenv('ESTADO_RASTREO_DIR', 'estado_rastreo')
+        extensiones = ','.join(sorted({ext.lower().strip() for ext in listado_extensiones or []}))
+        clave = hashlib.sha256(f"{url_inicial}|{extensiones}".encode('utf-8')).hexdigest()
+        return os.path.join(carpeta, f"{clave[:32]}.db")
+
+    def tiene_datos(self) -> bool:
+        """Indica si hay un rastreo previo sin terminar"""
+        return self._conn.execute("SELECT 1 FROM links LIMIT 1").fetchone() is not None
+
+    def cargar(self, max_intentos: int = None) -> Tuple[List[Dict], Set[str], List[str], Dict[str, int]]:
+        """
+        Carga el estado guardado
+
+        Args:
+            max_intentos: Omitir de la frontera las páginas que ya fallaron esta cantidad de veces
+
+        Returns:
+            Tupla (links descubiertos, URLs visitadas, frontera pendiente en orden,
+            intentos fallidos por página de la frontera)
+        """
+        links = [{'url': url, 'type': tipo}
+                 for url, tipo in self._conn.execute("SELECT url, tipo FROM links ORDER BY orden")]
+        visitados = {url for (url,) in self._conn.execute("SELECT url FROM visitados")}
+        frontera = []
+        intentos = {}
+        for url, fallos in self._conn.execute("SELECT url, intentos FROM frontera ORDER BY orden"):
+            if url in visitados or (max_intentos is not None and fallos >= max_intentos):
+                continue
+            frontera.append(url)
+            if fallos:
+                intentos[url] = fallos
+        return links, visitados, frontera, intentos
+
+    def agregar_links(self, links: Iterable[Dict]):
+        """Registra links descubiertos (los repetidos se ignoran)"""
+        self._conn.executemany("INSERT OR IGNORE INTO links (url, tipo) VALUES (?, ?)",
+                               ((link['url'], link.get('type')) for link in links))
+
+    def agregar_frontera(self, urls: Iterable[str]):
+        """Agrega páginas pendientes por visitar"""
+        self._conn.executemany("INSERT OR IGNORE INTO frontera (url) VALUES (?)",
+                               ((url,) for url in urls))
+
+    def registrar_pagina(self, url: str, nuevos_links: List[Dict], nuevas_paginas: List[str]):
+        """
+        Registra una página procesada: queda como visitada, sale de la frontera
+        y se agregan sus links y páginas nuevas
+
+        Args:
+            url: Página visitada
+            nuevos_links: Links nuevos encontrados en la página
+            nuevas_paginas: Páginas nuevas que entran a la frontera
+        """
+        self.agregar_links(nuevos_links)
+        self.agregar_frontera(nuevas_paginas)
+        self._conn.execute("INSERT OR IGNORE INTO visitados (url) VALUES (?)", (url,))
+        self._conn.execute("DELETE FROM frontera WHERE url = ?", (url,))
+
+    def registrar_fallo(self, url: str) -> int:
+        """
+        Registra un intento fallido de visitar una página: sigue en la frontera
+
+        Returns:
+            Intentos fallidos acumulados de la página
+        """
+        self._conn.execute("INSERT OR IGNORE INTO frontera (url) VALUES (?)", (url,))
+        self._conn.execute("UPDATE frontera SET intentos = intentos + 1 WHERE url = ?", (url,))
+        return self._conn.execute("SELECT intentos FROM frontera WHERE url = ?", (url,)).fetchone()[0]
+
+    def checkpoint(self):
+        """Confirma en disco los cambios registrados desde el último checkpoint"""
+        self._conn.commit()
+
+    def cerrar(self):
+        """Confirma los cambios pendientes, cierra la base de datos y libera el lock"""
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+        if self._fd_lock is not None:
+            _desbloquear(self._fd_lock)
+            os.close(self._fd_lock)
+            self._fd_lock = None
+
+    def compactar(self):
+        """Elimina el estado de un rastreo terminado (el resultado ya está en el JSON de links)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        # Con el lock tomado: ningún otro rastreo está escribiendo en estos archivos
+        for sufijo in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.ruta_db + sufijo)
+            except FileNotFoundError:
+                pass
+        self.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
@@ -1,13 +1,19 @@
 import os
+import io
+import posixpath
 import zipfile
 import requests
 import json
 import PyPDF2
 from PIL import Image
 import pytesseract
-from typing import Dict, List
+from typing import Dict, List, Iterator
+from functools import lru_cache
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from .cacheExtraccion import CacheExtraccion
+from .shardsJsonl import (es_shard_jsonl, iterar_shard_jsonl, NOMBRE_INDICE, ubicaciones_vigentes,
+                          cargar_ubicaciones_vigentes)
 
 class Funciones:
     @staticmethod
@@ -22,11 +28,21 @@ class Funciones:
             return False
     
     @staticmethod
-    def descomprimir_zip_local(ruta_file_zip: str, ruta_descomprimir: str) -> List[Dict]:
-        """Descomprime un archivo ZIP y retorna info de archivos"""
+    def descomprimir_zip_local(ruta_file_zip: str, ruta_descomprimir: str, max_bytes: int = None) -> List[Dict]:
+        """Descomprime un archivo ZIP y retorna info de archivos (sin superar max_bytes descomprimidos)"""
         archivos = []
         try:
             with zipfile.ZipFile(ruta_file_zip, 'r') as zip_ref:
+                if max_bytes is not None:
+                    total = sum(
+                        info.file_size for info in zip_ref.infolist()
+                        if not info.is_dir() and (os.path.splitext(info.filename)[1].lower() in ['.txt', '.pdf', '.json']
+                                                  or es_shard_jsonl(info.filename))
+                    )
+                    if total > max_bytes:
+                        print(f"Error al descomprimir ZIP: {total} bytes descomprimidos superan la cuota de {max_bytes}")
+                        return []
+                
                 for file_info in zip_ref.namelist():
                     if not file_info.endswith('/'):
                         # Extraer carpeta padre
@@ -34,8 +50,8 @@ class Funciones:
                         nombre_archivo = os.path.basename(file_info)
                         extension = os.path.splitext(nombre_archivo)[1].lower()
                         
-                        # Solo procesar txt, pdf y json
-                        if extension in ['.txt', '.pdf', '.json']:
+                        # Solo procesar txt, pdf, json y shards jsonl
+                        if extension in ['.txt', '.pdf', '.json'] or es_shard_jsonl(nombre_archivo):
                             zip_ref.extract(file_info, ruta_descomprimir)
                             archivos.append({
                                 'carpeta': carpeta if carpeta else 'raiz',
@@ -48,6 +64,97 @@ class Funciones:
             print(f"Error al descomprimir ZIP: {e}")
             return []
     
+    @staticmethod
+    def iterar_json_zip(fuente_zip) -> Iterator[Dict]:
+        """
+        Lee los archivos JSON (y shards .jsonl/.jsonl.gz/.jsonl.zst) de un ZIP directamente
+        desde el archivo comprimido, sin extraerlos a disco. Cada documento se entrega
+        a medida que se lee.
+        
+        Args:
+            fuente_zip: Ruta del ZIP o stream binario con seek (ej: el upload de Flask)
+            
+        Returns:
+            Iterador de documentos (un JSON con una lista entrega cada elemento)
+        """
+        with zipfile.ZipFile(fuente_zip, 'r') as zip_ref:
+            # Índices de shards por carpeta del ZIP: evitan leer copias viejas de gacetas reprocesadas
+            vigentes_por_carpeta = {}
+            for info in zip_ref.infolist():
+                if posixpath.basename(info.filename) == NOMBRE_INDICE:
+                    try:
+                        with zip_ref.open(info) as miembro:
+                            vigentes_por_carpeta[posixpath.dirname(info.filename)] = \
+                                ubicaciones_vigentes(json.load(io.TextIOWrapper(miembro, encoding='utf-8')))
+                    except Exception as e:
+                        print(f"Error al leer {info.filename} del ZIP: {e}")
+            
+            for info in zip_ref.infolist():
+                if info.is_dir():
+                    continue
+                
+                if es_shard_jsonl(info.filename):
+                    try:
+                        with zip_ref.open(info) as miembro:
+                            yield from iterar_shard_jsonl(
+                                miembro, info.filename,
+                                vigentes_por_carpeta.get(posixpath.dirname(info.filename)))
+                    except Exception as e:
+                        print(f"Error al leer el shard {info.filename} del ZIP: {e}")
+                    continue
+                
+                if not info.filename.lower().endswith('.json') or \
+                        posixpath.basename(info.filename) == NOMBRE_INDICE:
+                    continue
+                try:
+                    with zip_ref.open(info) as miembro:
+                        contenido = json.load(io.TextIOWrapper(miembro, encoding='utf-8'))
+                except Exception as e:
+                    print(f"Error al leer {info.filename} del ZIP: {e}")
+                    continue
+                
+                if isinstance(contenido, list):
+                    for doc in contenido:
+                        if isinstance(doc, dict) and doc:
+                            yield doc
+                elif isinstance(contenido, dict) and contenido:
+                    yield contenido
+    
+    @staticmethod
+    def iterar_documentos_archivos(archivos: List[Dict]) -> Iterator[Dict]:
+        """
+        Lee en streaming los documentos de una lista de archivos JSON o shards JSONL
+        
+        Args:
+            archivos: Lista de diccionarios con la clave 'ruta'
+            
+        Returns:
+            Iterador de documentos
+        """
+        vigentes_por_carpeta = {}
+        for archivo in archivos:
+            ruta = archivo.get('ruta')
+            if not ruta or not os.path.exists(ruta):
+                continue
+            if os.path.basename(ruta) == NOMBRE_INDICE:
+                continue
+            print(f"Procesando archivo: {ruta}")
+            if es_shard_jsonl(ruta):
+                # Con el índice de la carpeta se omiten las copias viejas de gacetas reprocesadas
+                carpeta = os.path.dirname(os.path.abspath(ruta))
+                if carpeta not in vigentes_por_carpeta:
+                    vigentes_por_carpeta[carpeta] = cargar_ubicaciones_vigentes(carpeta)
+                try:
+                    yield from iterar_shard_jsonl(ruta, vigentes=vigentes_por_carpeta[carpeta])
+                except Exception as e:
+                    print(f"Error al leer el shard {ruta}: {e}")
+            else:
+                doc = Funciones.leer_json(ruta)
+                if isinstance(doc, list):
+                    yield from (d for d in doc if isinstance(d, dict) and d)
+                elif doc:
+                    yield doc
+    
     @staticmethod
     def descargar_y_descomprimir_zip(url: str, carpeta_destino: str, tipoArchivo: str = '') -> List[Dict]:
         """Descarga y descomprime un ZIP desde URL"""
@@ -127,12 +234,21 @@ class Funciones:
             Texto extraído del PDF
         """
         try:
+            cache = CacheExtraccion.por_defecto()
+            sha256 = cache.calcular_hash(ruta_pdf)
+            version = PyPDF2.__version__
+            texto = cache.obtener(sha256, 'pypdf2', version)
+            if texto is not None:
+                return texto
+            
             texto = ""
             with open(ruta_pdf, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 for page in pdf_reader.pages:
                     texto += page.extract_text() + "\n"
-            return texto.strip()
+            texto = texto.strip()
+            cache.guardar(sha256, 'pypdf2', version, texto)
+            return texto
         except Exception as e:
             print(f"Error al extraer texto del PDF {ruta_pdf}: {e}")
             return ""
@@ -151,6 +267,13 @@ class Funciones:
         try:
             from pdf2image import convert_from_path
             
+            cache = CacheExtraccion.por_defecto()
+            sha256 = cache.calcular_hash(ruta_pdf)
+            version = f"{Funciones._version_tesseract()}|spa"
+            texto = cache.obtener(sha256, 'tesseract', version)
+            if texto is not None:
+                return texto
+            
             # Convertir PDF a imágenes
             images = convert_from_path(ruta_pdf)
             
@@ -159,11 +282,120 @@ class Funciones:
                 # Aplicar OCR a cada página
                 texto += pytesseract.image_to_string(image, lang='spa') + "\n"
             
-            return texto.strip()
+            texto = texto.strip()
+            cache.guardar(sha256, 'tesseract', version, texto)
+            return texto
         except Exception as e:
             print(f"Error al extraer texto con OCR del PDF {ruta_pdf}: {e}")
             return ""
     
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _version_tesseract() -> str:
+        """Versión de tesseract instalada (parte de la clave del cache de extracción)"""
+        try:
+            return str(pytesseract.get_tesseract_version())
+        except Exception:
+            return "desconocida"
+    
+    @staticmethod
+    def _ocr_pagina_pdf(ruta_pdf: str, numero_pagina: int, dpi: int, lang: str) -> str:
+        """
+        Rasteriza una sola página del PDF y le aplica OCR
+        
+        Args:
+            ruta_pdf: Ruta del archivo PDF
+            numero_pagina: Número de página (base 1)
+            dpi: Resolución de rasterización
+            lang: Idioma de tesseract
+            
+        Returns:
+            Texto extraído de la página
+        """
+        from pdf2image import convert_from_path
+        
+        imagenes = convert_from_path(ruta_pdf, dpi=dpi,
+                                     first_page=numero_pagina, last_page=numero_pagina)
+        try:
+            return "\n".join(pytesseract.image_to_string(img, lang=lang) for img in imagenes)
+        finally:
+            for img in imagenes:
+                img.close()
+    
+    @staticmethod
+    def extraer_texto_pdf_selectivo(ruta_pdf: str, dpi: int = 200, max_workers: int = None,
+                                    min_caracteres_pagina: int = 50, lang: str = 'spa') -> str:
+        """
+        Extrae texto de un PDF página por página: usa la capa de texto cuando existe
+        y aplica OCR solo a las páginas escaneadas (sin texto utilizable).
+        
+        Las páginas escaneadas se rasterizan de una en una, así que en memoria solo
+        hay tantas imágenes como workers de OCR, sin importar el tamaño del PDF.
+        
+        Args:
+            ruta_pdf: Ruta del archivo PDF
+            dpi: Resolución para rasterizar las páginas que requieren OCR
+            max_workers: Número de páginas procesadas con OCR en paralelo (default: núcleos)
+            min_caracteres_pagina: Mínimo de caracteres para considerar la capa de texto válida
+            lang: Idioma de tesseract
+            
+        Returns:
+            Texto extraído del PDF
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        try:
+            cache = CacheExtraccion.por_defecto()
+            sha256 = cache.calcular_hash(ruta_pdf)
+            version = (f"{PyPDF2.__version__}|{Funciones._version_tesseract()}|"
+                       f"{lang}|dpi={dpi}|min={min_caracteres_pagina}")
+            texto = cache.obtener(sha256, 'selectivo', version)
+            if texto is not None:
+                return texto
+            
+            textos = []
+            paginas_ocr = []
+            fallas_ocr = 0
+            with open(ruta_pdf, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                for i, page in enumerate(pdf_reader.pages):
+                    try:
+                        texto_pagina = page.extract_text() or ""
+                    except Exception:
+                        texto_pagina = ""
+                    textos.append(texto_pagina)
+                    if len(texto_pagina.strip()) < min_caracteres_pagina:
+                        paginas_ocr.append(i)
+            
+            if paginas_ocr:
+                print(f"OCR en {len(paginas_ocr)}/{len(textos)} páginas de {ruta_pdf}")
+                if max_workers is None:
+                    max_workers = os.cpu_count() or 1
+                
+                # tesseract y pdftoppm corren como subprocesos, por eso bastan hilos
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futuros = {
+                        i: executor.submit(Funciones._ocr_pagina_pdf, ruta_pdf, i + 1, dpi, lang)
+                        for i in paginas_ocr
+                    }
+                    for i, futuro in futuros.items():
+                        try:
+                            texto_ocr = futuro.result()
+                            if len(texto_ocr.strip()) > len(textos[i].strip()):
+                                textos[i] = texto_ocr
+                        except Exception as e:
+                            fallas_ocr += 1
+                            print(f"Error en OCR de la página {i + 1} de {ruta_pdf}: {e}")
+            
+            texto = "\n".join(textos).strip()
+            # Un resultado con páginas sin OCR no se guarda: la próxima vez se reintenta
+            if not fallas_ocr:
+                cache.guardar(sha256, 'selectivo', version, texto)
+            return texto
+        except Exception as e:
+            print(f"Error al extraer texto selectivo del PDF {ruta_pdf}: {e}")
+            return ""
+    
     @staticmethod
     def listar_archivos_json(ruta_carpeta: str) -> List[Dict]:
         """
@@ -0,0 +1,267 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+from Helpers.cacheExtraccion import CacheExtraccion
+from Helpers.funciones import Funciones
+from Helpers.elastic import ElasticSearch, SinkElastic
+
+
+# Marca de fin de cola para los hilos de cada etapa
+_FIN = object()
+
+# Pools de extracción compartidos por todas las cargas (uno por cantidad de procesos).
+# Se crean con 'spawn': un fork desde un worker de Flask con hilos de descarga activos
+# puede copiar locks tomados al proceso hijo.
+_pools_extraccion = {}
+_lock_pools = threading.Lock()
+
+
+def _pool_extraccion(workers: int) -> ProcessPoolExecutor:
+    """Pool de procesos de extracción compartido (se crea la primera vez que se usa)"""
+    with _lock_pools:
+        pool = _pools_extraccion.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pools_extraccion[workers] = pool
+        return pool
+
+
+def _descartar_pool_extraccion(workers: int, pool: ProcessPoolExecutor):
+    """Saca del registro un pool roto (murió un proceso) para que la próxima carga cree otro"""
+    with _lock_pools:
+        if _pools_extraccion.get(workers) is pool:
+            del _pools_extraccion[workers]
+    pool.shutdown(wait=False)
+
+
+def documento_desde_archivo(ruta: str, nombre: str = '', extension: str = None,
+                            max_workers_ocr: int = None) -> Optional[Dict]:
+    """
+    Extrae el texto de un archivo descargado y arma el documento a indexar
+
+    Args:
+        ruta: Ruta del archivo
+        nombre: Nombre original del archivo
+        extension: Extensión (default: la de la ruta)
+        max_workers_ocr: Páginas en OCR en paralelo dentro de este archivo
+
+    Returns:
+        Documento para Elastic, o None si no tiene texto suficiente
+    """
+    if extension is None:
+        extension = os.path.splitext(ruta)[1].lstrip('.')
+    extension = extension.lower()
+
+    texto = ""
+    if extension == 'pdf':
+        # Capa de texto por página y OCR solo en páginas escaneadas
+        texto = Funciones.extraer_texto_pdf_selectivo(ruta, max_workers=max_workers_ocr)
+    elif extension == 'txt':
+        for encoding in ('utf-8', 'latin-1'):
+            try:
+                with open(ruta, 'r', encoding=encoding) as f:
+                    texto = f.read()
+                break
+            except (UnicodeDecodeError, OSError):
+                continue
+
+    if not texto or len(texto.strip()) < 50:
+        return None
+
+    return {
+        'texto': texto,
+        'fecha': datetime.now().isoformat(),
+        'ruta': ruta,
+        'nombre_archivo': nombre or os.path.basename(ruta)
+    }
+
+
+class PipelineCarga:
+    """
+    Pipeline por etapas para cargar archivos a Elasticsearch:
+    descarga → extracción de texto → indexación bulk.
+
+    Las etapas se comunican con colas acotadas: la extracción (CPU, en procesos)
+    avanza mientras siguen las descargas (red) y la indexación de los lotes ya
+    extraídos. Si una etapa se atrasa, la cola llena frena a la anterior, así la
+    memoria queda limitada por el tamaño de las colas y no por el total de archivos.
+    """
+
+    def __init__(self, elastic, index: str, workers_extraccion: int = None, tamaño_cola: int = 16,
+                 max_docs_lote: int = 100, max_bytes_lote: int = 5 * 1024 * 1024):
+        """
+        Configura el pipeline
+
+        Args:
+            elastic: Instancia de ElasticSearch
+            index: Índice de destino
+            workers_extraccion: Procesos de extracción (default: núcleos - 1)
+            tamaño_cola: Máximo de elementos en cada cola entre etapas
+            max_docs_lote: Documentos por lote bulk
+            max_bytes_lote: Tamaño aproximado de cada lote bulk (caracteres de texto)
+        """
+        self.elastic = elastic
+        self.index = index
+        self.workers_extraccion = workers_extraccion or max(1, (os.cpu_count() or 2) - 1)
+        self.tamaño_cola = tamaño_cola
+        self.max_docs_lote = max_docs_lote
+        self.max_bytes_lote = max_bytes_lote
+
+    def _extraer(self, cola_archivos: queue.Queue, cola_documentos: queue.Queue,
+                 executor: ProcessPoolExecutor, estado: Dict):
+        """Hilo de extracción: toma archivos, extrae el texto en un proceso y encola el documento"""
+        # Los hilos de OCR de cada archivo se reparten entre los procesos de extracción
+        max_workers_ocr = max(1, (os.cpu_count() or 1) // self.workers_extraccion)
+        while True:
+            item = cola_archivos.get()
+            if item is _FIN:
+                return
+            ruta, nombre, extension, sha256 = item
+            # Un archivo con el mismo contenido ya indexado en otra carga no se vuelve a extraer
+            if sha256 and self.elastic.existe_documento(self.index, ElasticSearch.id_por_contenido(sha256)):
+                with estado['lock']:
+                    estado['sin_cambios'] += 1
+                continue
+            try:
+                documento = executor.submit(documento_desde_archivo, ruta, nombre, extension,
+                                            max_workers_ocr).result()
+            except BrokenProcessPool as e:
+                print(f"Error extrayendo {nombre or ruta}: {e}")
+                with estado['lock']:
+                    estado['errores_extraccion'] += 1
+                    estado['pool_roto'] = True
+                continue
+            except Exception as e:
+                print(f"Error extrayendo {nombre or ruta}: {e}")
+                with estado['lock']:
+                    estado['errores_extraccion'] += 1
+                continue
+            with estado['lock']:
+                if documento is None:
+                    estado['sin_texto'] += 1
+                else:
+                    estado['extraidos'] += 1
+            if documento is not None:
+                if sha256:
+                    documento['sha256'] = sha256
+                cola_documentos.put(documento)
+
+    def _indexar(self, cola_documentos: queue.Queue, sink: SinkElastic):
+        """Hilo de indexación: agrupa los documentos en lotes bulk a medida que llegan"""
+        while True:
+            documento = cola_documentos.get()
+            if documento is _FIN:
+                return
+            sink.agregar(documento)
+
+    def ejecutar(self, productor: Callable[[Callable], Optional[Dict]]) -> Dict:
+        """
+        Ejecuta el pipeline
+
+        Args:
+            productor: Función que recibe encolar(ruta, nombre='', extension=None, sha256=None)
+                y la llama por cada archivo listo; encolar bloquea si la etapa de extracción
+                está llena. Con sha256 el documento se indexa con ese contenido como _id y se
+                omite si ya está en el índice.
+                Lo que retorne se agrega al resultado en la clave 'descarga'.
+
+        Returns:
+            Diccionario con archivos, documentos indexados, fallidos y tiempos
+        """
+        cola_archivos = queue.Queue(maxsize=self.tamaño_cola)
+        cola_documentos = queue.Queue(maxsize=self.tamaño_cola)
+        sink = SinkElastic(self.elastic, self.index, self.max_docs_lote, self.max_bytes_lote)
+        estado = {'lock': threading.Lock(), 'archivos': 0, 'extraidos': 0,
+                  'sin_texto': 0, 'sin_cambios': 0, 'errores_extraccion': 0, 'pool_roto': False}
+
+        def encolar(ruta: str, nombre: str = '', extension: str = None, sha256: str = None):
+            with estado['lock']:
+                estado['archivos'] += 1
+            cola_archivos.put((ruta, nombre, extension, sha256))
+
+        inicio = time.perf_counter()
+        resultado_productor = None
+        executor = _pool_extraccion(self.workers_extraccion)
+        extractores = [threading.Thread(target=self._extraer,
+                                        args=(cola_archivos, cola_documentos, executor, estado),
+                                        daemon=True)
+                       for _ in range(self.workers_extraccion)]
+        indexador = threading.Thread(target=self._indexar, args=(cola_documentos, sink), daemon=True)
+        for hilo in extractores:
+            hilo.start()
+        indexador.start()
+
+        try:
+            resultado_productor = productor(encolar)
+        finally:
+            # Cerrar las etapas en orden: cada una termina lo que tiene en cola
+            for _ in extractores:
+                cola_archivos.put(_FIN)
+            for hilo in extractores:
+                hilo.join()
+            cola_documentos.put(_FIN)
+            indexador.join()
+            resultado_sink = sink.cerrar()
+            if estado['pool_roto']:
+                _descartar_pool_extraccion(self.workers_extraccion, executor)
+
+        tiempo = time.perf_counter() - inicio
+        # Sin ningún documento indexado y con fallas, la carga no tuvo éxito
+        fallo_todo = resultado_sink['indexados'] == 0 and (resultado_sink['fallidos'] > 0 or
+                                                           estado['errores_extraccion'] > 0)
+        resultado = {
+            'success': not fallo_todo,
+            'archivos': estado['archivos'],
+            'extraidos': estado['extraidos'],
+            'sin_texto': estado['sin_texto'],
+            'sin_cambios': estado['sin_cambios'],
+            'errores_extraccion': estado['errores_extraccion'],
+            'indexados': resultado_sink['indexados'],
+            'fallidos': resultado_sink['fallidos'],
+            'tiempo_segundos': round(tiempo, 2)
+        }
+        if fallo_todo:
+            resultado['error'] = 'No se indexó ningún documento'
+        if resultado_productor is not None:
+            resultado['descarga'] = resultado_productor
+
+        print(f"✅ Pipeline: {resultado['archivos']} archivos, {resultado['indexados']} indexados, "
+              f"{resultado['fallidos']} fallidos, {resultado['sin_texto']} sin texto, "
+              f"{resultado['sin_cambios']} sin cambios "
+              f"({resultado['tiempo_segundos']}s)")
+        return resultado
+
+    def cargar_archivos(self, archivos: Iterable[Dict]) -> Dict:
+        """
+        Extrae e indexa archivos ya descargados (dicts con 'ruta', 'nombre' y 'extension'),
+        usando el SHA-256 de cada archivo como _id
+        """
+        def productor(encolar):
+            for archivo in archivos:
+                ruta = archivo.get('ruta')
+                if ruta and os.path.exists(ruta):
+                    encolar(ruta, archivo.get('nombre', ''), archivo.get('extension') or None,
+                            CacheExtraccion.calcular_hash(ruta))
+
+        return self.ejecutar(productor)
+
+    def descargar_y_cargar(self, scraper, json_file_path: str, carpeta_destino: str,
+                           cuota_bytes: int = None) -> Dict:
+        """
+        Descarga los PDFs de links.json con el scraper y extrae/indexa cada uno
+        apenas termina su descarga. Cada PDF se indexa con su SHA-256 como _id, así
+        volver a scrapear el mismo sitio no duplica ni reextrae los PDFs sin cambios.
+        """
+        def productor(encolar):
+            return scraper.descargar_pdfs(json_file_path, carpeta_destino, cuota_bytes=cuota_bytes,
+                                          al_descargar=lambda ruta, link: encolar(ruta, os.path.basename(ruta),
+                                                                                  'pdf', link.get('sha256')))
+
+        return self.ejecutar(productor)
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+class RegistroGacetas:
+    """
+    Registro persistente (SQLite) de las gacetas descargadas.
+
+    Cada gaceta se identifica por corporación + número + año y recibe un ID
+    estable la primera vez que se ve, así el nombre del archivo no cambia entre
+    ejecuciones. Los scrapers consultan el registro antes de descargar una fila
+    para que una cosecha incremental solo descargue las gacetas nuevas.
+    """
+
+    def __init__(self, ruta_db: str):
+        """
+        Abre (o crea) el registro
+
+        Args:
+            ruta_db: Ruta del archivo SQLite
+        """
+        self.ruta_db = ruta_db
+        carpeta = os.path.dirname(ruta_db)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        # Una conexión compartida por los hilos de descarga, serializada con el lock
+        self._conn = sqlite3.connect(ruta_db, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS gacetas (
+                id INTEGER PRIMARY KEY,
+                corporacion TEXT NOT NULL,
+                numero TEXT NOT NULL,
+                anio TEXT NOT NULL,
+                archivo TEXT,
+                bytes INTEGER,
+                descargada_en TEXT,
+                UNIQUE (corporacion, numero, anio)
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def clave(corporacion: str, numero: str, año: str) -> Tuple[str, str, str]:
+        """Clave normalizada (sin tildes, mayúsculas ni espacios repetidos)"""
+        def normalizar(texto):
+            texto = unicodedata.normalize('NFKD', str(texto or ''))
+            texto = ''.join(c for c in texto if not unicodedata.combining(c))
+            return ' '.join(texto.split()).casefold()
+        return normalizar(corporacion), normalizar(numero), normalizar(año)
+
+    def asignar_id(self, corporacion: str, numero: str, año: str) -> int:
+        """
+        ID estable de la gaceta (se crea la primera vez que se ve)
+
+        Returns:
+            ID de la gaceta
+        """
+        clave = self.clave(corporacion, numero, año)
+        with self._lock:
+            return self._asignar_id(clave)
+
+    def _asignar_id(self, clave: Tuple[str, str, str]) -> int:
+        """asignar_id con el lock tomado: inserta solo si la gaceta no existe, así no se consumen IDs"""
+        consulta = "SELECT id FROM gacetas WHERE corporacion = ? AND numero = ? AND anio = ?"
+        fila = self._conn.execute(consulta, clave).fetchone()
+        if fila is None:
+            # OR IGNORE por si otro proceso la insertó entre la consulta y la inserción
+            self._conn.execute("INSERT OR IGNORE INTO gacetas (corporacion, numero, anio) VALUES (?, ?, ?)", clave)
+            self._conn.commit()
+            fila = self._conn.execute(consulta, clave).fetchone()
+        return fila[0]
+
+    def archivo_descargado(self, corporacion: str, numero: str, año: str) -> Optional[str]:
+        """
+        Archivo de la gaceta si ya fue descargada y sigue en disco
+
+        Returns:
+            Ruta del archivo, o None si hay que descargarla
+        """
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT archivo FROM gacetas WHERE corporacion = ? AND numero = ? AND anio = ?",
+                self.clave(corporacion, numero, año)).fetchone()
+        if fila and fila[0] and os.path.exists(fila[0]):
+            return fila[0]
+        return None
+
+    def marcar_descargada(self, corporacion: str, numero: str, año: str, archivo: str, bytes_archivo: int = None):
+        """Registra el archivo descargado de la gaceta"""
+        clave = self.clave(corporacion, numero, año)
+        if bytes_archivo is None:
+            bytes_archivo = os.path.getsize(archivo)
+        with self._lock:
+            self._asignar_id(clave)
+            self._conn.execute(
+                "UPDATE gacetas SET archivo = ?, bytes = ?, descargada_en = ? "
+                "WHERE corporacion = ? AND numero = ? AND anio = ?",
+                (archivo, bytes_archivo, datetime.now().isoformat(timespec='seconds'), *clave))
+            self._conn.commit()
+
+    def estadisticas(self) -> Dict:
+        """Gacetas conocidas y descargadas"""
+        with self._lock:
+            total, descargadas = self._conn.execute(
+                "SELECT COUNT(*), COUNT(archivo) FROM gacetas").fetchone()
+        return {'gacetas': total, 'descargadas': descargadas}
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
@@ -0,0 +1,290 @@
+import os
+import io
+import re
+import gzip
+import json
+from typing import Dict, Iterator, Optional
+
+
+# Extensiones de shard soportadas según compresión
+EXTENSIONES_SHARD = {
+    'gzip': '.jsonl.gz',
+    'zstd': '.jsonl.zst',
+    'ninguna': '.jsonl'
+}
+
+NOMBRE_INDICE = 'indice_shards.json'
+
+
+def es_shard_jsonl(nombre_archivo: str) -> bool:
+    """Indica si un nombre de archivo corresponde a un shard JSONL (comprimido o no)"""
+    nombre = nombre_archivo.lower()
+    return any(nombre.endswith(ext) for ext in EXTENSIONES_SHARD.values())
+
+
+def _importar_zstd():
+    """Importa zstandard (dependencia opcional, solo para shards .jsonl.zst)"""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError("Para shards .jsonl.zst instale el paquete 'zstandard' (pip install zstandard)")
+
+
+def _escribir_documento(f_texto, campos: Dict, partes_texto: Optional[Iterator[str]],
+                        campo_texto: str, campos_posteriores: Dict = None) -> None:
+    """
+    Escribe un documento como una línea JSON. Si se entregan partes_texto, el campo
+    de texto se va escribiendo parte por parte sin armar el string completo, y
+    campos_posteriores (que se completan al consumir las partes) se escriben al final.
+    """
+    if partes_texto is None:
+        f_texto.write(json.dumps(campos, ensure_ascii=False))
+    else:
+        f_texto.write("{")
+        for clave, valor in campos.items():
+            f_texto.write(f"{json.dumps(clave, ensure_ascii=False)}: {json.dumps(valor, ensure_ascii=False)}, ")
+        f_texto.write(f'{json.dumps(campo_texto)}: "')
+        for parte in partes_texto:
+            # Cada parte se escapa como string JSON y se escribe sin las comillas
+            f_texto.write(json.dumps(parte, ensure_ascii=False)[1:-1])
+        f_texto.write('"')
+        for clave, valor in (campos_posteriores or {}).items():
+            f_texto.write(f", {json.dumps(clave, ensure_ascii=False)}: {json.dumps(valor, ensure_ascii=False)}")
+        f_texto.write('}')
+    f_texto.write("\n")
+
+
+class EscritorShardsJsonl:
+    """
+    Escribe documentos en shards JSONL comprimidos de tamaño acotado.
+
+    Cada documento se comprime como un miembro gzip (o frame zstd) independiente,
+    así el archivo completo se puede leer en streaming y además cada documento se
+    puede leer solo con su (shard, offset, longitud) guardado en el índice.
+    """
+
+    def __init__(self, carpeta: str, prefijo: str = 'gacetas', compresion: str = 'gzip',
+                 max_bytes_shard: int = 64 * 1024 * 1024):
+        """
+        Inicializa el escritor
+
+        Args:
+            carpeta: Carpeta donde se escriben los shards
+            prefijo: Prefijo de los nombres de shard (ej: gacetas-00000.jsonl.gz)
+            compresion: 'gzip', 'zstd' o 'ninguna'
+            max_bytes_shard: Tamaño máximo en disco de cada shard antes de abrir uno nuevo
+        """
+        if compresion not in EXTENSIONES_SHARD:
+            raise ValueError(f"Compresión no soportada: {compresion}")
+        if compresion == 'zstd':
+            self._zstd = _importar_zstd()
+
+        self.carpeta = carpeta
+        self.prefijo = prefijo
+        self.compresion = compresion
+        self.extension = EXTENSIONES_SHARD[compresion]
+        self.max_bytes_shard = max_bytes_shard
+        os.makedirs(self.carpeta, exist_ok=True)
+
+        # Continuar después de los shards existentes, nunca sobrescribirlos
+        patron = re.compile(rf'^{re.escape(prefijo)}-(\d+){re.escape(self.extension)}$')
+        numeros = [int(m.group(1)) for m in map(patron.match, os.listdir(self.carpeta)) if m]
+        self.numero_shard = max(numeros) + 1 if numeros else 0
+        self._archivo = None
+
+    @property
+    def nombre_shard_actual(self) -> str:
+        return f"{self.prefijo}-{self.numero_shard:05d}{self.extension}"
+
+    def _archivo_actual(self):
+        """Retorna el shard abierto, rotando a uno nuevo si se alcanzó el tamaño máximo"""
+        if self._archivo is not None and self._archivo.tell() >= self.max_bytes_shard:
+            self._archivo.close()
+            self._archivo = None
+            self.numero_shard += 1
+        if self._archivo is None:
+            ruta = os.path.join(self.carpeta, self.nombre_shard_actual)
+            self._archivo = open(ruta, 'ab')
+        return self._archivo
+
+    def escribir(self, campos: Dict, partes_texto: Iterator[str] = None,
+                 campo_texto: str = 'texto_completo', campos_posteriores: Dict = None) -> Dict:
+        """
+        Agrega un documento al shard actual
+
+        Args:
+            campos: Documento completo, o solo metadatos si se entregan partes_texto
+            partes_texto: Iterador con las partes del campo de texto (opcional)
+            campo_texto: Nombre del campo que se arma con partes_texto
+            campos_posteriores: Campos que se escriben después del texto (solo con partes_texto)
+
+        Returns:
+            Ubicación del documento: shard, offset y longitud en bytes
+        """
+        archivo = self._archivo_actual()
+        offset = archivo.tell()
+
+        if self.compresion == 'gzip':
+            comprimido = gzip.GzipFile(fileobj=archivo, mode='wb')
+            destino = comprimido
+        elif self.compresion == 'zstd':
+            comprimido = self._zstd.ZstdCompressor(level=10).stream_writer(archivo, closefd=False)
+            destino = comprimido
+        else:
+            comprimido = None
+            destino = archivo
+
+        f_texto = io.TextIOWrapper(destino, encoding='utf-8', write_through=True)
+        completo = False
+        try:
+            _escribir_documento(f_texto, campos, partes_texto, campo_texto, campos_posteriores)
+            f_texto.flush()
+            completo = True
+        finally:
+            # Soltar el wrapper sin cerrar el archivo subyacente
+            f_texto.detach()
+            if comprimido is not None:
+                comprimido.close()
+            archivo.flush()
+            if not completo:
+                # Descartar el registro parcial para que el siguiente documento empiece en una línea limpia
+                archivo.truncate(offset)
+                archivo.seek(offset)
+
+        return {
+            'shard': self.nombre_shard_actual,
+            'offset': offset,
+            'longitud': archivo.tell() - offset
+        }
+
+    def cerrar(self):
+        """Cierra el shard abierto"""
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
+
+
+def guardar_indice_shards(carpeta: str, indice: Dict) -> None:
+    """
+    Guarda el índice de shards (id → shard, offset, longitud) de forma atómica
+
+    Args:
+        carpeta: Carpeta de los shards
+        indice: Diccionario id → ubicación
+    """
+    ruta = os.path.join(carpeta, NOMBRE_INDICE)
+    tmp = ruta + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, ruta)
+
+
+def clave_documento(doc: Dict) -> Optional[str]:
+    """
+    Clave de un documento en el índice de shards: el nombre del PDF sin extensión
+    (ID_Corporacion_GacetaNUMERO_AÑO), armado con sus metadatos. El id solo no
+    sirve: es el consecutivo del nombre y se repite entre cosechas.
+    """
+    campos = [doc.get(campo) for campo in ('id', 'corporacion', 'numeroGaceta', 'año')]
+    if any(valor is None or valor == '' for valor in campos):
+        return None
+    id_gaceta, corporacion, numero, año = campos
+    return f"{id_gaceta}_{corporacion}_Gaceta{numero}_{año}"
+
+
+def ubicaciones_vigentes(indice: Dict) -> Dict[str, str]:
+    """
+    Shard vigente de cada documento según el índice (clave del documento → nombre del shard).
+    Una gaceta reprocesada se agrega a un shard nuevo y la copia anterior queda en
+    el shard viejo; el índice solo apunta a la última.
+    """
+    return {str(clave): os.path.basename(ubicacion['shard'])
+            for clave, ubicacion in indice.items()
+            if isinstance(ubicacion, dict) and ubicacion.get('shard')}
+
+
+def cargar_ubicaciones_vigentes(carpeta: str) -> Optional[Dict[str, str]]:
+    """Lee el índice de shards de la carpeta (None si no existe o no se puede leer)"""
+    ruta = os.path.join(carpeta, NOMBRE_INDICE)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return ubicaciones_vigentes(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer {ruta}: {e}")
+        return None
+
+
+def _abrir_lectura(stream, nombre: str):
+    """Envuelve un stream binario con el descompresor que corresponde a la extensión"""
+    nombre = nombre.lower()
+    if nombre.endswith('.gz'):
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if nombre.endswith('.zst'):
+        zstd = _importar_zstd()
+        return zstd.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+    return stream
+
+
+def iterar_shard_jsonl(fuente, nombre: str = None, vigentes: Dict[str, str] = None) -> Iterator[Dict]:
+    """
+    Lee los documentos de un shard JSONL (.jsonl, .jsonl.gz o .jsonl.zst) en streaming
+
+    Args:
+        fuente: Ruta del shard o stream binario (ej: miembro de un ZIP)
+        nombre: Nombre del shard (requerido si fuente es un stream, define la compresión)
+        vigentes: clave → shard vigente (ver ubicaciones_vigentes); se omiten las copias
+            de un documento que el índice ubica en otro shard
+
+    Returns:
+        Iterador de documentos
+    """
+    if isinstance(fuente, str):
+        nombre = nombre or fuente
+        with open(fuente, 'rb') as f:
+            yield from iterar_shard_jsonl(f, nombre, vigentes)
+        return
+
+    nombre_shard = os.path.basename(nombre or '')
+
+    lector = io.TextIOWrapper(_abrir_lectura(fuente, nombre or ''), encoding='utf-8')
+    for num_linea, linea in enumerate(lector, 1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            doc = json.loads(linea)
+        except json.JSONDecodeError as e:
+            print(f"Error en línea {num_linea} del shard {nombre}: {e}")
+            continue
+        if not isinstance(doc, dict) or not doc:
+            continue
+        if vigentes and vigentes.get(clave_documento(doc), nombre_shard) != nombre_shard:
+            continue
+        yield doc
+
+
+def leer_documento_shard(carpeta: str, ubicacion: Dict) -> Dict:
+    """
+    Lee un único documento usando su ubicación del índice de shards
+
+    Args:
+        carpeta: Carpeta de los shards
+        ubicacion: Diccionario con shard, offset y longitud
+
+    Returns:
+        Documento leído
+    """
+    with open(os.path.join(carpeta, ubicacion['shard']), 'rb') as f:
+        f.seek(ubicacion['offset'])
+        datos = f.read(ubicacion['longitud'])
+    return next(iterar_shard_jsonl(io.BytesIO(datos), ubicacion['shard']))
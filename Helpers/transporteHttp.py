@@ -0,0 +1,202 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+
+# Respuestas que indican sobrecarga o falla transitoria del servidor
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class LimitadorAdaptativo:
+    """
+    Limitador de tasa por host (token bucket) que se adapta a la salud del servidor.
+
+    Cada host tiene su propia tasa de solicitudes por segundo: se reduce a la mitad
+    cuando el servidor responde 429/5xx y sube de a poco mientras las respuestas
+    son exitosas (aumento aditivo, disminución multiplicativa).
+    """
+
+    def __init__(self, tasa_inicial: float = 5.0, tasa_minima: float = 0.5,
+                 tasa_maxima: float = 20.0, incremento: float = 0.25, rafaga: int = 4):
+        """
+        Inicializa el limitador
+
+        Args:
+            tasa_inicial: Solicitudes por segundo al empezar con un host
+            tasa_minima: Tasa mínima a la que se puede bajar
+            tasa_maxima: Tasa máxima a la que se puede subir
+            incremento: Solicitudes/segundo que se suman por cada respuesta exitosa
+            rafaga: Máximo de tokens acumulados (solicitudes seguidas sin esperar)
+        """
+        self.tasa_inicial = tasa_inicial
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima
+        self.incremento = incremento
+        self.rafaga = rafaga
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _estado_host(self, host: str) -> Dict:
+        estado = self._hosts.get(host)
+        if estado is None:
+            estado = {'tasa': self.tasa_inicial, 'tokens': float(self.rafaga),
+                      'ultimo': time.monotonic(), 'pausa_hasta': 0.0}
+            self._hosts[host] = estado
+        return estado
+
+    def adquirir(self, host: str):
+        """Bloquea hasta que haya un token disponible para el host"""
+        while True:
+            with self._lock:
+                estado = self._estado_host(host)
+                ahora = time.monotonic()
+                if ahora < estado['pausa_hasta']:
+                    espera = estado['pausa_hasta'] - ahora
+                else:
+                    transcurrido = ahora - estado['ultimo']
+                    estado['tokens'] = min(self.rafaga, estado['tokens'] + transcurrido * estado['tasa'])
+                    estado['ultimo'] = ahora
+                    if estado['tokens'] >= 1:
+                        estado['tokens'] -= 1
+                        return
+                    espera = (1 - estado['tokens']) / estado['tasa']
+            time.sleep(espera)
+
+    def reportar(self, host: str, exitoso: bool, pausa: float = 0.0):
+        """
+        Ajusta la tasa del host según el resultado de una solicitud
+
+        Args:
+            host: Host de la solicitud
+            exitoso: False si el servidor respondió 429/5xx o falló la conexión
+            pausa: Segundos sin enviar solicitudes al host (ej: Retry-After)
+        """
+        with self._lock:
+            estado = self._estado_host(host)
+            if exitoso:
+                estado['tasa'] = min(self.tasa_maxima, estado['tasa'] + self.incremento)
+            else:
+                estado['tasa'] = max(self.tasa_minima, estado['tasa'] / 2)
+                estado['tokens'] = min(estado['tokens'], 0.0)
+            if pausa > 0:
+                estado['pausa_hasta'] = max(estado['pausa_hasta'], time.monotonic() + pausa)
+
+    def tasas(self) -> Dict[str, float]:
+        """Tasa actual (solicitudes/segundo) de cada host"""
+        with self._lock:
+            return {host: round(estado['tasa'], 2) for host, estado in self._hosts.items()}
+
+
+class SinLimite:
+    """
+    Limitador que no limita: misma interfaz que LimitadorAdaptativo para medir el
+    rastreo y las descargas sin la tasa por host (ej: contra un servidor local)
+    """
+
+    def adquirir(self, host: str):
+        pass
+
+    def reportar(self, host: str, exitoso: bool, pausa: float = 0.0):
+        pass
+
+    def tasas(self) -> Dict[str, float]:
+        return {}
+
+
+def segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """
+    Interpreta la cabecera Retry-After (segundos o fecha HTTP)
+
+    Args:
+        valor: Valor de la cabecera
+
+    Returns:
+        Segundos a esperar, o None si no hay cabecera o no es válida
+    """
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+class SesionReintentos(requests.Session):
+    """
+    Sesión de requests con reintentos y limitación de tasa por host.
+
+    Las fallas de conexión, timeouts y respuestas 429/5xx se reintentan con
+    espera exponencial con jitter (o el tiempo que indique Retry-After), y
+    cada solicitud pasa antes por el limitador adaptativo del host.
+    """
+
+    def __init__(self, max_reintentos: int = 4, espera_base: float = 0.5,
+                 espera_maxima: float = 60.0, limitador: LimitadorAdaptativo = None):
+        """
+        Inicializa la sesión
+
+        Args:
+            max_reintentos: Reintentos por solicitud después del primer intento
+            espera_base: Espera del primer reintento en segundos (se duplica en cada intento)
+            espera_maxima: Espera máxima entre intentos, también acota Retry-After
+            limitador: Limitador de tasa por host (default: uno nuevo con valores por defecto)
+        """
+        super().__init__()
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.limitador = limitador if limitador is not None else LimitadorAdaptativo()
+        self.reintentos = 0
+        self._lock_reintentos = threading.Lock()
+
+    def _espera(self, intento: int, retry_after: Optional[float]) -> float:
+        """Espera antes del siguiente intento: Retry-After, o exponencial con jitter completo"""
+        if retry_after is not None:
+            return min(self.espera_maxima, retry_after)
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * (2 ** intento)))
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).netloc.lower()
+        intento = 0
+        while True:
+            self.limitador.adquirir(host)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.limitador.reportar(host, exitoso=False)
+                if intento >= self.max_reintentos:
+                    raise
+                espera = self._espera(intento, None)
+                print(f"Reintento {intento + 1}/{self.max_reintentos} de {url} en {espera:.1f}s: {e}")
+            else:
+                if response.status_code not in ESTADOS_REINTENTABLES:
+                    self.limitador.reportar(host, exitoso=True)
+                    return response
+
+                retry_after = segundos_retry_after(response.headers.get('Retry-After'))
+                espera = self._espera(intento, retry_after)
+                self.limitador.reportar(host, exitoso=False,
+                                        pausa=espera if retry_after is not None else 0.0)
+                if intento >= self.max_reintentos:
+                    return response
+                # Liberar la conexión antes de reintentar (importante con stream=True)
+                response.close()
+                print(f"Reintento {intento + 1}/{self.max_reintentos} de {url} en {espera:.1f}s: "
+                      f"HTTP {response.status_code}")
+
+            with self._lock_reintentos:
+                self.reintentos += 1
+            time.sleep(espera)
+            intento += 1
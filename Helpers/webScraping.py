@@ -1,27 +1,226 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import etree
+import io
 import json
-from urllib.parse import urljoin
+import logging
+import posixpath
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 import os
-from typing import List, Dict
+import time
+import hashlib
+from typing import List, Dict, Tuple
+from werkzeug.utils import secure_filename
 from Helpers import Funciones
+from Helpers.cacheHttp import CacheHttp, copiar_archivo
+from Helpers.estadoRastreo import EstadoRastreo, EstadoRastreoOcupado
+from Helpers.transporteHttp import SesionReintentos, LimitadorAdaptativo
+
+
+logger = logging.getLogger(__name__)
+
+# Clase del div que contiene los links de los listados
+_CLASE_CONTENEDOR = 'containerblanco'
+
+
+def _es_contenedor(elemento) -> bool:
+    """Indica si el elemento es un div cuya clase incluye 'containerblanco' (como soup.find(class_=...))"""
+    return elemento.tag == 'div' and _CLASE_CONTENEDOR in (elemento.get('class') or '').split()
 
 
 class WebScraping:
     """Clase para realizar web scraping y extracción de enlaces"""
     
-    def __init__(self, dominio_base: str = "https://www.minsalud.gov.co/Normativa/"):
+    def __init__(self, dominio_base: str = "https://www.minsalud.gov.co/Normativa/",
+                 max_workers: int = 4, max_por_host: int = 4, cache_http: CacheHttp = None,
+                 max_reintentos: int = 4, limitador: LimitadorAdaptativo = None):
         """
         Inicializa la clase WebScraping
         
         Args:
             dominio_base: Dominio base para validar enlaces
+            max_workers: Páginas que se descargan en paralelo durante el rastreo
+            max_por_host: Máximo de solicitudes simultáneas a un mismo host
+            cache_http: Cache HTTP para enviar GET condicionales (None: sin cache)
+            max_reintentos: Reintentos ante fallas de conexión y respuestas 429/5xx
+            limitador: Limitador de tasa por host (default: LimitadorAdaptativo con sus valores por defecto)
         """
         self.dominio_base = dominio_base
-        self.session = requests.Session()
+        self.cache_http = cache_http
+        self.max_workers = max(1, max_workers)
+        self.max_por_host = max(1, max_por_host)
+        # Reintentos con backoff y limitación de tasa adaptativa por host
+        self.session = SesionReintentos(max_reintentos=max_reintentos, limitador=limitador)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self._tamaño_pool = 0
+        self._montar_adapter(self.max_workers)
+        self._semaforos_host = {}
+        self._lock_hosts = threading.Lock()
+    
+    def _montar_adapter(self, tamaño_pool: int):
+        """Monta un pool de conexiones compartido por todos los workers con tamaño_pool conexiones por host"""
+        if tamaño_pool <= self._tamaño_pool:
+            return
+        adapter = HTTPAdapter(pool_connections=tamaño_pool, pool_maxsize=tamaño_pool)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._tamaño_pool = tamaño_pool
+    
+    @staticmethod
+    def canonicalizar_url(url: str) -> str:
+        """
+        Normaliza una URL para detectar duplicados: esquema y host en minúsculas,
+        sin puerto por defecto, sin fragmento, ruta sin segmentos '.'/'..' y
+        parámetros de consulta ordenados
+        
+        Args:
+            url: URL absoluta
+        
+        Returns:
+            URL canónica
+        """
+        partes = urlsplit(url.strip())
+        esquema = partes.scheme.lower()
+        host = (partes.hostname or '').lower()
+        if partes.port and not ((esquema == 'http' and partes.port == 80) or
+                                (esquema == 'https' and partes.port == 443)):
+            host = f"{host}:{partes.port}"
+        
+        ruta = partes.path or '/'
+        if ruta != '/':
+            final_barra = ruta.endswith('/')
+            ruta = posixpath.normpath(ruta)
+            if final_barra and not ruta.endswith('/'):
+                ruta += '/'
+        
+        consulta = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+        return urlunsplit((esquema, host, ruta, consulta, ''))
+    
+    def _semaforo_host(self, url: str) -> threading.Semaphore:
+        """Semáforo que limita las solicitudes simultáneas al host de la URL"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock_hosts:
+            if host not in self._semaforos_host:
+                self._semaforos_host[host] = threading.Semaphore(self.max_por_host)
+            return self._semaforos_host[host]
+    
+    def _obtener_contenido(self, url: str, timeout: int = 30) -> bytes:
+        """
+        GET de una página, condicional si hay cache HTTP: con 304 se usa el cuerpo guardado
+        
+        Args:
+            url: URL de la página
+            timeout: Tiempo máximo de la solicitud en segundos
+        
+        Returns:
+            Contenido de la respuesta
+        """
+        if self.cache_http is None:
+            response = self.session.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+        
+        response = self.session.get(url, timeout=timeout,
+                                    headers=self.cache_http.cabeceras_condicionales(url))
+        if response.status_code == 304:
+            contenido = self.cache_http.leer_cuerpo(url)
+            if contenido is not None:
+                return contenido
+            # El cuerpo fue expulsado entre la consulta y la respuesta: pedirlo completo
+            response = self.session.get(url, timeout=timeout)
+        response.raise_for_status()
+        self.cache_http.guardar(url, response.headers, response.content)
+        return response.content
+    
+    def _extract_links_limitado(self, url: str, listado_extensiones: List[str]) -> List[Dict]:
+        """_extraer_links_pagina respetando el límite de concurrencia por host (propaga los errores)"""
+        with self._semaforo_host(url):
+            return self._extraer_links_pagina(url, listado_extensiones)
+    
+    def _extraer_links_pagina(self, url: str, listado_extensiones: List[str]) -> List[Dict]:
+        """Descarga una página y extrae sus links; las fallas se propagan como excepción"""
+        contenido = self._obtener_contenido(url, timeout=30)
+        links = self.extraer_links_html(contenido, url, listado_extensiones)
+        logger.info("%d links encontrados en %s", len(links), url)
+        return links
+    
+    @staticmethod
+    def sufijos_extensiones(listado_extensiones: List[str]) -> Dict[str, str]:
+        """
+        Mapa sufijo ('.pdf') → tipo ('pdf') calculado una sola vez por listado de extensiones,
+        en el orden del listado (la primera extensión que coincide define el tipo)
+        """
+        return {f".{ext.lower().strip()}": ext.lower().strip() for ext in listado_extensiones if ext.strip()}
+    
+    @staticmethod
+    def _contenedor_html(contenido: bytes):
+        """
+        Primer div containerblanco de la página. El HTML se parsea en streaming: los
+        elementos anteriores se descartan y la lectura termina al cerrar el contenedor,
+        sin armar el árbol del resto del documento.
+        """
+        contenedor = None
+        for evento, elemento in etree.iterparse(io.BytesIO(contenido), events=('start', 'end'), tag='div',
+                                                html=True, recover=True):
+            if evento == 'start':
+                if contenedor is None and _es_contenedor(elemento):
+                    contenedor = elemento
+            elif elemento is contenedor:
+                return contenedor
+            elif contenedor is None:
+                elemento.clear()
+        # Documento truncado: el contenedor quedó abierto, se usa lo que se alcanzó a leer
+        return contenedor
+    
+    @staticmethod
+    def extraer_links_html(contenido: bytes, url_base: str, listado_extensiones: List[str]) -> List[Dict]:
+        """
+        Extrae los links del div 'containerblanco' de una página HTML ya descargada
+        
+        Solo se arma el subárbol del contenedor (ver _contenedor_html) y cada link se
+        descarta con una sola comparación contra todos los sufijos.
+        
+        Args:
+            contenido: HTML de la página
+            url_base: URL de la página (para resolver links relativos)
+            listado_extensiones: Lista de extensiones a filtrar (ej: ['pdf', 'aspx'])
+        
+        Returns:
+            Lista de diccionarios con 'url' y 'type' de cada enlace encontrado
+        """
+        sufijos = WebScraping.sufijos_extensiones(listado_extensiones)
+        if not contenido or not contenido.strip():
+            return []
+        
+        contenedor = WebScraping._contenedor_html(contenido)
+        if contenedor is None:
+            logger.debug("La página %s no tiene div containerblanco", url_base)
+            return []
+        
+        todos_los_sufijos = tuple(sufijos)
+        links = []
+        for href in contenedor.xpath('.//a/@href'):
+            href = href.strip()
+            if not href:
+                continue
+            full_url = urljoin(url_base, href)
+            # endswith como antes: incluye extensiones con varios puntos (ej: 'tar.gz')
+            url_minuscula = full_url.lower()
+            if not url_minuscula.endswith(todos_los_sufijos):
+                logger.debug("Link %s no coincide con las extensiones %s", full_url, list(sufijos.values()))
+                continue
+            tipo = next(t for sufijo, t in sufijos.items() if url_minuscula.endswith(sufijo))
+            logger.debug("Agregando link: %s de tipo [%s]", full_url, tipo)
+            links.append({
+                'url': full_url,
+                'type': tipo
+            })
+        return links
     
     def extract_links(self, url: str, listado_extensiones: List[str] = None) -> List[Dict]:
         """
@@ -34,38 +233,11 @@ class WebScraping:
         Returns:
             Lista de diccionarios con 'url' y 'type' de cada enlace encontrado
         """
-        print(f"Extrayendo links de: {url}")
         if listado_extensiones is None:
             listado_extensiones = ['pdf', 'aspx']
         
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            container_div = soup.find('div', class_='containerblanco')
-            #print(f"Encontrado div containerblanco: {container_div is not None}")
-            links = []
-            if container_div:
-                for link in container_div.find_all('a'):
-                    href = link.get('href')
-                    if href:
-                        #print(f"Encontrado link: {href}")
-                        full_url = urljoin(url, href)
-                        # Verificar extensión
-                        for ext in listado_extensiones:
-                            ext_lower = ext.lower().strip()
-                            if full_url.lower().endswith(f'.{ext_lower}'):
-                                print(f"Agregando link: {full_url} de tipo [{ext_lower}]")
-                                links.append({
-                                    'url': full_url,
-                                    'type': ext_lower
-                                })
-                                break  # Solo agregar una vez
-                            else:
-                                print(f"Link {full_url} NO coincide con la extensión {ext_lower}")
-            
-            return links
+            return self._extraer_links_pagina(url, listado_extensiones)
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching {url}: {e}")
@@ -76,15 +248,42 @@ class WebScraping:
     
     def extraer_todos_los_links(self, url_inicial: str, json_file_path: str, 
                                 listado_extensiones: List[str] = None,
-                                max_iteraciones: int = 100) -> Dict:
+                                max_iteraciones: int = 100,
+                                max_workers: int = None,
+                                reanudar: bool = False,
+                                intervalo_checkpoint: int = 10,
+                                ruta_estado: str = None,
+                                max_intentos_pagina: int = 3,
+                                max_antiguedad_estado: float = 24 * 3600) -> Dict:
         """
         Extrae todos los links de forma recursiva desde una URL inicial
         
+        Las páginas ASPX se visitan en paralelo con max_workers hilos que comparten
+        la sesión (y su pool de conexiones), sin superar max_por_host solicitudes
+        simultáneas por host. Los duplicados se detectan por URL canónica.
+        
+        El estado del rastreo (links, páginas visitadas y frontera) se guarda cada
+        intervalo_checkpoint páginas en una ruta estable para la URL inicial (ver
+        EstadoRastreo.ruta_para), independiente de la carpeta del JSON; si el rastreo
+        se interrumpe, la siguiente ejecución con reanudar continúa desde ese punto
+        (si el estado no supera max_antiguedad_estado). Al vaciarse la frontera el
+        estado se elimina y el resultado queda en el JSON. Si otro rastreo de la
+        misma URL tiene el estado abierto, este corre sin estado.
+        
+        Una página que falla vuelve al final de la frontera hasta max_intentos_pagina
+        veces (los intentos se cuentan también entre ejecuciones).
+        
         Args:
             url_inicial: URL inicial para comenzar la extracción
             json_file_path: Ruta del archivo JSON para guardar/cargar links
             listado_extensiones: Lista de extensiones a filtrar
-            max_iteraciones: Número máximo de iteraciones para evitar loops infinitos
+            max_iteraciones: Número máximo de páginas visitadas para evitar loops infinitos
+            max_workers: Páginas visitadas en paralelo (default: el del constructor)
+            reanudar: Guardar checkpoints y retomar un rastreo interrumpido (solo si se pide)
+            intervalo_checkpoint: Páginas procesadas entre checkpoints
+            ruta_estado: Archivo del estado (default: según la URL inicial y las extensiones)
+            max_intentos_pagina: Intentos fallidos antes de abandonar una página
+            max_antiguedad_estado: Segundos tras los que un estado guardado se descarta (None: sin límite)
             
         Returns:
             Diccionario con el resultado de la extracción
@@ -92,55 +291,145 @@ class WebScraping:
         if listado_extensiones is None:
             listado_extensiones = ['pdf', 'aspx']
         
-        # Cargar links existentes del archivo JSON
-        all_links = self._cargar_links_desde_json(json_file_path)
-        
-        # Si no hay links, extraer de la URL inicial
-        if not all_links:
-            print(f"Extrayendo links de la URL inicial: {url_inicial}")
-            all_links = self.extract_links(url_inicial, listado_extensiones)
-        
-        # Filtrar links para que solo estén en el dominio especificado
-        # all_links = [link for link in all_links if link['url'].startswith(self.dominio_base)]
-        
-        # Obtener links ASPX para visitar
-        aspx_links_to_visit = [
-            link['url'] for link in all_links 
-            if link['type'] == 'aspx' and link['url'].startswith(self.dominio_base)
-        ]
-        
-        visited_aspx_links = set()
-        iteraciones = 0
+        if max_workers is None:
+            max_workers = self.max_workers
         
-        # Recorrer links ASPX
-        while aspx_links_to_visit and iteraciones < max_iteraciones:
-            iteraciones += 1
-            current_aspx_url = aspx_links_to_visit.pop(0)
-            
-            if current_aspx_url not in visited_aspx_links:
-                visited_aspx_links.add(current_aspx_url)
-                print(f"Iteración {iteraciones}: Visitando: {current_aspx_url}")
+        estado = None
+        if reanudar:
+            try:
+                estado = EstadoRastreo(ruta_estado or EstadoRastreo.ruta_para(self.canonicalizar_url(url_inicial),
+                                                                              listado_extensiones),
+                                       max_antiguedad=max_antiguedad_estado)
+            except EstadoRastreoOcupado as e:
+                print(f"{e}: el rastreo de {url_inicial} continúa sin guardar estado")
+        # Intentos fallidos por página de la frontera
+        intentos_fallidos = {}
+        paginas_fallidas = []
+        try:
+            if estado is not None and estado.tiene_datos():
+                # Retomar desde el último checkpoint
+                all_links, visited_aspx_links, pendientes, intentos_fallidos = estado.cargar(max_intentos_pagina)
+                print(f"Reanudando rastreo: {len(all_links)} links, {len(visited_aspx_links)} páginas "
+                      f"visitadas, {len(pendientes)} pendientes")
+                urls_conocidas = {link['url'] for link in all_links}
+                aspx_links_to_visit = deque(pendientes)
+            else:
+                # Cargar links existentes del archivo JSON
+                all_links = self._cargar_links_desde_json(json_file_path)
+                
+                # Si no hay links, extraer de la URL inicial
+                if not all_links:
+                    print(f"Extrayendo links de la URL inicial: {url_inicial}")
+                    all_links = self.extract_links(url_inicial, listado_extensiones)
                 
-                new_links = self.extract_links(current_aspx_url, listado_extensiones)
+                # Filtrar links para que solo estén en el dominio especificado
+                # all_links = [link for link in all_links if link['url'].startswith(self.dominio_base)]
                 
-                for link in new_links:
-                    # Verificar si el link no está ya en la lista
-                    if not any(existing_link['url'] == link['url'] for existing_link in all_links):
-                        all_links.append(link)
+                # Índice de URLs canónicas ya conocidas (evita la búsqueda lineal en all_links)
+                urls_conocidas = set()
+                links_unicos = []
+                for link in all_links:
+                    canonica = self.canonicalizar_url(link['url'])
+                    if canonica not in urls_conocidas:
+                        urls_conocidas.add(canonica)
+                        links_unicos.append({**link, 'url': canonica})
+                all_links = links_unicos
+                
+                # Frontera de links ASPX por visitar
+                aspx_links_to_visit = deque(
+                    link['url'] for link in all_links 
+                    if link['type'] == 'aspx' and link['url'].startswith(self.dominio_base)
+                )
+                visited_aspx_links = set()
+                
+                if estado is not None:
+                    estado.agregar_links(all_links)
+                    estado.agregar_frontera(aspx_links_to_visit)
+                    estado.checkpoint()
+            
+            iteraciones = 0
+            procesadas_desde_checkpoint = 0
+            
+            # Recorrer links ASPX con varios workers
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                en_curso = {}
+                while aspx_links_to_visit or en_curso:
+                    # Mantener los workers ocupados mientras haya frontera y presupuesto de iteraciones
+                    while aspx_links_to_visit and len(en_curso) < max_workers and iteraciones < max_iteraciones:
+                        current_aspx_url = aspx_links_to_visit.popleft()
+                        if current_aspx_url in visited_aspx_links:
+                            continue
+                        visited_aspx_links.add(current_aspx_url)
+                        iteraciones += 1
+                        print(f"Iteración {iteraciones}: Visitando: {current_aspx_url}")
+                        futuro = executor.submit(self._extract_links_limitado, current_aspx_url, listado_extensiones)
+                        en_curso[futuro] = current_aspx_url
+                    
+                    if not en_curso:
+                        break
+                    
+                    terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                    for futuro in terminados:
+                        url_visitada = en_curso.pop(futuro)
+                        try:
+                            new_links = futuro.result()
+                        except Exception as e:
+                            # La página no cuenta como visitada: vuelve a la frontera para reintentarla
+                            intentos = intentos_fallidos.get(url_visitada, 0) + 1
+                            intentos_fallidos[url_visitada] = intentos
+                            if estado is not None:
+                                estado.registrar_fallo(url_visitada)
+                            visited_aspx_links.discard(url_visitada)
+                            if intentos < max_intentos_pagina:
+                                print(f"Error procesando {url_visitada} (intento {intentos}): {e}")
+                                aspx_links_to_visit.append(url_visitada)
+                            else:
+                                print(f"Error procesando {url_visitada}, se abandona tras {intentos} intentos: {e}")
+                                paginas_fallidas.append(url_visitada)
+                            continue
                         
-                        # Si es ASPX, agregarlo a la cola de visitas
-                        if link['type'] == 'aspx' and link['url'] not in visited_aspx_links:
-                            aspx_links_to_visit.append(link['url'])
-        
-        if iteraciones >= max_iteraciones:
-            print(f"Advertencia: Se alcanzó el máximo de {max_iteraciones} iteraciones")
-        
-        # Filtrar nuevamente para asegurar que todos están en el dominio
-        #all_links = [link for link in all_links if link['url'].startswith(self.dominio_base)]
-        
-        # Guardar en JSON
-        json_output = {"links": all_links}
-        self._guardar_links_en_json(json_file_path, json_output)
+                        links_nuevos = []
+                        paginas_nuevas = []
+                        for link in new_links:
+                            canonica = self.canonicalizar_url(link['url'])
+                            if canonica in urls_conocidas:
+                                continue
+                            urls_conocidas.add(canonica)
+                            links_nuevos.append({**link, 'url': canonica})
+                            
+                            # Si es ASPX, agregarlo a la frontera
+                            if link['type'] == 'aspx' and canonica not in visited_aspx_links:
+                                paginas_nuevas.append(canonica)
+                        all_links.extend(links_nuevos)
+                        aspx_links_to_visit.extend(paginas_nuevas)
+                        
+                        if estado is not None:
+                            estado.registrar_pagina(url_visitada, links_nuevos, paginas_nuevas)
+                            procesadas_desde_checkpoint += 1
+                            if procesadas_desde_checkpoint >= intervalo_checkpoint:
+                                estado.checkpoint()
+                                procesadas_desde_checkpoint = 0
+            
+            if iteraciones >= max_iteraciones:
+                print(f"Advertencia: Se alcanzó el máximo de {max_iteraciones} iteraciones")
+            
+            # Filtrar nuevamente para asegurar que todos están en el dominio
+            #all_links = [link for link in all_links if link['url'].startswith(self.dominio_base)]
+            
+            # Guardar en JSON
+            json_output = {"links": all_links}
+            self._guardar_links_en_json(json_file_path, json_output)
+            
+            if estado is not None:
+                if aspx_links_to_visit:
+                    # Quedan páginas pendientes: conservar el estado para continuar luego
+                    print(f"Estado del rastreo guardado: {len(aspx_links_to_visit)} páginas pendientes")
+                    estado.cerrar()
+                else:
+                    estado.compactar()
+        finally:
+            if estado is not None:
+                estado.cerrar()
         
         print(f"Finalizado: Se encontraron {len(all_links)} links en total")
         
@@ -148,7 +437,8 @@ class WebScraping:
             'success': True,
             'total_links': len(all_links),
             'links': all_links,
-            'iteraciones': iteraciones
+            'iteraciones': iteraciones,
+            'paginas_fallidas': paginas_fallidas
         }
     
     def _cargar_links_desde_json(self, json_file_path: str) -> List[Dict]:
@@ -179,16 +469,156 @@ class WebScraping:
         except Exception as e:
             print(f"Error al guardar JSON: {e}")
     
-    def descargar_pdfs(self, json_file_path: str, carpeta_destino: str = "static/uploads") -> Dict:
+    @staticmethod
+    def _nombres_archivos_pdf(pdf_links: List[Dict]) -> List[str]:
+        """Nombres de archivo seguros y únicos para cada link PDF"""
+        nombres = []
+        usados = set()
+        for i, link in enumerate(pdf_links, 1):
+            # Obtener nombre del archivo desde la URL
+            nombre_archivo = os.path.basename(link['url'].split('?')[0])  # Remover query params
+            
+            # Si no tiene extensión .pdf, agregarla
+            if not nombre_archivo.lower().endswith('.pdf'):
+                nombre_archivo += '.pdf'
+            
+            # Limpiar nombre de archivo (remover caracteres especiales)
+            nombre_archivo = secure_filename(nombre_archivo)
+            
+            # Si el nombre está vacío, generar uno
+            if not nombre_archivo or nombre_archivo == '.pdf':
+                nombre_archivo = f"archivo_{i}.pdf"
+            
+            # Dos URLs con el mismo nombre no deben escribir el mismo archivo
+            if nombre_archivo.lower() in usados:
+                base, ext = os.path.splitext(nombre_archivo)
+                nombre_archivo = f"{base}_{i}{ext}"
+            usados.add(nombre_archivo.lower())
+            nombres.append(nombre_archivo)
+        return nombres
+    
+    @staticmethod
+    def _sumar_bytes(estado: Dict, cantidad: int):
+        """Suma bytes al total de la descarga y falla si se supera la cuota"""
+        with estado['lock']:
+            estado['bytes'] += cantidad
+            excedida = (estado['cuota_bytes'] is not None and
+                        estado['bytes'] > estado['cuota_bytes'])
+        if excedida or estado['cuota_excedida'].is_set():
+            estado['cuota_excedida'].set()
+            raise IOError(f"Se superó la cuota de disco de {estado['cuota_bytes']} bytes")
+    
+    def _descargar_archivo(self, url: str, ruta_archivo: str, estado: Dict,
+                           tamaño_buffer: int, condicional: bool = True) -> Tuple[int, str]:
+        """
+        Descarga un archivo a un temporal y lo renombra al terminar, así nunca
+        queda un PDF a medio escribir con el nombre final. Con cache HTTP la
+        solicitud es condicional y un 304 toma el archivo del almacén del cache.
+        
+        Args:
+            url: URL del archivo
+            ruta_archivo: Ruta final del archivo
+            estado: Estado compartido de la descarga (bytes, cuota, lock, evento de cuota)
+            tamaño_buffer: Bytes por bloque de lectura/escritura
+            condicional: Enviar GET condicional si hay entrada en el cache HTTP
+        
+        Returns:
+            Tupla (bytes descargados, SHA-256 del contenido); 0 bytes si el archivo
+            no cambió y se tomó del cache
+        """
+        if estado['cuota_excedida'].is_set():
+            raise IOError("Descarga cancelada: se superó la cuota de disco")
+        
+        ruta_tmp = f"{ruta_archivo}.part"
+        bytes_archivo = 0
+        cabeceras = {}
+        if self.cache_http is not None and condicional:
+            cabeceras = self.cache_http.cabeceras_condicionales(url)
+        try:
+            with self.session.get(url, stream=True, timeout=60, headers=cabeceras) as response:
+                if response.status_code == 304:
+                    ruta_cache = self.cache_http.ruta_cuerpo(url)
+                    if ruta_cache is not None:
+                        self._sumar_bytes(estado, os.path.getsize(ruta_cache))
+                        copiar_archivo(ruta_cache, ruta_tmp)
+                        os.replace(ruta_tmp, ruta_archivo)
+                        with estado['lock']:
+                            estado['no_modificados'] += 1
+                        # Los objetos del cache se guardan con su SHA-256 como nombre
+                        return 0, os.path.basename(ruta_cache)
+                    # El cuerpo fue expulsado del cache: pedirlo completo
+                    response.close()
+                    return self._descargar_archivo(url, ruta_archivo, estado, tamaño_buffer,
+                                                   condicional=False)
+                
+                response.raise_for_status()
+                sha256 = hashlib.sha256()
+                with open(ruta_tmp, 'wb', buffering=tamaño_buffer) as f:
+                    for chunk in response.iter_content(chunk_size=tamaño_buffer):
+                        if not chunk:
+                            continue
+                        self._sumar_bytes(estado, len(chunk))
+                        f.write(chunk)
+                        sha256.update(chunk)
+                        bytes_archivo += len(chunk)
+                
+                if self.cache_http is not None:
+                    self.cache_http.guardar_archivo(url, response.headers, ruta_tmp, sha256.hexdigest())
+            os.replace(ruta_tmp, ruta_archivo)
+            return bytes_archivo, sha256.hexdigest()
+        except BaseException:
+            if os.path.exists(ruta_tmp):
+                os.remove(ruta_tmp)
+            raise
+    
+    def _descargar_y_notificar(self, link: Dict, ruta_archivo: str, estado: Dict,
+                               tamaño_buffer: int, al_descargar) -> int:
+        """
+        Descarga un archivo y avisa a al_descargar desde el mismo hilo de descarga.
+        Si el contenido es igual al de un archivo ya descargado (mismo SHA-256) la
+        copia se elimina y no se notifica, así no se extrae ni indexa dos veces.
+        al_descargar recibe el link con la clave 'sha256' agregada.
+        """
+        bytes_archivo, sha256 = self._descargar_archivo(link['url'], ruta_archivo, estado, tamaño_buffer)
+        with estado['lock']:
+            canonico = estado['por_hash'].setdefault(sha256, ruta_archivo)
+            if canonico != ruta_archivo:
+                estado['duplicados'].append({
+                    'url': link['url'],
+                    'archivo': os.path.basename(ruta_archivo),
+                    'canonico': os.path.basename(canonico)
+                })
+        if canonico != ruta_archivo:
+            os.remove(ruta_archivo)
+            print(f"Duplicado: {os.path.basename(ruta_archivo)} = {os.path.basename(canonico)}")
+            return bytes_archivo
+        if al_descargar is not None:
+            al_descargar(ruta_archivo, dict(link, sha256=sha256))
+        return bytes_archivo
+    
+    def descargar_pdfs(self, json_file_path: str, carpeta_destino: str = "static/uploads",
+                       cuota_bytes: int = None, max_workers: int = None,
+                       tamaño_buffer: int = 1024 * 1024, al_descargar=None) -> Dict:
         """
         Recorre el archivo JSON y descarga los archivos PDF en la carpeta especificada
         
+        Las descargas corren en paralelo (max_workers en vuelo) sobre el pool de
+        conexiones de la sesión; cada archivo se escribe en un temporal .part que
+        se renombra al completarse.
+        
         Args:
             json_file_path: Ruta del archivo JSON con los links
             carpeta_destino: Carpeta donde se descargarán los PDFs (default: static/uploads)
+            cuota_bytes: Máximo de bytes a descargar; al superarlo se detiene la descarga
+            max_workers: Descargas simultáneas (default: el del constructor)
+            tamaño_buffer: Bytes por bloque de lectura/escritura (default: 1 MB)
+            al_descargar: Función (ruta_archivo, link) llamada al completar cada archivo,
+                desde el hilo que lo descargó; si bloquea, frena las descargas siguientes.
+                El link incluye el SHA-256 del contenido en la clave 'sha256'
             
         Returns:
-            Diccionario con el resultado de la descarga
+            Diccionario con el resultado de la descarga; 'descargados' cuenta solo
+            los archivos únicos y 'duplicados' las copias eliminadas
         """
         try:
             # Cargar links desde JSON
@@ -205,6 +635,10 @@ class WebScraping:
                     'errores': 0
                 }
             
+            if max_workers is None:
+                max_workers = self.max_workers
+            self._montar_adapter(max_workers)
+            
             # Crear carpeta de destino si no existe
             Funciones.crear_carpeta(carpeta_destino)
             
@@ -213,68 +647,88 @@ class WebScraping:
             Funciones.borrar_contenido_carpeta(carpeta_destino)
             
             # Descargar PDFs
-            descargados = 0
+            completados = 0
             errores = 0
             archivos_errores = []
+            estado = {
+                'bytes': 0,
+                'cuota_bytes': cuota_bytes,
+                'lock': threading.Lock(),
+                'cuota_excedida': threading.Event(),
+                'no_modificados': 0,
+                'por_hash': {},
+                'duplicados': []
+            }
+            bytes_descargados = 0
+            nombres = self._nombres_archivos_pdf(pdf_links)
             
-            print(f"Iniciando descarga de {len(pdf_links)} archivos PDF...")
+            print(f"Iniciando descarga de {len(pdf_links)} archivos PDF ({max_workers} en paralelo)...")
+            inicio = time.perf_counter()
+            reintentos_inicio = self.session.reintentos
             
-            for i, link in enumerate(pdf_links, 1):
-                pdf_url = link['url']
-                try:
-                    # Obtener nombre del archivo desde la URL
-                    nombre_archivo = os.path.basename(pdf_url.split('?')[0])  # Remover query params
-                    
-                    # Si no tiene extensión .pdf, agregarla
-                    if not nombre_archivo.lower().endswith('.pdf'):
-                        nombre_archivo += '.pdf'
-                    
-                    # Limpiar nombre de archivo (remover caracteres especiales)
-                    from werkzeug.utils import secure_filename
-                    nombre_archivo = secure_filename(nombre_archivo)
-                    
-                    # Si el nombre está vacío, generar uno
-                    if not nombre_archivo or nombre_archivo == '.pdf':
-                        nombre_archivo = f"archivo_{i}.pdf"
-                    
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futuros = {}
+                for i, (link, nombre_archivo) in enumerate(zip(pdf_links, nombres), 1):
                     ruta_archivo = os.path.join(carpeta_destino, nombre_archivo)
-                    
-                    # Descargar archivo
-                    print(f"Descargando [{i}/{len(pdf_links)}]: {nombre_archivo}")
-                    response = self.session.get(pdf_url, stream=True, timeout=60)
-                    response.raise_for_status()
-                    
-                    # Guardar archivo
-                    with open(ruta_archivo, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    descargados += 1
-                    
-                except Exception as e:
-                    errores += 1
-                    archivos_errores.append({
-                        'url': pdf_url,
-                        'error': str(e)
-                    })
-                    print(f"Error al descargar {pdf_url}: {e}")
+                    futuro = executor.submit(self._descargar_y_notificar, link, ruta_archivo,
+                                             estado, tamaño_buffer, al_descargar)
+                    futuros[futuro] = (i, link['url'], nombre_archivo)
+                
+                for futuro in futuros:
+                    i, pdf_url, nombre_archivo = futuros[futuro]
+                    try:
+                        bytes_descargados += futuro.result()
+                        completados += 1
+                        print(f"Descargado [{i}/{len(pdf_links)}]: {nombre_archivo}")
+                    except Exception as e:
+                        errores += 1
+                        archivos_errores.append({
+                            'url': pdf_url,
+                            'error': str(e)
+                        })
+                        print(f"Error al descargar {pdf_url}: {e}")
+            
+            # Las copias duplicadas se eliminaron: no cuentan como archivos descargados
+            duplicados = len(estado['duplicados'])
+            descargados = completados - duplicados
+            tiempo = time.perf_counter() - inicio
+            mb_por_segundo = round(bytes_descargados / (1024 * 1024) / tiempo, 2) if tiempo > 0 else 0.0
             
             resultado = {
                 'success': True,
                 'total': len(pdf_links),
                 'descargados': descargados,
                 'errores': errores,
-                'carpeta_destino': carpeta_destino
+                'carpeta_destino': carpeta_destino,
+                'bytes_descargados': bytes_descargados,
+                'tiempo_segundos': round(tiempo, 2),
+                'mb_por_segundo': mb_por_segundo,
+                'reintentos': self.session.reintentos - reintentos_inicio,
+                'duplicados': duplicados,
+                'tasa_duplicados': round(duplicados / completados, 4) if completados else 0.0
             }
+            if self.cache_http is not None:
+                resultado['no_modificados'] = estado['no_modificados']
             
             if archivos_errores:
                 resultado['archivos_con_error'] = archivos_errores
             
+            if estado['duplicados']:
+                resultado['archivos_duplicados'] = estado['duplicados']
+            
+            if estado['cuota_excedida'].is_set():
+                resultado['cuota_excedida'] = True
+                print(f"Advertencia: descarga detenida por cuota de disco ({cuota_bytes} bytes)")
+            
             print(f"\nDescarga completada:")
             print(f"  Total: {len(pdf_links)}")
             print(f"  Descargados: {descargados}")
             print(f"  Errores: {errores}")
+            print(f"  Duplicados por contenido: {duplicados} "
+                  f"({resultado['tasa_duplicados']:.1%})")
+            print(f"  Velocidad: {mb_por_segundo} MB/s ({round(tiempo, 2)}s)")
+            if self.cache_http is not None:
+                print(f"  Sin cambios (304): {estado['no_modificados']}")
             
             return resultado
             
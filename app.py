@@ -2,9 +2,9 @@
 from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash
 from dotenv import load_dotenv
 import os
-from datetime import datetime
 from werkzeug.utils import secure_filename
-from Helpers import MongoDB, ElasticSearch, Funciones, WebScraping
+from Helpers import MongoDB, ElasticSearch, Funciones, WebScraping, EspacioTrabajo, CacheHttp, PipelineCarga
+from Helpers.shardsJsonl import es_shard_jsonl
 
 # Cargar variables de entorno
 load_dotenv()
@@ -361,6 +361,8 @@ def cargar_doc_elastic():
 @app.route('/procesar-webscraping-elastic', methods=['POST'])
 def procesar_webscraping_elastic():
     """API para procesar Web Scraping"""
+    scraper = None
+    espacio = None
     try:
         if not session.get('logged_in'):
             return jsonify({'success': False, 'error': 'No autorizado'}), 401
@@ -387,12 +389,13 @@ def procesar_webscraping_elastic():
         todas_extensiones = lista_ext_navegar + lista_tipos_archivos
         
         # Inicializar WebScraping
-        scraper = WebScraping(dominio_base=url.rsplit('/', 1)[0] + '/')
+        # Con el cache HTTP un sitio sin cambios solo cuesta respuestas 304
+        scraper = WebScraping(dominio_base=url.rsplit('/', 1)[0] + '/', cache_http=CacheHttp.por_defecto())
         
-        # Limpiar carpeta de uploads
-        carpeta_upload = 'static/uploads'
-        Funciones.crear_carpeta(carpeta_upload)
-        Funciones.borrar_contenido_carpeta(carpeta_upload)
+        # Espacio de trabajo propio para esta carga (no interfiere con otras cargas)
+        EspacioTrabajo.limpiar_expirados()
+        espacio = EspacioTrabajo()
+        carpeta_upload = espacio.ruta
         
         # Extraer todos los enlaces
         json_path = os.path.join(carpeta_upload, 'links.json')
@@ -404,12 +407,38 @@ def procesar_webscraping_elastic():
         )
         
         if not resultado['success']:
+            espacio.limpiar()
             return jsonify({'success': False, 'error': 'Error al extraer enlaces'}), 500
         
-        # Descargar archivos PDF (o los tipos especificados)
-        resultado_descarga = scraper.descargar_pdfs(json_path, carpeta_upload)
+        if data.get('carga_directa'):
+            # Descarga, extracción e indexación por etapas: cada PDF se extrae e indexa
+            # apenas termina de descargarse, sin esperar al resto
+            try:
+                resultado_pipeline = PipelineCarga(elastic, index).descargar_y_cargar(
+                    scraper, json_path, carpeta_upload, cuota_bytes=espacio.bytes_disponibles())
+            finally:
+                espacio.limpiar()
+            
+            descarga = resultado_pipeline.get('descarga') or {}
+            return jsonify({
+                'success': descarga.get('success', True) and resultado_pipeline['success'],
+                'error': descarga.get('error') or resultado_pipeline.get('error'),
+                'indexados': resultado_pipeline['indexados'],
+                'errores': resultado_pipeline['fallidos'] + resultado_pipeline['errores_extraccion'],
+                'stats': {
+                    'total_enlaces': resultado['total_links'],
+                    'descargados': descarga.get('descargados', 0),
+                    'errores': descarga.get('errores', 0),
+                    'duplicados': descarga.get('duplicados', 0),
+                    'sin_texto': resultado_pipeline['sin_texto'],
+                    'sin_cambios': resultado_pipeline['sin_cambios'],
+                    'tiempo_segundos': resultado_pipeline['tiempo_segundos']
+                }
+            })
         
-        scraper.close()
+        # Descargar archivos PDF (o los tipos especificados)
+        resultado_descarga = scraper.descargar_pdfs(json_path, carpeta_upload,
+                                                    cuota_bytes=espacio.bytes_disponibles())
         
         # Listar archivos descargados
         archivos = Funciones.listar_archivos_carpeta(carpeta_upload, lista_tipos_archivos)
@@ -417,16 +446,24 @@ def procesar_webscraping_elastic():
         return jsonify({
             'success': True,
             'archivos': archivos,
+            'trabajo_id': espacio.id,
             'mensaje': f'Se descargaron {len(archivos)} archivos',
             'stats': {
                 'total_enlaces': resultado['total_links'],
                 'descargados': resultado_descarga.get('descargados', 0),
-                'errores': resultado_descarga.get('errores', 0)
+                'errores': resultado_descarga.get('errores', 0),
+                'duplicados': resultado_descarga.get('duplicados', 0)
             }
         })
         
     except Exception as e:
+        # Con error no se entrega trabajo_id: el espacio no se vuelve a usar
+        if espacio is not None:
+            espacio.limpiar()
         return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        if scraper is not None:
+            scraper.close()
 
    
 # Archivo: app.py
@@ -436,6 +473,7 @@ def procesar_webscraping_elastic():
 @app.route('/procesar-zip-elastic', methods=['POST'])
 def procesar_zip_elastic():
     """API para procesar archivo ZIP con archivos JSON (Búsqueda Recursiva)"""
+    espacio = None
     try:
         if not session.get('logged_in'):
             return jsonify({'success': False, 'error': 'No autorizado'}), 401
@@ -455,18 +493,23 @@ def procesar_zip_elastic():
         
         # Guardar archivo ZIP temporalmente
         filename = secure_filename(file.filename)
-        carpeta_upload = 'static/uploads'
         
-        # Limpiar carpeta antes de nueva carga para evitar mezclar archivos
-        Funciones.crear_carpeta(carpeta_upload)
-        Funciones.borrar_contenido_carpeta(carpeta_upload)
+        # Espacio de trabajo propio para esta carga (no interfiere con otras cargas)
+        EspacioTrabajo.limpiar_expirados()
+        espacio = EspacioTrabajo()
+        carpeta_upload = espacio.ruta
         
-        zip_path = os.path.join(carpeta_upload, filename)
+        zip_path = espacio.ruta_archivo(filename)
         file.save(zip_path)
         print(f"Archivo ZIP guardado en: {zip_path}")
         
-        # Descomprimir ZIP
-        Funciones.descomprimir_zip_local(zip_path, carpeta_upload)
+        if not espacio.verificar_cuota():
+            espacio.limpiar()
+            return jsonify({'success': False, 'error': 'El archivo ZIP supera la cuota de disco permitida'}), 413
+        
+        # Descomprimir ZIP (sin superar la cuota del espacio de trabajo)
+        max_bytes = espacio.cuota_bytes - os.path.getsize(zip_path)
+        Funciones.descomprimir_zip_local(zip_path, carpeta_upload, max_bytes=max_bytes)
         
         # Eliminar archivo ZIP original para no procesarlo
         try:
@@ -480,7 +523,7 @@ def procesar_zip_elastic():
         # Recorrer todo el árbol de directorios de uploads (incluye subcarpetas)
         for root, dirs, files in os.walk(carpeta_upload):
             for nombre_archivo in files:
-                if nombre_archivo.lower().endswith('.json'):
+                if nombre_archivo.lower().endswith('.json') or es_shard_jsonl(nombre_archivo):
                     ruta_completa = os.path.join(root, nombre_archivo)
                     
                     # Obtener tamaño
@@ -492,24 +535,83 @@ def procesar_zip_elastic():
                     archivos_json.append({
                         'nombre': nombre_archivo,
                         'ruta': ruta_completa,
-                        'extension': 'json',
+                        'extension': 'jsonl' if es_shard_jsonl(nombre_archivo) else 'json',
                         'tamaño': tamaño
                     })
         
         print(f"Archivos encontrados: {len(archivos_json)}")
         
         if len(archivos_json) == 0:
+            espacio.limpiar()
             return jsonify({
                 'success': False, 
-                'error': 'El ZIP se descomprimió pero no se encontraron archivos .json en su interior (revisar subcarpetas).'
+                'error': 'El ZIP se descomprimió pero no se encontraron archivos .json en su interior (revisar subcarpetas o cuota de disco).'
             })
 
         return jsonify({
             'success': True,
             'archivos': archivos_json,
+            'trabajo_id': espacio.id,
             'mensaje': f'Se encontraron {len(archivos_json)} archivos JSON listos para cargar.'
         })
         
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        if espacio is not None:
+            espacio.limpiar()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/cargar-zip-elastic', methods=['POST'])
+def cargar_zip_elastic():
+    """API para indexar en un solo paso los JSON de un ZIP, leyéndolos directo del archivo subido"""
+    try:
+        if not session.get('logged_in'):
+            return jsonify({'success': False, 'error': 'No autorizado'}), 401
+        
+        permisos = session.get('permisos', {})
+        if not permisos.get('admin_data_elastic'):
+            return jsonify({'success': False, 'error': 'No tiene permisos para cargar datos'}), 403
+        
+        if not elastic:
+            return jsonify({'success': False, 'error': 'ElasticSearch no está configurado'}), 503
+        
+        if 'file' not in request.files:
+            return jsonify({'success': False, 'error': 'No se envió ningún archivo'}), 400
+        
+        file = request.files['file']
+        index = request.form.get('index')
+        
+        if not file.filename:
+            return jsonify({'success': False, 'error': 'Archivo no válido'}), 400
+        
+        if not index:
+            return jsonify({'success': False, 'error': 'El índice es requerido'}), 400
+        
+        # El upload ya está en un archivo temporal (spooled) con seek: se lee el ZIP
+        # desde ahí y cada JSON va directo al bulk, sin extraer nada a static/uploads
+        documentos = Funciones.iterar_json_zip(file.stream)
+        if request.form.get('reindexar') == 'true':
+            # Reconstruir el índice completo detrás del alias sin cortar la búsqueda
+            resultado = elastic.reindexar_con_alias(index, documentos)
+        else:
+            resultado = elastic.indexar_bulk_stream(index, documentos,
+                                                    generar_id=ElasticSearch.generar_id_gaceta)
+        
+        if resultado['success'] and resultado['indexados'] == 0 and resultado['fallidos'] == 0:
+            return jsonify({
+                'success': False,
+                'error': 'No se encontraron archivos .json en el ZIP'
+            })
+        
+        return jsonify({
+            'success': resultado['success'],
+            'indexados': resultado['indexados'],
+            'errores': resultado['fallidos'],
+            'error': resultado.get('error')
+        })
+        
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -531,78 +633,50 @@ def cargar_documentos_elastic():
         archivos = data.get('archivos', [])
         index = data.get('index')
         metodo = data.get('metodo', 'zip')
+        trabajo_id = data.get('trabajo_id')
         
         if not archivos or not index:
             return jsonify({'success': False, 'error': 'Archivos e índice son requeridos'}), 400
         
-        documentos = []
-        
-        if metodo == 'zip':
-            # Cargar archivos JSON directamente
-            for archivo in archivos:
-                ruta = archivo.get('ruta')
-                print(f"Procesando archivo JSON: {ruta}")
-                if ruta and os.path.exists(ruta):
-                    doc = Funciones.leer_json(ruta)
-                    if doc:
-                        documentos.append(doc)
-        
-        elif metodo == 'webscraping':
-            # Procesar archivos (sin PLN por ahora)
-            for archivo in archivos:
-                ruta = archivo.get('ruta')
-                if not ruta or not os.path.exists(ruta):
-                    continue
-                
-                extension = archivo.get('extension', '').lower()
-                
-                # Extraer texto según tipo de archivo
-                texto = ""
-                if extension == 'pdf':
-                    texto = Funciones.extraer_texto_pdf(ruta)
-                    
-                    # Si no se extrajo texto, intentar con OCR
-                    if not texto or len(texto.strip()) < 100:
-                        try:
-                            texto = Funciones.extraer_texto_pdf_ocr(ruta)
-                        except:
-                            pass
-                
-                elif extension == 'txt':
-                    try:
-                        with open(ruta, 'r', encoding='utf-8') as f:
-                            texto = f.read()
-                    except:
-                        try:
-                            with open(ruta, 'r', encoding='latin-1') as f:
-                                texto = f.read()
-                        except:
-                            pass
-                
-                if not texto or len(texto.strip()) < 50:
-                    continue
-                
-                # Crear documento simple sin PLN
-                documento = {
-                    'texto': texto,
-                    'fecha': datetime.now().isoformat(),
-                    'ruta': ruta,
-                    'nombre_archivo': archivo.get('nombre', '')
-                }
-                
-                documentos.append(documento)
+        espacio = EspacioTrabajo.abrir(trabajo_id) if trabajo_id else None
+        if espacio is None:
+            return jsonify({'success': False, 'error': 'El espacio de trabajo no existe o expiró, vuelva a procesar los archivos'}), 404
         
-        if not documentos:
+        try:
+            # Solo se aceptan rutas dentro del espacio de trabajo de esta carga
+            archivos = [a for a in archivos if a.get('ruta') and espacio.contiene(a['ruta'])]
+            
+            if metodo == 'zip':
+                # Cargar archivos JSON y shards JSONL en streaming, sin armar la lista completa
+                resultado = elastic.indexar_bulk_stream(index, Funciones.iterar_documentos_archivos(archivos),
+                                                        generar_id=ElasticSearch.generar_id_gaceta)
+            
+                if resultado['success'] and resultado['indexados'] == 0 and resultado['fallidos'] == 0:
+                    return jsonify({'success': False, 'error': 'No se pudieron procesar documentos'}), 400
+            
+                return jsonify({
+                    'success': resultado['success'],
+                    'indexados': resultado['indexados'],
+                    'errores': resultado['fallidos']
+                })
+            
+            elif metodo == 'webscraping':
+                # Extracción (en procesos) e indexación por lotes solapadas, sin PLN por ahora
+                resultado = PipelineCarga(elastic, index).cargar_archivos(archivos)
+            
+                if resultado['indexados'] == 0 and resultado['fallidos'] == 0:
+                    return jsonify({'success': False, 'error': 'No se pudieron procesar documentos'}), 400
+            
+                return jsonify({
+                    'success': resultado['success'],
+                    'indexados': resultado['indexados'],
+                    'errores': resultado['fallidos'] + resultado['errores_extraccion']
+                })
+            
             return jsonify({'success': False, 'error': 'No se pudieron procesar documentos'}), 400
-        
-        # Indexar documentos en Elastic
-        resultado = elastic.indexar_bulk(index, documentos)
-        
-        return jsonify({
-            'success': resultado['success'],
-            'indexados': resultado['indexados'],
-            'errores': resultado['fallidos']
-        })
+        finally:
+            # Los archivos ya se cargaron (o fallaron): el espacio de trabajo no se vuelve a usar
+            espacio.limpiar()
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
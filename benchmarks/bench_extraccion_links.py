@@ -0,0 +1,115 @@
+"""
+Micro-benchmark de la extracción de links de WebScraping
+
+Compara la extracción anterior (BeautifulSoup sobre la página completa y una
+comparación por extensión) con WebScraping.extraer_links_html (parseo en
+streaming hasta cerrar el div containerblanco y una sola comparación contra
+todos los sufijos), usando páginas HTML guardadas. Sin --html se generan
+páginas sintéticas con la estructura de los listados de minsalud.gov.co.
+
+Uso:
+    python benchmarks/bench_extraccion_links.py --html paginas_guardadas/ --repeticiones 20
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup
+from Helpers.webScraping import WebScraping
+
+
+URL_BASE = "https://www.minsalud.gov.co/Normativa/Paginas/listado.aspx"
+EXTENSIONES = ['aspx', 'pdf']
+
+
+def extraer_links_referencia(contenido: bytes, url_base: str, listado_extensiones):
+    """Extracción anterior (sin los print por link) como línea base"""
+    soup = BeautifulSoup(contenido, 'lxml')
+    container_div = soup.find('div', class_='containerblanco')
+    links = []
+    if container_div:
+        for link in container_div.find_all('a'):
+            href = link.get('href')
+            if href:
+                full_url = urljoin(url_base, href)
+                for ext in listado_extensiones:
+                    ext_lower = ext.lower().strip()
+                    if full_url.lower().endswith(f'.{ext_lower}'):
+                        links.append({'url': full_url, 'type': ext_lower})
+                        break
+    return links
+
+
+def generar_pagina_sintetica(num_links: int, relleno: int) -> bytes:
+    """Página de listado con menú, relleno fuera del contenedor y num_links dentro"""
+    menu = "".join(f'<li><a href="/Paginas/menu{i}.aspx">Menú {i}</a></li>' for i in range(200))
+    relleno_html = "".join(f'<div class="bloque"><p>Texto de relleno {i}</p><span>{i}</span></div>'
+                           for i in range(relleno))
+    filas = []
+    for i in range(num_links):
+        extension = ('pdf', 'aspx', 'docx', 'html')[i % 4]
+        filas.append(f'<tr><td>Resolución {i}</td><td><a href="Documents/{i}/archivo_{i}.{extension}">'
+                     f'Descargar</a></td></tr>')
+    return (f'<html><head><meta charset="utf-8"><title>Normativa</title></head><body>'
+            f'<ul class="menu">{menu}</ul>{relleno_html}'
+            f'<div class="col containerblanco"><table>{"".join(filas)}</table></div>'
+            f'{relleno_html}</body></html>').encode('utf-8')
+
+
+def cargar_paginas(ruta_html: str):
+    """Carga las páginas guardadas (archivo o carpeta con *.html / *.aspx)"""
+    ruta = Path(ruta_html)
+    archivos = [ruta] if ruta.is_file() else sorted(
+        p for p in ruta.iterdir() if p.suffix.lower() in ('.html', '.htm', '.aspx'))
+    return [(p.name, p.read_bytes()) for p in archivos]
+
+
+def medir(funcion, contenido: bytes, repeticiones: int):
+    """Tiempos (ms) de cada repetición y el resultado de la última"""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(contenido, URL_BASE, EXTENSIONES)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de extracción de links")
+    parser.add_argument("--html", default=None, help="Archivo o carpeta con páginas HTML guardadas")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--links", type=int, default=2000, help="Links por página sintética")
+    parser.add_argument("--relleno", type=int, default=3000, help="Bloques de relleno por página sintética")
+    args = parser.parse_args()
+
+    if args.html:
+        paginas = cargar_paginas(args.html)
+    else:
+        paginas = [(f"sintetica_{args.links}_links", generar_pagina_sintetica(args.links, args.relleno))]
+
+    if not paginas:
+        print("No se encontraron páginas HTML para medir")
+        return
+
+    print(f"{'Página':<35}{'KB':>8}{'Links':>8}{'Ref. ms':>10}{'Nueva ms':>10}{'Aceleración':>13}")
+    for nombre, contenido in paginas:
+        tiempos_ref, links_ref = medir(extraer_links_referencia, contenido, args.repeticiones)
+        tiempos_nuevo, links_nuevo = medir(WebScraping.extraer_links_html, contenido, args.repeticiones)
+
+        if links_ref != links_nuevo:
+            print(f"⚠ {nombre}: los resultados difieren ({len(links_ref)} vs {len(links_nuevo)} links)")
+
+        mediana_ref = statistics.median(tiempos_ref)
+        mediana_nuevo = statistics.median(tiempos_nuevo)
+        print(f"{nombre[:34]:<35}{len(contenido) // 1024:>8}{len(links_nuevo):>8}"
+              f"{mediana_ref:>10.2f}{mediana_nuevo:>10.2f}{mediana_ref / mediana_nuevo:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
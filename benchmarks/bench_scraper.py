@@ -0,0 +1,251 @@
+"""
+Benchmark de rendimiento del rastreo, la descarga y la cosecha de la Imprenta
+
+Levanta servidores locales (sitio de listados ASPX y sitio de gacetas de la
+Imprenta, con HTML grabado o sintético y PDFs sintéticos) y mide contra ellos:
+
+    rastreo   WebScraping.extraer_todos_los_links    páginas/s
+    descarga  WebScraping.descargar_pdfs             archivos/s y MB/s
+    imprenta  Scraper_Gacetas_del_Congreso_HTTP.harvest  gacetas/s y MB/s
+
+Para cada escenario reporta además la latencia p50/p99 de las solicitudes
+(medida en el servidor). Con --salida cada corrida se agrega a un JSONL y se
+compara con la corrida anterior de la misma configuración.
+
+Por defecto las sesiones corren sin limitador de tasa, así se mide el rastreo y
+la descarga y no el arranque del limitador; con --limitador adaptativo se mide
+con LimitadorAdaptativo (--tasa-inicial / --tasa-maxima).
+
+Uso:
+    python benchmarks/bench_scraper.py --latencia-ms 20 --tasa-errores 0.02 --salida bench.jsonl
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from Helpers.webScraping import WebScraping
+from Helpers.Scraper_Gacetas_del_Congreso_HTTP import harvest
+from Helpers.transporteHttp import LimitadorAdaptativo, SinLimite
+from servidor_imprenta_local import ServidorImprentaLocal
+from servidor_sitio_local import ServidorSitioLocal
+
+
+ESCENARIOS = ('rastreo', 'descarga', 'imprenta')
+LIMITADORES = ('ninguno', 'adaptativo')
+
+
+def percentil(valores, p: float) -> float:
+    """Percentil p (0-100) por rango más cercano"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def metricas(escenario: str, servidor, segundos: float, unidades: int, bytes_totales: int = 0,
+             **extra) -> dict:
+    """Resultado de un escenario con tasas y latencias del servidor"""
+    latencias = [l * 1000 for l in servidor.latencias]
+    return {
+        'escenario': escenario,
+        'segundos': round(segundos, 3),
+        'unidades': unidades,
+        'por_segundo': round(unidades / segundos, 2) if segundos > 0 else 0.0,
+        'mb_por_segundo': round(bytes_totales / (1024 * 1024) / segundos, 2) if segundos > 0 else 0.0,
+        'solicitudes': servidor.solicitudes,
+        'p50_ms': round(percentil(latencias, 50), 2),
+        'p99_ms': round(percentil(latencias, 99), 2),
+        **extra
+    }
+
+
+def crear_limitador(args):
+    """Limitador nuevo para cada sesión (el adaptativo arranca de nuevo en cada escenario)"""
+    if args.limitador == 'adaptativo':
+        return LimitadorAdaptativo(tasa_inicial=args.tasa_inicial, tasa_maxima=args.tasa_maxima)
+    return SinLimite()
+
+
+@contextlib.contextmanager
+def silencio(activo: bool):
+    """Oculta la salida de los scrapers (imprimen una línea por link o archivo)"""
+    if not activo:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def medir_rastreo(sitio: ServidorSitioLocal, carpeta: str, args) -> dict:
+    scraper = WebScraping(dominio_base=sitio.url_base, max_workers=args.workers,
+                          max_por_host=args.max_por_host, limitador=crear_limitador(args))
+    json_path = os.path.join(carpeta, 'links.json')
+    sitio.reiniciar_metricas()
+    try:
+        with silencio(not args.verbose):
+            inicio = time.perf_counter()
+            resultado = scraper.extraer_todos_los_links(sitio.url, json_path, ['aspx', 'pdf'],
+                                                        max_iteraciones=args.paginas * 2 + 10,
+                                                        reanudar=False)
+            segundos = time.perf_counter() - inicio
+    finally:
+        scraper.close()
+    # 'iteraciones' no incluye la página inicial
+    paginas = resultado.get('iteraciones', 0) + 1 if resultado.get('success') else 0
+    return metricas('rastreo', sitio, segundos, paginas,
+                    links=resultado.get('total_links', 0), reintentos=scraper.session.reintentos)
+
+
+def medir_descarga(sitio: ServidorSitioLocal, carpeta: str, args) -> dict:
+    json_path = os.path.join(carpeta, 'links.json')
+    if not os.path.exists(json_path):
+        # Sin escenario de rastreo: se arma la lista de links sin medirla
+        with silencio(not args.verbose):
+            scraper = WebScraping(dominio_base=sitio.url_base, max_workers=args.workers,
+                                  limitador=SinLimite())
+            scraper.extraer_todos_los_links(sitio.url, json_path, ['aspx', 'pdf'],
+                                            max_iteraciones=args.paginas * 2 + 10, reanudar=False)
+            scraper.close()
+
+    scraper = WebScraping(dominio_base=sitio.url_base, max_workers=args.workers,
+                          max_por_host=args.max_por_host, limitador=crear_limitador(args))
+    sitio.reiniciar_metricas()
+    try:
+        with silencio(not args.verbose):
+            inicio = time.perf_counter()
+            resultado = scraper.descargar_pdfs(json_path, os.path.join(carpeta, 'descargas'),
+                                               max_workers=args.workers)
+            segundos = time.perf_counter() - inicio
+    finally:
+        scraper.close()
+    return metricas('descarga', sitio, segundos, resultado.get('descargados', 0),
+                    resultado.get('bytes_descargados', 0), errores=resultado.get('errores', 0),
+                    reintentos=resultado.get('reintentos', 0))
+
+
+def medir_imprenta(imprenta: ServidorImprentaLocal, carpeta: str, args) -> dict:
+    imprenta.reiniciar_metricas()
+    with silencio(not args.verbose):
+        inicio = time.perf_counter()
+        resumen = harvest(imprenta.url, workers=args.workers, output_dir=os.path.join(carpeta, 'imprenta'),
+                          limiter=crear_limitador(args))
+        segundos = time.perf_counter() - inicio
+    return metricas('imprenta', imprenta, segundos, resumen['descargadas'], resumen['bytes'],
+                    errores=resumen['errores'], paginas=resumen['paginas'])
+
+
+def ejecutar(escenarios, args) -> list:
+    """Corre los escenarios (args.repeticiones veces) y retorna la corrida mediana de cada uno"""
+    sitio = ServidorSitioLocal(args.paginas, args.pdfs_por_pagina, tamaño_pdf=args.tamano_pdf_kb * 1024,
+                               latencia_ms=args.latencia_ms, tasa_errores=args.tasa_errores,
+                               grabaciones=args.grabaciones_sitio, ruta_inicial=args.ruta_inicial)
+    imprenta = ServidorImprentaLocal(args.gacetas, args.tamano_pdf_kb * 1024, args.latencia_ms,
+                                     args.tasa_errores, args.grabaciones_imprenta)
+    medidores = {'rastreo': (medir_rastreo, sitio), 'descarga': (medir_descarga, sitio),
+                 'imprenta': (medir_imprenta, imprenta)}
+
+    resultados = []
+    with sitio, imprenta:
+        corridas = {escenario: [] for escenario in escenarios}
+        for _ in range(args.repeticiones):
+            with tempfile.TemporaryDirectory(prefix='bench_scraper_') as carpeta:
+                for escenario in escenarios:
+                    medir, servidor = medidores[escenario]
+                    corridas[escenario].append(medir(servidor, carpeta, args))
+        for escenario in escenarios:
+            ordenadas = sorted(corridas[escenario], key=lambda r: r['segundos'])
+            resultados.append(ordenadas[len(ordenadas) // 2])
+    return resultados
+
+
+def configuracion(args) -> dict:
+    """Parámetros que definen una corrida comparable"""
+    config = {clave: getattr(args, clave) for clave in
+              ('paginas', 'pdfs_por_pagina', 'gacetas', 'tamano_pdf_kb', 'latencia_ms', 'tasa_errores',
+               'workers', 'max_por_host', 'grabaciones_sitio', 'grabaciones_imprenta', 'limitador')}
+    if args.limitador == 'adaptativo':
+        config.update(tasa_inicial=args.tasa_inicial, tasa_maxima=args.tasa_maxima)
+    return config
+
+
+def corrida_anterior(salida: str, config: dict):
+    """Última corrida guardada con la misma configuración"""
+    if not salida or not os.path.exists(salida):
+        return None
+    anterior = None
+    with open(salida, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            if registro.get('configuracion') == config:
+                anterior = registro
+    return anterior
+
+
+def imprimir(resultados, anterior):
+    previos = {r['escenario']: r for r in (anterior or {}).get('resultados', [])}
+    print(f"{'Escenario':<11}{'Unidades':>9}{'Seg.':>9}{'Unid./s':>10}{'MB/s':>9}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'Solic.':>8}{'vs. ant.':>10}")
+    for r in resultados:
+        previo = previos.get(r['escenario'])
+        cambio = (f"{(r['por_segundo'] / previo['por_segundo'] - 1):+.0%}"
+                  if previo and previo.get('por_segundo') else "-")
+        print(f"{r['escenario']:<11}{r['unidades']:>9}{r['segundos']:>9.2f}{r['por_segundo']:>10.2f}"
+              f"{r['mb_por_segundo']:>9.2f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['solicitudes']:>8}{cambio:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del scraper contra servidores locales")
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS),
+                        help=f"Escenarios separados por comas ({', '.join(ESCENARIOS)})")
+    parser.add_argument("--paginas", type=int, default=40, help="Páginas ASPX sintéticas")
+    parser.add_argument("--pdfs-por-pagina", type=int, default=5)
+    parser.add_argument("--gacetas", type=int, default=300, help="Filas de la tabla de la Imprenta")
+    parser.add_argument("--tamano-pdf-kb", type=int, default=256)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--tasa-errores", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-por-host", type=int, default=8)
+    parser.add_argument("--limitador", choices=LIMITADORES, default='ninguno',
+                        help="Limitador de tasa por host de las sesiones (default: ninguno)")
+    parser.add_argument("--tasa-inicial", type=float, default=5.0, help="Solicitudes/s iniciales (adaptativo)")
+    parser.add_argument("--tasa-maxima", type=float, default=20.0, help="Solicitudes/s máximas (adaptativo)")
+    parser.add_argument("--grabaciones-sitio", default=None, help="Carpeta con páginas ASPX grabadas")
+    parser.add_argument("--ruta-inicial", default=None, help="Ruta de la primera página grabada")
+    parser.add_argument("--grabaciones-imprenta", default=None, help="Carpeta con respuestas grabadas de la Imprenta")
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--salida", default=None, help="JSONL donde se agregan los resultados")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida de los scrapers")
+    args = parser.parse_args()
+
+    escenarios = [e.strip() for e in args.escenarios.split(',') if e.strip()]
+    desconocidos = [e for e in escenarios if e not in ESCENARIOS]
+    if desconocidos:
+        parser.error(f"escenarios desconocidos: {', '.join(desconocidos)}")
+
+    config = configuracion(args)
+    print("Configuración: " + ", ".join(f"{clave}={valor}" for clave, valor in config.items()))
+    resultados = ejecutar(escenarios, args)
+    imprimir(resultados, corrida_anterior(args.salida, config))
+
+    if args.salida:
+        with open(args.salida, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'fecha': time.strftime("%Y-%m-%dT%H:%M:%S"), 'configuracion': config,
+                                'resultados': resultados}, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
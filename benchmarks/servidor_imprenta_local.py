@@ -0,0 +1,301 @@
+"""
+Servidor local que imita el sitio de gacetas de la Imprenta (JSF/PrimeFaces)
+
+Sirve la página index.xhtml con el formulario formResumen y la tabla
+dataTableResumen, responde las solicitudes parciales del paginador
+(partial-response XML con ViewState y totalRecords) y los POST del botón
+"Descargar Pdf" con PDFs sintéticos. Valida el ViewState como lo hace el
+servidor real (ViewExpiredException si no coincide).
+
+Si se indica una carpeta de grabaciones, se reproducen las respuestas
+guardadas del sitio real en lugar de las sintéticas:
+    index.xhtml            página inicial
+    pagina_<first>.xml     respuesta parcial del paginador para ese offset
+
+Permite inyectar latencia y errores (503) para medir el comportamiento del
+scraper bajo un servidor lento o inestable, y registra la latencia de cada
+solicitud (desde que se recibe hasta que se termina de enviar la respuesta).
+
+Uso:
+    python benchmarks/servidor_imprenta_local.py --puerto 8081 --gacetas 500
+"""
+import argparse
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+
+FORM_ID = "formResumen"
+TABLE_ID = "formResumen:dataTableResumen"
+VIEWSTATE_NAME = "javax.faces.ViewState"
+RUTA_INDEX = "/gacetas/index.xhtml"
+PATRON_BOTON = re.compile(rf'^{re.escape(TABLE_ID)}:(\d+):btnDescargar$')
+
+
+class ServidorHilos(ThreadingHTTPServer):
+    """ThreadingHTTPServer que no reporta los clientes que cierran la conexión"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def generar_pdf(indice: int, tamaño: int) -> bytes:
+    """PDF sintético mínimo (cabecera válida) relleno hasta el tamaño indicado"""
+    cabecera = (f"%PDF-1.4\n% Gaceta sintetica {indice}\n"
+                f"1 0 obj << /Type /Catalog >> endobj\n").encode('ascii')
+    relleno = max(0, tamaño - len(cabecera) - 6)
+    return cabecera + (b"0" * relleno) + b"\n%%EOF"
+
+
+class ServidorImprentaLocal:
+    """Servidor de prueba del sitio de gacetas (ejecutado en un hilo)"""
+
+    def __init__(self, total_gacetas: int = 500, tamaño_pdf: int = 256 * 1024,
+                 latencia_ms: float = 0.0, tasa_errores: float = 0.0,
+                 grabaciones: str = None, host: str = "127.0.0.1", puerto: int = 0):
+        """
+        Configura el servidor
+
+        Args:
+            total_gacetas: Filas de la tabla
+            tamaño_pdf: Bytes de cada PDF sintético
+            latencia_ms: Latencia agregada a cada respuesta
+            tasa_errores: Fracción de solicitudes que responden 503
+            grabaciones: Carpeta con respuestas grabadas del sitio real (opcional)
+            host: Interfaz de escucha
+            puerto: Puerto (0: uno libre)
+        """
+        self.total_gacetas = total_gacetas
+        self.tamaño_pdf = tamaño_pdf
+        self.latencia_ms = latencia_ms
+        self.tasa_errores = tasa_errores
+        self.grabaciones = grabaciones
+        self.host = host
+        self.puerto = puerto
+        self.view_states = set()
+        self.solicitudes = 0
+        self.latencias = []
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._hilo = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.puerto}{RUTA_INDEX}"
+
+    def fila(self, indice: int) -> dict:
+        """Datos de la fila indice (deterministas)"""
+        senado = indice % 2 == 0
+        return {
+            "numero": str(1000 + indice),
+            "corporacion": "Senado de la República" if senado else "Cámara de Representantes",
+            "fecha": f"{indice % 28 + 1:02d}/{indice % 12 + 1:02d}/{2020 + indice % 5}"
+        }
+
+    def html_filas(self, first: int, rows: int) -> str:
+        """HTML de las filas <tr> de una página de la tabla"""
+        filas = []
+        for i in range(first, min(first + rows, self.total_gacetas)):
+            datos = self.fila(i)
+            filas.append(
+                f'<tr data-ri="{i}" class="ui-widget-content" role="row">'
+                f'<td role="gridcell"><label id="{TABLE_ID}:{i}:lblNumero">{datos["numero"]}</label></td>'
+                f'<td role="gridcell">{escape(datos["corporacion"])}</td>'
+                f'<td role="gridcell">{datos["fecha"]}</td>'
+                f'<td role="gridcell"><button id="{TABLE_ID}:{i}:btnDescargar" '
+                f'name="{TABLE_ID}:{i}:btnDescargar" title="Descargar Pdf" type="submit">'
+                f'<span class="ui-button-text">Descargar</span></button></td></tr>'
+            )
+        return "".join(filas)
+
+    def reiniciar_metricas(self):
+        """Pone en cero el conteo de solicitudes y las latencias registradas"""
+        with self._lock:
+            self.solicitudes = 0
+            self.latencias = []
+
+    def nuevo_view_state(self) -> str:
+        view_state = secrets.token_hex(16)
+        with self._lock:
+            self.view_states.add(view_state)
+        return view_state
+
+    def view_state_valido(self, view_state: str) -> bool:
+        with self._lock:
+            return view_state in self.view_states
+
+    def _leer_grabacion(self, nombre: str):
+        if not self.grabaciones:
+            return None
+        ruta = os.path.join(self.grabaciones, nombre)
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, 'rb') as f:
+            return f.read()
+
+    def pagina_index(self) -> bytes:
+        """Página inicial con el formulario, el ViewState y 10 filas"""
+        grabada = self._leer_grabacion('index.xhtml')
+        if grabada is not None:
+            return grabada
+        view_state = self.nuevo_view_state()
+        paginas = "".join(f'<a class="ui-paginator-page ui-state-default" href="#">{p}</a>'
+                          for p in range(1, min(10, (self.total_gacetas + 9) // 10) + 1))
+        return (
+            '<!DOCTYPE html><html><head><title>Gacetas del Congreso</title></head><body>'
+            f'<form id="{FORM_ID}" name="{FORM_ID}" method="post" action="{RUTA_INDEX}">'
+            f'<input type="hidden" name="{FORM_ID}" value="{FORM_ID}" />'
+            f'<input type="text" name="{FORM_ID}:txtNumero" value="" />'
+            f'<div id="{TABLE_ID}" class="ui-datatable">'
+            f'<div class="ui-paginator"><span class="ui-paginator-pages">{paginas}</span>'
+            f'<select id="{TABLE_ID}_rppDD" name="{TABLE_ID}_rppDD">'
+            '<option value="10" selected="selected">10</option><option value="50">50</option></select></div>'
+            f'<table><tbody id="{TABLE_ID}_data">{self.html_filas(0, 10)}</tbody></table></div>'
+            f'<input type="hidden" name="{VIEWSTATE_NAME}" id="j_id1:{VIEWSTATE_NAME}:0" value="{view_state}" />'
+            '</form></body></html>'
+        ).encode('utf-8')
+
+    def respuesta_paginacion(self, first: int, rows: int, view_state: str) -> bytes:
+        """partial-response del paginador con las filas, el ViewState y totalRecords"""
+        grabada = self._leer_grabacion(f'pagina_{first}.xml')
+        if grabada is not None:
+            return grabada
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><partial-response id="j_id1"><changes>'
+            f'<update id="{TABLE_ID}"><![CDATA[{self.html_filas(first, rows)}]]></update>'
+            f'<update id="j_id1:{VIEWSTATE_NAME}:0"><![CDATA[{view_state}]]></update>'
+            '<extension ln="primefaces" type="args">'
+            f'{{"totalRecords":{self.total_gacetas},"validationFailed":false}}</extension>'
+            '</changes></partial-response>'
+        ).encode('utf-8')
+
+    def crear_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _responder(self, estado: int, cuerpo: bytes, tipo: str, cabeceras: dict = None):
+                self.send_response(estado)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                for clave, valor in (cabeceras or {}).items():
+                    self.send_header(clave, valor)
+                self.end_headers()
+                self.wfile.write(cuerpo)
+                with servidor._lock:
+                    servidor.latencias.append(time.perf_counter() - self._inicio)
+
+            def _inyectar(self) -> bool:
+                """Aplica latencia y errores configurados; True si ya se respondió con error"""
+                with servidor._lock:
+                    servidor.solicitudes += 1
+                if servidor.latencia_ms:
+                    time.sleep(servidor.latencia_ms / 1000)
+                if servidor.tasa_errores and random.random() < servidor.tasa_errores:
+                    self._responder(503, b"Servicio no disponible", "text/plain", {"Retry-After": "0"})
+                    return True
+                return False
+
+            def do_GET(self):
+                self._inicio = time.perf_counter()
+                if self._inyectar():
+                    return
+                if urlsplit(self.path).path != RUTA_INDEX:
+                    self._responder(404, b"No encontrado", "text/plain")
+                    return
+                self._responder(200, servidor.pagina_index(), "text/html; charset=UTF-8",
+                                {"Set-Cookie": f"JSESSIONID={secrets.token_hex(8)}; Path=/gacetas"})
+
+            def do_POST(self):
+                self._inicio = time.perf_counter()
+                longitud = int(self.headers.get("Content-Length", 0))
+                datos = parse_qs(self.rfile.read(longitud).decode('utf-8'), keep_blank_values=True)
+                if self._inyectar():
+                    return
+                campos = {clave: valores[-1] for clave, valores in datos.items()}
+                view_state = campos.get(VIEWSTATE_NAME, "")
+
+                if not servidor.grabaciones and not servidor.view_state_valido(view_state):
+                    error = ('<?xml version="1.0" encoding="UTF-8"?><partial-response><error>'
+                             '<error-name>javax.faces.application.ViewExpiredException</error-name>'
+                             '<error-message><![CDATA[viewId:/index.xhtml]]></error-message>'
+                             '</error></partial-response>').encode('utf-8')
+                    self._responder(200, error, "text/xml; charset=UTF-8")
+                    return
+
+                if campos.get("javax.faces.partial.ajax") == "true":
+                    first = int(campos.get(f"{TABLE_ID}_first", 0))
+                    rows = int(campos.get(f"{TABLE_ID}_rows", 10))
+                    self._responder(200, servidor.respuesta_paginacion(first, rows, view_state),
+                                    "text/xml; charset=UTF-8")
+                    return
+
+                for clave in campos:
+                    coincidencia = PATRON_BOTON.match(clave)
+                    if coincidencia:
+                        indice = int(coincidencia.group(1))
+                        if indice >= servidor.total_gacetas:
+                            break
+                        nombre = f"gaceta_{servidor.fila(indice)['numero']}.pdf"
+                        self._responder(200, generar_pdf(indice, servidor.tamaño_pdf), "application/pdf",
+                                        {"Content-Disposition": f'attachment; filename="{nombre}"'})
+                        return
+                self._responder(400, b"Solicitud no reconocida", "text/plain")
+
+        return Handler
+
+    def iniciar(self) -> str:
+        """Inicia el servidor en un hilo y retorna la URL de index.xhtml"""
+        self._servidor = ServidorHilos((self.host, self.puerto), self.crear_handler())
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self.url
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local del sitio de gacetas de la Imprenta")
+    parser.add_argument("--puerto", type=int, default=8081)
+    parser.add_argument("--gacetas", type=int, default=500, help="Filas de la tabla")
+    parser.add_argument("--tamano-pdf-kb", type=int, default=256)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--tasa-errores", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--grabaciones", default=None, help="Carpeta con respuestas grabadas")
+    args = parser.parse_args()
+
+    servidor = ServidorImprentaLocal(args.gacetas, args.tamano_pdf_kb * 1024, args.latencia_ms,
+                                     args.tasa_errores, args.grabaciones, puerto=args.puerto)
+    print(f"Sirviendo {servidor.iniciar()} (Ctrl+C para detener)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.detener()
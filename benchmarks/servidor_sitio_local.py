@@ -0,0 +1,211 @@
+"""
+Servidor local que imita un sitio de normativa (listados ASPX con PDFs)
+
+Genera páginas con la estructura de los listados de minsalud.gov.co: menú
+fuera del contenedor y, dentro del div containerblanco, links relativos a
+otras páginas .aspx (un árbol que alcanza todas las páginas) y a PDFs
+sintéticos. Cualquier ruta .pdf responde un PDF sintético determinista.
+
+Si se indica una carpeta de grabaciones, las rutas se buscan primero ahí
+(ej: grabaciones/Normativa/Paginas/normativa.aspx). En el HTML grabado los
+links absolutos se reescriben a rutas locales, así el rastreo nunca sale
+al sitio real.
+
+Permite inyectar latencia y errores (503) y registra la latencia de cada
+solicitud, igual que servidor_imprenta_local.
+
+Uso:
+    python benchmarks/servidor_sitio_local.py --puerto 8082 --paginas 100
+"""
+import argparse
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+
+from servidor_imprenta_local import ServidorHilos, generar_pdf
+
+
+RUTA_PAGINAS = "/Normativa/Paginas"
+RUTA_DOCUMENTOS = "/Normativa/Documents"
+PATRON_PAGINA = re.compile(rf'^{RUTA_PAGINAS}/p(\d+)\.aspx$')
+PATRON_LINK_ABSOLUTO = re.compile(rb'''((?:href|src)=["'])https?://[^/"']+/''', re.IGNORECASE)
+
+
+class ServidorSitioLocal:
+    """Servidor de prueba de un sitio de listados ASPX (ejecutado en un hilo)"""
+
+    def __init__(self, paginas: int = 50, pdfs_por_pagina: int = 10, enlaces_por_pagina: int = 3,
+                 tamaño_pdf: int = 256 * 1024, latencia_ms: float = 0.0, tasa_errores: float = 0.0,
+                 grabaciones: str = None, ruta_inicial: str = None, host: str = "127.0.0.1",
+                 puerto: int = 0):
+        """
+        Configura el servidor
+
+        Args:
+            paginas: Páginas .aspx sintéticas
+            pdfs_por_pagina: PDFs enlazados desde cada página
+            enlaces_por_pagina: Páginas hijas enlazadas desde cada página
+            tamaño_pdf: Bytes de cada PDF sintético
+            latencia_ms: Latencia agregada a cada respuesta
+            tasa_errores: Fracción de solicitudes que responden 503
+            grabaciones: Carpeta con páginas grabadas del sitio real (opcional)
+            ruta_inicial: Ruta de la primera página (default: la página sintética p0)
+            host: Interfaz de escucha
+            puerto: Puerto (0: uno libre)
+        """
+        self.paginas = paginas
+        self.pdfs_por_pagina = pdfs_por_pagina
+        self.enlaces_por_pagina = enlaces_por_pagina
+        self.tamaño_pdf = tamaño_pdf
+        self.latencia_ms = latencia_ms
+        self.tasa_errores = tasa_errores
+        self.grabaciones = grabaciones
+        self.ruta_inicial = ruta_inicial or f"{RUTA_PAGINAS}/p0.aspx"
+        self.host = host
+        self.puerto = puerto
+        self.solicitudes = 0
+        self.latencias = []
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._hilo = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.puerto}{self.ruta_inicial}"
+
+    @property
+    def url_base(self) -> str:
+        return f"http://{self.host}:{self.puerto}/Normativa/"
+
+    def reiniciar_metricas(self):
+        """Pone en cero el conteo de solicitudes y las latencias registradas"""
+        with self._lock:
+            self.solicitudes = 0
+            self.latencias = []
+
+    def pagina(self, indice: int) -> bytes:
+        """HTML de la página sintética indice"""
+        menu = "".join(f'<li><a href="{RUTA_PAGINAS}/menu{i}.aspx">Menú {i}</a></li>' for i in range(30))
+        hijas = range(indice * self.enlaces_por_pagina + 1,
+                      min(self.paginas, (indice + 1) * self.enlaces_por_pagina + 1))
+        filas = [f'<tr><td>Listado {h}</td><td><a href="p{h}.aspx">Ver</a></td></tr>' for h in hijas]
+        # Link de vuelta al inicio: el rastreo debe reconocerlo como ya visitado
+        filas.append('<tr><td>Inicio</td><td><a href="./p0.aspx#inicio">Inicio</a></td></tr>')
+        filas.extend(f'<tr><td>Resolución {indice}-{j}</td>'
+                     f'<td><a href="../Documents/{indice}/resolucion_{indice}_{j}.pdf">Descargar</a></td></tr>'
+                     for j in range(self.pdfs_por_pagina))
+        return (f'<html><head><meta charset="utf-8"><title>Normativa {indice}</title></head><body>'
+                f'<ul class="menu">{menu}</ul>'
+                f'<div class="col containerblanco"><table>{"".join(filas)}</table></div>'
+                f'</body></html>').encode('utf-8')
+
+    def _leer_grabacion(self, ruta: str):
+        if not self.grabaciones:
+            return None
+        raiz = os.path.abspath(self.grabaciones)
+        archivo = os.path.abspath(os.path.join(raiz, unquote(ruta).lstrip('/')))
+        # Solo archivos dentro de la carpeta de grabaciones
+        if not archivo.startswith(raiz + os.sep) or not os.path.isfile(archivo):
+            return None
+        with open(archivo, 'rb') as f:
+            return PATRON_LINK_ABSOLUTO.sub(rb'\1/', f.read())
+
+    def crear_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _responder(self, estado: int, cuerpo: bytes, tipo: str, cabeceras: dict = None):
+                self.send_response(estado)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                for clave, valor in (cabeceras or {}).items():
+                    self.send_header(clave, valor)
+                self.end_headers()
+                self.wfile.write(cuerpo)
+                with servidor._lock:
+                    servidor.latencias.append(time.perf_counter() - self._inicio)
+
+            def do_GET(self):
+                self._inicio = time.perf_counter()
+                with servidor._lock:
+                    servidor.solicitudes += 1
+                if servidor.latencia_ms:
+                    time.sleep(servidor.latencia_ms / 1000)
+                if servidor.tasa_errores and random.random() < servidor.tasa_errores:
+                    self._responder(503, b"Servicio no disponible", "text/plain", {"Retry-After": "0"})
+                    return
+
+                ruta = urlsplit(self.path).path
+                if ruta.lower().endswith('.pdf'):
+                    self._responder(200, generar_pdf(zlib.crc32(ruta.encode('utf-8')), servidor.tamaño_pdf),
+                                    "application/pdf")
+                    return
+
+                grabada = servidor._leer_grabacion(ruta)
+                if grabada is not None:
+                    self._responder(200, grabada, "text/html; charset=utf-8")
+                    return
+
+                coincidencia = PATRON_PAGINA.match(ruta)
+                if coincidencia and int(coincidencia.group(1)) < servidor.paginas:
+                    self._responder(200, servidor.pagina(int(coincidencia.group(1))), "text/html; charset=utf-8")
+                    return
+                self._responder(404, b"No encontrado", "text/plain")
+
+        return Handler
+
+    def iniciar(self) -> str:
+        """Inicia el servidor en un hilo y retorna la URL de la página inicial"""
+        self._servidor = ServidorHilos((self.host, self.puerto), self.crear_handler())
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self.url
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de un sitio de listados ASPX con PDFs")
+    parser.add_argument("--puerto", type=int, default=8082)
+    parser.add_argument("--paginas", type=int, default=50)
+    parser.add_argument("--pdfs-por-pagina", type=int, default=10)
+    parser.add_argument("--tamano-pdf-kb", type=int, default=256)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--tasa-errores", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--grabaciones", default=None, help="Carpeta con páginas grabadas")
+    parser.add_argument("--ruta-inicial", default=None, help="Ruta de la primera página grabada")
+    args = parser.parse_args()
+
+    servidor = ServidorSitioLocal(args.paginas, args.pdfs_por_pagina, tamaño_pdf=args.tamano_pdf_kb * 1024,
+                                  latencia_ms=args.latencia_ms, tasa_errores=args.tasa_errores,
+                                  grabaciones=args.grabaciones, ruta_inicial=args.ruta_inicial,
+                                  puerto=args.puerto)
+    print(f"Sirviendo {servidor.iniciar()} (Ctrl+C para detener)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.detener()